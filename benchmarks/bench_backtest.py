@@ -0,0 +1,51 @@
+"""Run time of the vectorized backtest over synthetic 1 min MNQ bars.
+
+Bars follow a random walk on the trading calendar (Sunday evening to Friday,
+without the daily 16:00-17:00 break) for 1 and 5 years.
+
+Run from the repository root:
+    python -m benchmarks.bench_backtest
+"""
+import os
+import numpy as np
+import pandas as pd
+from src.configuration import Configuration
+from src.backtest.vectorized import VectorizedBacktest
+
+
+YEARS = (1, 5)
+
+
+def synthetic_bars(years: int, timezone: str, seed: int = 0) -> pd.DataFrame:
+    index = pd.date_range('2020-01-05 17:00', periods=years * 365 * 24 * 60, freq='1min', tz=timezone)
+    index = index[((index.dayofweek < 5) | ((index.dayofweek == 6) & (index.hour >= 17))) & (index.hour != 16)]
+
+    rng = np.random.default_rng(seed)
+    n = len(index)
+    close = np.round((18000 + np.cumsum(rng.normal(0, 4, n))) * 4) / 4
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    wick = np.round(rng.uniform(0, 3, (2, n)) * 4) / 4
+
+    return pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + wick[0],
+        'low': np.minimum(open_, close) - wick[1],
+        'close': close,
+        'volume': np.full(n, 10.0),
+    }, index=index)
+
+
+def main():
+    cfg = Configuration(os.path.join(os.getcwd(), "run.cfg"))
+    backtest = VectorizedBacktest(cfg)
+
+    print(f"{'history':<9} {'bars':>9} {'trades':>7} {'seconds':>8} {'bars/s':>12}")
+    for years in YEARS:
+        bars = synthetic_bars(years, cfg.timezone)
+        result = backtest.run(bars)
+        print(f"{f'{years} year(s)':<9} {result.bars:>9} {len(result.trades):>7} "
+              f"{result.seconds:>8.3f} {result.bars / result.seconds:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Per-bar cost of the Bollinger Band and RSI indicators.
+
+Compares recomputing the indicators with the ta library over the full history
+(what the strategy did on every bar) with the incremental O(1) update, for
+1 day and 1 year of 1 min bars.
+
+Run from the repository root:
+    python -m benchmarks.bench_indicators
+"""
+import time
+import numpy as np
+import pandas as pd
+from ta.volatility import BollingerBands
+from ta.momentum import RSIIndicator
+from src.indicators.incremental import RollingBollinger, WilderRSI
+
+
+BARS_PER_DAY = 23 * 60
+HISTORIES = {
+    '1 day': BARS_PER_DAY,
+    '1 year': 252 * BARS_PER_DAY,
+}
+
+
+def random_walk(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return (20000 + np.cumsum(rng.normal(0, 2, n))).round(2)
+
+
+def full_recomputation_seconds(close: np.ndarray, repeat: int = 5) -> float:
+    """Seconds to compute both indicators over the full history once"""
+    series = pd.Series(close)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        BollingerBands(series, window=20, window_dev=2).bollinger_mavg()
+        RSIIndicator(series, window=14).rsi()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def incremental_seconds_per_bar(close: np.ndarray) -> float:
+    """Average seconds to update both indicators with one bar"""
+    bollinger = RollingBollinger(20, 2)
+    rsi = WilderRSI(14)
+    values = close.tolist()
+
+    start = time.perf_counter()
+    for value in values:
+        bollinger.update(value)
+        rsi.update(value)
+    return (time.perf_counter() - start) / len(values)
+
+
+def main():
+    print(f"{'history':<8} {'bars':>8} {'ta full (ms/bar)':>18} {'incremental (us/bar)':>22} {'speedup':>9}")
+    for name, n in HISTORIES.items():
+        close = random_walk(n)
+        full = full_recomputation_seconds(close)
+        incremental = incremental_seconds_per_bar(close)
+        print(f"{name:<8} {n:>8} {full * 1e3:>18.3f} {incremental * 1e6:>22.3f} {full / incremental:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
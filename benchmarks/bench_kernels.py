@@ -0,0 +1,69 @@
+"""Batch cost of the Bollinger Band and RSI indicators.
+
+Compares computing both indicators over a full history with the ta library
+and with the NumPy kernels, for 1 year and 10 years of 1 min bars.
+
+Run from the repository root:
+    python -m benchmarks.bench_kernels
+"""
+import time
+import numpy as np
+import pandas as pd
+from ta.volatility import BollingerBands
+from ta.momentum import RSIIndicator
+from src.indicators import kernels
+
+
+BARS_PER_YEAR = 252 * 23 * 60
+HISTORIES = {
+    '1 year': BARS_PER_YEAR,
+    '10 years': 10 * BARS_PER_YEAR,
+}
+
+
+def random_walk(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return (20000 + np.cumsum(rng.normal(0, 2, n))).round(2)
+
+
+def best_of(func, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def ta_seconds(close: np.ndarray) -> float:
+    series = pd.Series(close)
+
+    def run():
+        bands = BollingerBands(series, window=20, window_dev=2)
+        bands.bollinger_mavg()
+        bands.bollinger_hband()
+        bands.bollinger_lband()
+        RSIIndicator(series, window=14).rsi()
+
+    return best_of(run)
+
+
+def kernel_seconds(close: np.ndarray) -> float:
+    def run():
+        kernels.bollinger_bands(close, window=20, window_dev=2)
+        kernels.rsi(close, window=14)
+
+    return best_of(run)
+
+
+def main():
+    print(f"{'history':<9} {'bars':>9} {'ta (ms)':>10} {'kernels (ms)':>13} {'speedup':>9}")
+    for name, n in HISTORIES.items():
+        close = random_walk(n)
+        with_ta = ta_seconds(close)
+        with_kernels = kernel_seconds(close)
+        print(f"{name:<9} {n:>9} {with_ta * 1e3:>10.1f} {with_kernels * 1e3:>13.1f} {with_ta / with_kernels:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
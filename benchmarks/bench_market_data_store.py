@@ -0,0 +1,53 @@
+"""Load times of the on-disk market data store over synthetic 1 min MNQ bars.
+
+Stores 1 year of bars, then times opening the store and reading all bars,
+one week and one day by timestamp range, and copying all bars into a
+DataFrame.
+
+Run from the repository root:
+    python -m benchmarks.bench_market_data_store
+"""
+import time
+import tempfile
+import pandas as pd
+from src.market_data.market_data_store import MarketDataStore
+from benchmarks.bench_backtest import synthetic_bars
+
+
+TIMEZONE = 'US/Central'
+KEY = 'MNQ_202012_1min'
+
+
+def timed(function, repeat: int = 20) -> float:
+    """Best wall time of the function in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best * 1e3
+
+
+def main():
+    bars = synthetic_bars(1, TIMEZONE)
+
+    with tempfile.TemporaryDirectory() as root:
+        started = time.perf_counter()
+        MarketDataStore(root, TIMEZONE).append_frame(KEY, bars)
+        print(f"Stored {len(bars)} bars in {time.perf_counter() - started:.2f}s")
+
+        end = bars.index[-1]
+        cases = {
+            'open + read all': lambda: MarketDataStore(root, TIMEZONE).read(KEY)['close'].sum(),
+            'read last week': lambda: MarketDataStore(root, TIMEZONE).read(KEY, end - pd.Timedelta('7D'), end)['close'].sum(),
+            'read last day': lambda: MarketDataStore(root, TIMEZONE).read(KEY, end - pd.Timedelta('1D'), end)['close'].sum(),
+            'read_frame all': lambda: MarketDataStore(root, TIMEZONE).read_frame(KEY),
+        }
+
+        print(f"{'case':<16} {'ms':>8}")
+        for name, function in cases.items():
+            print(f"{name:<16} {timed(function):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
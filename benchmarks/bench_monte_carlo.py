@@ -0,0 +1,39 @@
+"""Throughput of the Monte Carlo analysis of backtest trades.
+
+Backtests 1 year of synthetic 1 min MNQ bars, then simulates 10,000
+block-bootstrapped years of its sessions with one process and with all
+cores, and prints the drawdown and pause percentiles.
+
+Run from the repository root:
+    python -m benchmarks.bench_monte_carlo
+"""
+import os
+import time
+from src.configuration import Configuration
+from src.backtest.monte_carlo import MonteCarlo
+from src.backtest.vectorized import VectorizedBacktest
+from benchmarks.bench_backtest import synthetic_bars
+
+
+PATHS = 10000
+
+
+def main():
+    cfg = Configuration(os.path.join(os.getcwd(), "run.cfg"))
+    trades = VectorizedBacktest(cfg).run(synthetic_bars(1, cfg.timezone)).trades
+
+    print(f"{len(trades)} trades")
+    print(f"{'processes':>9} {'paths':>6} {'seconds':>8} {'paths/s':>9}")
+    for processes in sorted({1, os.cpu_count()}):
+        monte_carlo = MonteCarlo(cfg, trades, processes=processes)
+        started = time.perf_counter()
+        result = monte_carlo.run(PATHS, seed=0)
+        seconds = time.perf_counter() - started
+        print(f"{processes:>9} {PATHS:>6} {seconds:>8.2f} {PATHS / seconds:>9.0f}")
+
+    print()
+    print(result.percentiles().to_string())
+
+
+if __name__ == "__main__":
+    main()
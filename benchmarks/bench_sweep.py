@@ -0,0 +1,42 @@
+"""Throughput of the parameter sweep over synthetic 1 min MNQ bars.
+
+Sweeps a grid of Bollinger / RSI / bracket parameters over 1 year of bars
+with one process and with all cores, and prints the best parameter sets.
+
+Run from the repository root:
+    python -m benchmarks.bench_sweep
+"""
+import os
+import time
+from src.configuration import Configuration
+from src.backtest.sweep import ParameterSweep, parameter_grid
+from benchmarks.bench_backtest import synthetic_bars
+
+
+SPACE = {
+    'bollinger_period': [10, 20, 40],
+    'rsi_period': [7, 14, 28],
+    'rsi_threshold': [25, 30, 35],
+    'stop_loss_ticks': [60, 120],
+    'take_profit_ticks': [150, 300],
+}
+
+
+def main():
+    cfg = Configuration(os.path.join(os.getcwd(), "run.cfg"))
+    bars = synthetic_bars(1, cfg.timezone)
+    grid = parameter_grid(SPACE)
+
+    print(f"{'processes':>9} {'backtests':>9} {'seconds':>8} {'backtests/s':>12}")
+    for processes in sorted({1, os.cpu_count()}):
+        started = time.perf_counter()
+        table = ParameterSweep(cfg, bars, processes=processes).run(grid)
+        seconds = time.perf_counter() - started
+        print(f"{processes:>9} {len(table):>9} {seconds:>8.2f} {len(table) / seconds:>12.1f}")
+
+    print()
+    print(table.head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
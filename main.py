@@ -1,20 +1,78 @@
-from src.utilities.logger import Logger
-from src.configuration import Configuration
-from dotenv import load_dotenv
-from src.trading_system import TradingSystem
+from src.monitoring.startup_profile import startup_profile
+import argparse
 import logging
+import os
+
+
+def replay_speed(value: str):
+    """Replay speed argument, a multiple of real time or 'max'"""
+    if value == 'max':
+        return None
+    speed = float(value.rstrip('x'))
+    if speed <= 0:
+        raise argparse.ArgumentTypeError(f"Invalid replay speed: {value}")
+    return speed
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="IBKR futures trading system")
+    parser.add_argument(
+        '--profile-startup',
+        action='store_true',
+        help="Connect, log import and startup phase timings, then exit without trading")
+    parser.add_argument(
+        '--replay',
+        nargs='+',
+        metavar='SOURCE',
+        help="Replay the market data store, e.g. output/market_data, or legacy market data "
+             "files through the trading system against a simulated broker, then exit")
+    parser.add_argument(
+        '--speed',
+        type=replay_speed,
+        default=None,
+        help="Replay speed as a multiple of real time, e.g. 1 or 100, or 'max' (default) for as fast as possible")
+    parser.add_argument(
+        '--start',
+        default=None,
+        help="Replay start time in the configured timezone, e.g. '2025-03-18 08:00'")
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        startup_profile.enable_import_profiling()
+
+    with startup_profile.phase("imports"):
+        from src.utilities.logger import Logger
+        from src.configuration import Configuration
+        from dotenv import load_dotenv
+        from src.trading_system import TradingSystem
+
     load_dotenv()
 
     try:
 
-        Logger()
-        cfg = Configuration('run.cfg')
+        with startup_profile.phase("logger"):
+            Logger()
+
+        with startup_profile.phase("configuration"):
+            cfg = Configuration('run.cfg')
+
+        if args.replay:
+            import pandas as pd
+            from src.backtest.replay import Replay, load_replay_bars
+
+            start = None if args.start is None else pd.Timestamp(args.start).tz_localize(cfg.timezone)
+            replay = Replay(cfg, load_replay_bars(args.replay, cfg), os.path.join('output', 'replay'),
+                            speed=args.speed, start=start)
+            logging.info(f"Replay summary: {replay.run().summary()}")
+
+        else:
+            with startup_profile.phase("trading_system_init"):
+                trading_system = TradingSystem(cfg)
 
-        trading_system = TradingSystem(cfg)
-        trading_system.start()
+            if args.profile_startup:
+                trading_system.profile_startup()
+            else:
+                trading_system.start()
 
     except Exception as e:
         logging.error(f"Trading system initialization failed: {e}")
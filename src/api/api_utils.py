@@ -1,7 +1,10 @@
 from ibapi.contract import Contract
 from ibapi.order import Order
+import math
 import pandas as pd
+from src.utilities.period import Period
 from src.utilities.utils import get_third_friday
+from src.utilities.clock import clock
 
 
 def order_from_dict(order_dict: dict) -> Order:
@@ -38,6 +41,32 @@ def order_from_dict(order_dict: dict) -> Order:
     return order
 
 
+def roll_time(expiry_date: pd.Timestamp, roll_contract_days_before: int) -> pd.Timestamp:
+    """Start of the day the next contract becomes active, roll_contract_days_before
+    days before the expiry date"""
+    return (expiry_date - pd.Timedelta(days=roll_contract_days_before)).normalize()
+
+
+def contract_window(contract_month: str, roll_contract_days_before: int, timezone: str) -> tuple:
+    """Period in which a quarterly contract is the current contract
+    
+    Args:
+        contract_month (str): The contract month, e.g. '202506'
+        roll_contract_days_before (int): Days before expiry to roll to next contract
+        timezone (str): The timezone to use for date calculations
+        
+    Returns:
+        tuple: (start, end) timestamps. The contract is current from start
+            (inclusive), the roll of the previous contract, until end (exclusive)
+    """
+    year, month = int(contract_month[:4]), int(contract_month[4:6])
+    previous_year, previous_month = (year, month - 3) if month > 3 else (year - 1, month + 9)
+
+    start = roll_time(get_third_friday(previous_year, previous_month, timezone), roll_contract_days_before)
+    end = roll_time(get_third_friday(year, month, timezone), roll_contract_days_before)
+    return start, end
+
+
 def get_current_contract(ticker, exchange, ccy, roll_contract_days_before, timezone):
     """Determine the active contract based on current date and rollover rules
     
@@ -51,7 +80,7 @@ def get_current_contract(ticker, exchange, ccy, roll_contract_days_before, timez
     Returns:
         Contract: The current active contract
     """
-    today = pd.Timestamp.now(tz=timezone)
+    today = clock.now(tz=timezone)
     
     # Contract months (March, June, September, December)
     contract_months = [3, 6, 9, 12]
@@ -66,7 +95,7 @@ def get_current_contract(ticker, exchange, ccy, roll_contract_days_before, timez
     contract_dates.sort()
     
     for expiry_date in contract_dates:
-        if today.date() < (expiry_date - pd.Timedelta(days=roll_contract_days_before)).date():
+        if today < roll_time(expiry_date, roll_contract_days_before):
             contract = Contract()
             contract.symbol = ticker
             contract.secType = "FUT"
@@ -76,4 +105,62 @@ def get_current_contract(ticker, exchange, ccy, roll_contract_days_before, timez
             return contract
             
     # If we get here, something went wrong
-    raise ValueError("Could not determine the current contract")
\ No newline at end of file
+    raise ValueError("Could not determine the current contract")
+
+
+def historical_duration(last_bar_time: pd.Timestamp, 
+                        now: pd.Timestamp, 
+                        bar_size: Period, 
+                        horizon: Period) -> str:
+    """Determine the duration string of a historical data request so that only
+    the bars missing since the last stored bar are fetched
+    
+    Args:
+        last_bar_time (pd.Timestamp): Timestamp of the latest stored bar, None if no bars are stored
+        now (pd.Timestamp): The current time
+        bar_size (Period): The bar size of the request
+        horizon (Period): The full history window
+        
+    Returns:
+        str: An IBKR duration string, e.g. '120 S' or '2 D' for gaps beyond one day,
+            or the full horizon (e.g. '1 D') if nothing is stored yet or the gap
+            exceeds the horizon
+    """
+    full_window = str(horizon)
+
+    if last_bar_time is None:
+        return full_window
+
+    bar_seconds = bar_size.to_timedelta().total_seconds()
+    gap_seconds = (now - last_bar_time).total_seconds()
+
+    # Whole bars back to the latest stored bar, which may still have been
+    # forming and is requested again, plus a one bar margin
+    seconds = int(math.ceil(max(gap_seconds, 0) / bar_seconds) + 1) * int(bar_seconds)
+
+    if seconds >= horizon.to_timedelta().total_seconds():
+        return full_window
+
+    return _duration(seconds)
+
+
+def backfill_duration(start: pd.Timestamp, end: pd.Timestamp) -> str:
+    """Duration string of a historical data request ending at end that covers
+    the bars from start, in seconds up to one day and in days beyond"""
+    return _duration(int(math.ceil((end - start).total_seconds())))
+
+
+def _duration(seconds: int) -> str:
+    """IBKR duration string of at least the given seconds. IBKR rejects
+    durations in seconds beyond one day, longer ones are rounded up to days."""
+    if seconds <= 86400:
+        return f"{max(seconds, 1)} S"
+    return f"{int(math.ceil(seconds / 86400))} D"
+
+
+def end_datetime_string(end: pd.Timestamp = None) -> str:
+    """End of a historical data request as IBKR expects it, in UTC. An empty
+    string requests data up to the current time."""
+    if end is None:
+        return ""
+    return pd.Timestamp(end).tz_convert('UTC').strftime('%Y%m%d-%H:%M:%S')
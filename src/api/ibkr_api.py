@@ -14,6 +14,9 @@ import socket
 import pandas as pd
 import os
 from src.utilities.utils import get_third_friday, get_local_timezone
+from src.api.api_utils import end_datetime_string
+from src.monitoring.instrumentation import timed
+from src.monitoring.metrics import metrics
 
 
 class IBConnection(EWrapper, EClient):
@@ -45,6 +48,7 @@ class IBConnection(EWrapper, EClient):
         self.account_summary = {}
         self.position_data = {}
         self._order_statuses = {}
+        self._order_submit_times = {}
         self.open_orders = {}
         self.realtime_bars = {}
 
@@ -52,6 +56,10 @@ class IBConnection(EWrapper, EClient):
         self.connected = False
         self.open_orders_requested = False
 
+        # Set when the connection to IBKR has been (re-)established, so that
+        # consumers of historical data know to request a full window again
+        self.reconnected = False
+
         # Lock to ensure thread-safe operations for tracking request ids
         self.lock = threading.Lock()
 
@@ -67,13 +75,11 @@ class IBConnection(EWrapper, EClient):
             thread.start()
             
             # Wait for nextValidId to ensure connection is established
-            timeout = self.timeout
-            while self.next_order_id is None and timeout > 0:
-                time.sleep(0.1)
-                timeout -= 0.1
+            self._wait_for(lambda: self.next_order_id is not None)
                 
             self.connected = self.next_order_id is not None
             if self.connected:
+                self.reconnected = True
                 logging.info("Successfully connected to Interactive Brokers")
             else:
                 raise ConnectionError("Connection timed out waiting for order ID")
@@ -95,6 +101,32 @@ class IBConnection(EWrapper, EClient):
             self.connected = False
             logging.info("Disconnected from Interactive Brokers")
 
+    def placeOrder(self, orderId, contract, order):
+        """Place an order, recording the submit time to measure fill latency"""
+        self._order_submit_times[orderId] = time.perf_counter()
+        metrics.counter('ibkr_orders_placed_total', 'Orders submitted to IBKR').inc()
+        super().placeOrder(orderId, contract, order)
+
+    def _wait_for(self, condition, timeout: float = None) -> bool:
+        """Poll until condition() holds or the timeout expires.
+
+        The responses arrive on the API reader thread in real time, so the
+        wait uses the system clock whatever clock is installed.
+
+        Args:
+            condition: Callable returning True once the response arrived
+            timeout (float): Seconds to wait, self.timeout unless given
+
+        Returns:
+            bool: Whether the condition holds
+        """
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        while not condition():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
     def nextValidId(self, orderId: int):
         """Callback for next valid order ID"""
         self.next_order_id = orderId
@@ -105,6 +137,7 @@ class IBConnection(EWrapper, EClient):
             self.next_req_id += 1
             return self.next_req_id
     
+    @timed("api.get_contract_details")
     def get_contract_details(self, contract):
         """Get contract details for a specific contract"""
         req_id = self.get_next_req_id()
@@ -112,10 +145,7 @@ class IBConnection(EWrapper, EClient):
         self.reqContractDetails(req_id, contract)
 
         # Wait for contract details
-        timeout = self.timeout
-        while req_id not in self.contract_details and timeout > 0:
-            time.sleep(0.1)
-            timeout -= 0.1
+        self._wait_for(lambda: req_id in self.contract_details)
 
         if req_id not in self.contract_details:
             raise Exception("Failed to get contract details")
@@ -126,15 +156,17 @@ class IBConnection(EWrapper, EClient):
         """Callback for contract details"""
         self.contract_details[reqId] = contractDetails
 
-    def get_historical_data(self, contract, duration='1 D', bar_size='1 min', timezone='US/Eastern', RTH=False):
-        """Get historical data for the current contract"""
+    @timed("api.get_historical_data")
+    def get_historical_data(self, contract, duration='1 D', bar_size='1 min', timezone='US/Eastern', RTH=False, end=None):
+        """Get historical data for the current contract, ending now or at the
+        given end timestamp"""
         req_id = self.get_next_req_id()
         self.historical_data[req_id] = []
         
         self.reqHistoricalData(
             req_id,
             contract,
-            "",  # empty string for current time
+            end_datetime_string(end),  # empty string for current time
             duration,
             bar_size,
             "TRADES",  # Use actual trade prices
@@ -145,10 +177,7 @@ class IBConnection(EWrapper, EClient):
         )
 
         # Wait for historical data
-        timeout = self.timeout
-        while not self.historical_data[req_id] and timeout > 0:
-            time.sleep(0.1)
-            timeout -= 0.1
+        self._wait_for(lambda: self.historical_data[req_id])
     
         if self.historical_data[req_id]:
             new_bars = self.historical_data[req_id]
@@ -178,6 +207,7 @@ class IBConnection(EWrapper, EClient):
         # logging.info(f"Historical data end: {reqId}, {start}, {end}")
         pass
 
+    @timed("api.place_market_order")
     def place_market_order(self, contract, action, quantity):
         """Place a market order"""
         order = Order()
@@ -191,10 +221,7 @@ class IBConnection(EWrapper, EClient):
         self._order_statuses[order_id] = {}
         self.placeOrder(order_id, contract, order)
 
-        timeout = self.timeout
-        while not self._order_statuses[order_id] and timeout > 0:
-            time.sleep(0.1)
-            timeout -= 0.1
+        self._wait_for(lambda: self._order_statuses[order_id])
 
         return order_id, self._order_statuses[order_id]
 
@@ -203,6 +230,12 @@ class IBConnection(EWrapper, EClient):
                    parentId: int, lastFillPrice: float, clientId: int,
                    whyHeld: str, mktCapPrice: float):
         """Callback for order status updates"""
+        if status == 'Filled' and orderId in self._order_submit_times:
+            metrics.histogram(
+                'ibkr_order_fill_latency_seconds', 
+                'Time from order submission to fill'
+                ).observe(time.perf_counter() - self._order_submit_times.pop(orderId))
+
         self._order_statuses[orderId] = {
                 'status': status,
                 'filled': filled,
@@ -239,10 +272,7 @@ class IBConnection(EWrapper, EClient):
         self._order_statuses[order_id] = {}
         self.placeOrder(order_id, contract, order)
 
-        timeout = self.timeout
-        while not self._order_statuses[order_id] and timeout > 0:
-            time.sleep(0.1)
-            timeout -= 0.1
+        self._wait_for(lambda: self._order_statuses[order_id])
 
         return order_id, self._order_statuses[order_id]
 
@@ -261,17 +291,21 @@ class IBConnection(EWrapper, EClient):
         self._order_statuses[order_id] = {}
         self.placeOrder(order_id, contract, order)
 
-        timeout = self.timeout
-        while not self._order_statuses[order_id] and timeout > 0:
-            time.sleep(0.1)
-            timeout -= 0.1
+        self._wait_for(lambda: self._order_statuses[order_id])
 
         return order_id, self._order_statuses[order_id]
 
     def error(self, req_id, error_code, error_string, misc=None):
+        metrics.counter('ibkr_api_messages_total', 'Error and notice messages received from IBKR', 
+                        labels={'code': error_code}).inc()
 
         if error_code in [2103, 2104, 2105, 2106, 2119, 2158]:
-            logging.info(f"({error_code}) {error_string}{' ' + str(misc) if misc is not None else ''}")
+            logging.info("(%s) %s%s", error_code, error_string, ' ' + str(misc) if misc is not None else '')
+
+        elif error_code in [1100, 1101, 1102]:
+            # Connectivity between TWS and IBKR servers lost or restored
+            self.reconnected = True
+            logging.warning(f"({error_code}) {error_string}{' ' + str(misc) if misc is not None else ''}")
 
         elif error_code == 110:
             msg = f"Error {error_code}: Submitted prices must be rounded to 2 decimal places."
@@ -281,15 +315,13 @@ class IBConnection(EWrapper, EClient):
         else:
             logging.error(f"Error {error_code}: {error_string}{' ' + str(misc) if misc is not None else ''}")
 
+    @timed("api.get_positions")
     def get_positions(self):
         """Get current portfolio positions"""
         self.positions[self.account_id] = []
         self.reqPositions() 
 
-        timeout = self.timeout
-        while not self.positions[self.account_id] and timeout > 0:
-            time.sleep(0.1)
-            timeout -= 0.1
+        self._wait_for(lambda: self.positions[self.account_id])
 
         return self.positions.pop(self.account_id, [])
     
@@ -309,10 +341,7 @@ class IBConnection(EWrapper, EClient):
         
         self.reqAccountSummary(req_id, "All", "$LEDGER")
 
-        timeout = self.timeout
-        while timeout > 0 and not self.account_summary[req_id]:
-            time.sleep(0.1)
-            timeout -= 0.1
+        self._wait_for(lambda: self.account_summary[req_id])
 
         return self.account_summary[req_id]
 
@@ -332,10 +361,7 @@ class IBConnection(EWrapper, EClient):
         self.reqPnLSingle(req_id, self.account_id, "", contract_id)
 
         # Wait for response
-        timeout = self.timeout
-        while not self.pnl_data[req_id] and timeout > 0:
-            time.sleep(0.1)
-            timeout -= 0.1
+        self._wait_for(lambda: self.pnl_data[req_id])
 
         return self.pnl_data.pop(req_id, None)
 
@@ -369,6 +395,7 @@ class IBConnection(EWrapper, EClient):
             self.cancelPnLSingle(req_id)
             del self.pnl_data[req_id]
 
+    @timed("api.get_latest_mid_price")
     def get_latest_mid_price(self, contract, delayed=False):
         """Get the latest mid price for a contract
         
@@ -389,10 +416,7 @@ class IBConnection(EWrapper, EClient):
         else:
             self.reqMktData(req_id, contract, "", False, False, [])
         
-        timeout = self.timeout
-        while req_id not in self.market_data and timeout > 0:
-            time.sleep(0.1)
-            timeout -= 0.1
+        self._wait_for(lambda: req_id in self.market_data)
             
         if req_id in self.market_data:
             data = self.market_data[req_id]
@@ -429,16 +453,14 @@ class IBConnection(EWrapper, EClient):
         elif tickType == 4:  # Last
             self.market_data[reqId]['last'] = price
 
+    @timed("api.place_orders")
     def place_orders(self, orders:list[Order], contract:Contract):
         """Place multiple orders"""
         for order in orders:
             self._order_statuses[order.orderId] = {}
             self.placeOrder(order.orderId, contract, order)
 
-            timeout = self.timeout
-            while not self._order_statuses[order.orderId] and timeout > 0:
-                time.sleep(0.1)
-                timeout -= 0.1
+            self._wait_for(lambda: self._order_statuses[order.orderId])
 
     def create_bracket_order(self,
                              action:str,
@@ -503,15 +525,13 @@ class IBConnection(EWrapper, EClient):
         """Callback for end of open orders"""
         pass
 
+    @timed("api.cancel_order")
     def cancel_order(self, order_id: int):
         """Cancel a specific order by its ID. OrderStatus callback is used"""
         self._order_statuses[order_id] = {}
         self.cancelOrder(order_id, OrderCancel())
 
-        timeout = self.timeout
-        while not self._order_statuses[order_id] and timeout > 0:
-            time.sleep(0.1)
-            timeout -= 0.1
+        self._wait_for(lambda: self._order_statuses[order_id])
 
     def req_realtime_bars(self, contract, use_rth):
         """Request real-time 5s bars"""
@@ -0,0 +1,130 @@
+import os
+import copy
+import time
+import logging
+import pandas as pd
+from src.backtest.simulated_broker import SimulatedBroker
+from src.backtest.vectorized import BacktestResult
+from src.configuration import Configuration
+from src.db.database import Database
+from src.monitoring.metrics import metrics
+from src.trading_system import TradingSystem
+from src.utilities.clock import clock, ClockStopped, SimulatedClock
+from src.utilities.utils import shift_date_by_period
+
+
+class BacktestTradingSystem(TradingSystem):
+    """TradingSystem without the snapshot, metrics and configuration files,
+    which only serve restarts, monitoring and audits of a live process"""
+
+    def _save_snapshot(self):
+        self._new_bars = False
+
+    def _dump_metrics(self):
+        pass
+
+    def _save_config(self):
+        pass
+
+
+class EventDrivenBacktest:
+    """Backtest of the trading system itself over a history of bars.
+
+    The TradingSystem runs its trading loop unchanged, with its
+    PortfolioManagers, RiskManagers and order database, against a
+    SimulatedBroker serving the bars. A SimulatedClock replaces the system
+    clock, so every sleep of the loop jumps to the next wake-up time and the
+    broker fills the working orders reached in between. The run ends when the
+    clock passes the last bar.
+
+    Slower than the VectorizedBacktest, but exercises the live order handling,
+    risk checks and trading calendar, so the two can be compared on the same
+    bars.
+    """
+
+    def __init__(self, cfg: Configuration, bars: dict, output_dir: str, slippage_ticks: int = 0,
+                 start: pd.Timestamp = None):
+        """
+        :param cfg: Configuration instance
+        :param bars: Bars of each ticker in cfg.instruments, as DataFrames or MarketDataStore columns
+        :param output_dir: Directory of the order database and output files of the run
+        :param slippage_ticks: Ticks market orders fill worse than the bar price
+        :param start: Start of the run, one horizon after the first bar unless given
+        """
+        # Backtest runs start cold and do not export anything
+        self.config = copy.copy(cfg)
+        self.config.warm_restart = False
+        self.config.save_market_data = False
+        self.config.metrics_port = 0
+        self.config.instrumentation = False
+
+        self.bars = bars
+        self.output_dir = output_dir
+        self.slippage_ticks = slippage_ticks
+        self.start = start
+        self.events = 0
+
+    def run(self) -> BacktestResult:
+        """Run the trading system from the start time until the bars run out"""
+        started = time.perf_counter()
+        cfg = self.config
+
+        timestamps = [pd.DatetimeIndex(bars.index) if isinstance(bars, pd.DataFrame)
+                      else pd.DatetimeIndex(bars['timestamp'], tz='UTC') for bars in self.bars.values()]
+        first = min(index[0] for index in timestamps).tz_convert(cfg.timezone)
+        last = max(index[-1] for index in timestamps).tz_convert(cfg.timezone)
+        start = shift_date_by_period(cfg.horizon, first) if self.start is None else self.start
+
+        sim_clock = self._clock(start, last + cfg.bar_size.to_timedelta())
+        broker = SimulatedBroker(self.bars, cfg, sim_clock, self.slippage_ticks)
+
+        self.events = 0
+        sim_clock.listeners.append(self._count_event)
+
+        # Orders of a previous run in the same directory would be restored
+        os.makedirs(self.output_dir, exist_ok=True)
+        db_path = os.path.join(self.output_dir, "trading.db")
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        db = Database(cfg.timezone, db_path)
+
+        iterations = metrics.counter('trading_loop_iterations_total', 'Completed trading loop iterations')
+        iterations_before = iterations.value
+
+        with clock.using(sim_clock):
+            trading_system = BacktestTradingSystem(cfg, api=broker, db=db, output_dir=self.output_dir)
+            try:
+                trading_system._startup()
+
+                while True:
+                    try:
+                        trading_system._trading_loop()
+                    except Exception as e:
+                        logging.error(f"Error in trading loop: {str(e)}")
+                        clock.sleep(10)
+
+            except ClockStopped:
+                logging.info(f"Backtest reached the end of the data at {sim_clock.now(cfg.timezone)}")
+
+            finally:
+                broker.disconnect()
+
+        pauses = []
+        for ticker in self.bars:
+            pauses += [(pause['start_time'], pause['end_time']) for pause in db.get_trading_pauses(ticker)]
+
+        seconds = time.perf_counter() - started
+        result = BacktestResult(broker.trades(), sorted(set(pauses)), sum(len(index) for index in timestamps),
+                                seconds, self.events)
+        logging.info(f"Event driven backtest: {len(result.trades)} trades, "
+                     f"{iterations.value - iterations_before:.0f} loop iterations and {self.events} events "
+                     f"in {seconds:.3f}s ({self.events / seconds:.0f} events/s)")
+        return result
+
+    def _clock(self, start: pd.Timestamp, end: pd.Timestamp) -> SimulatedClock:
+        """Clock of the run, from start until end"""
+        return SimulatedClock(start, end=end)
+
+    def _count_event(self, now: pd.Timestamp):
+        """Clock listener counting the wake-ups of the trading system"""
+        self.events += 1
@@ -0,0 +1,342 @@
+import os
+import time
+import logging
+import itertools
+import multiprocessing
+import numpy as np
+import pandas as pd
+from src.backtest.vectorized import NS_PER_DAY, NS_PER_MINUTE, _minutes
+from src.configuration import Configuration
+
+
+METHODS = ('bootstrap', 'permutation')
+
+# Per path statistics of a simulation
+PATH_COLUMNS = ('total_pnl', 'max_drawdown', 'pauses', 'trades')
+
+EXIT_REASONS = {'STP': 'stop_loss', 'LMT': 'take_profit', 'MKT': 'eod'}
+
+
+def trades_from_orders(orders: list, point_value: float, timezone: str) -> pd.DataFrame:
+    """Round trips of the filled orders returned by Database.get_filled_orders.
+
+    A filled BUY, the parent of a bracket, opens a trade. It is closed by the
+    filled SELL of its bracket (stop loss or take profit) or else by the next
+    filled SELL without parent, the market order closing all positions at the
+    end of the day.
+
+    Returns:
+        pd.DataFrame: Trades with the columns of BacktestResult.trades used here,
+            entry_time, entry_price, exit_time, exit_price, exit_reason, pnl and quantity
+    """
+    trades = []
+    open_trades = {}
+    for order in sorted(orders, key=lambda order: (order['filled_timestamp'], order['order_id'])):
+        if order['action'] == 'BUY':
+            open_trades[order['order_id']] = order
+            continue
+
+        if order['parent_id']:
+            entries = [open_trades.pop(order['parent_id'])] if order['parent_id'] in open_trades else []
+        else:
+            entries, open_trades = list(open_trades.values()), {}
+
+        for entry in entries:
+            pnl = (order['avg_fill_price'] - entry['avg_fill_price']) * entry['filled'] * point_value
+            trades.append((entry['filled_timestamp'], entry['avg_fill_price'], order['filled_timestamp'],
+                           order['avg_fill_price'], EXIT_REASONS.get(order['order_type'], 'other'), pnl,
+                           entry['filled']))
+
+    trades = pd.DataFrame(trades, columns=['entry_time', 'entry_price', 'exit_time', 'exit_price',
+                                           'exit_reason', 'pnl', 'quantity'])
+    for column in ('entry_time', 'exit_time'):
+        trades[column] = pd.to_datetime(trades[column], utc=True).dt.tz_convert(timezone)
+    return trades
+
+
+class MonteCarloResult:
+    """Statistics of every simulated path"""
+
+    def __init__(self, paths: dict, sessions: int, seconds: float):
+        self.paths = paths
+        self.sessions = sessions
+        self.seconds = seconds
+
+    def table(self) -> pd.DataFrame:
+        """One row of statistics per path"""
+        return pd.DataFrame(self.paths)
+
+    def percentiles(self, q=(1, 5, 25, 50, 75, 95, 99)) -> pd.DataFrame:
+        """Percentiles of the path statistics, one row per percentile"""
+        return pd.DataFrame({name: np.percentile(values, q) for name, values in self.paths.items()},
+                            index=pd.Index(q, name='percentile'))
+
+    def summary(self) -> dict:
+        pnl, drawdown, pauses = self.paths['total_pnl'], self.paths['max_drawdown'], self.paths['pauses']
+        return {
+            'paths': len(pnl),
+            'sessions': self.sessions,
+            'total_pnl_p5': float(np.percentile(pnl, 5)),
+            'total_pnl_p50': float(np.percentile(pnl, 50)),
+            'max_drawdown_p50': float(np.percentile(drawdown, 50)),
+            'max_drawdown_p95': float(np.percentile(drawdown, 95)),
+            'max_drawdown_p99': float(np.percentile(drawdown, 99)),
+            'pauses_p50': float(np.percentile(pauses, 50)),
+            'pauses_p95': float(np.percentile(pauses, 95)),
+            'pause_probability': float((pauses > 0).mean()),
+            'pauses_per_session': float(pauses.mean() / self.sessions) if self.sessions else np.nan,
+            'seconds': self.seconds,
+        }
+
+
+class PathSimulator:
+    """Resamples trading sessions into paths and replays the trades of each
+    path through the 24h loss limit, a batch of paths at a time.
+
+    Sessions are held as (sessions x trades per session) matrices padded with
+    invalid trades, so a batch of paths is built by fancy indexing and the
+    pause logic steps once over the trade columns for all paths of the batch.
+    """
+
+    def __init__(self, pnl: np.ndarray, entry: np.ndarray, exit: np.ndarray, valid: np.ndarray):
+        """
+        :param pnl: PnL per contract of each trade, sessions x trades
+        :param entry: Entry time of each trade since the start of its session in nanoseconds
+        :param exit: Exit time of each trade since the start of its session in nanoseconds
+        :param valid: Whether the slot holds a trade
+        """
+        self.pnl = pnl
+        self.entry = entry
+        self.exit = exit
+        self.valid = valid
+
+    def sample(self, rng: np.random.Generator, paths: int, horizon: int, method: str, block_size: int) -> np.ndarray:
+        """Session indices of each path, paths x horizon"""
+        sessions = len(self.pnl)
+        if method == 'permutation':
+            return rng.permuted(np.tile(np.arange(sessions), (paths, 1)), axis=1)
+
+        # Blocks of consecutive sessions keep their serial correlation
+        block_size = min(block_size, sessions)
+        blocks = -(-horizon // block_size)
+        starts = rng.integers(0, sessions - block_size + 1, size=(paths, blocks))
+        return (starts[:, :, None] + np.arange(block_size)).reshape(paths, -1)[:, :horizon]
+
+    def simulate(self, sessions: np.ndarray, number_of_contracts: int, max_24h_loss_per_contract: float,
+                 trading_pause_hours: float) -> dict:
+        """Replay the trades of each path of session indices.
+
+        Follows RiskManager.should_pause_trading as the VectorizedBacktest
+        does: once the realized PnL of a session reaches
+        -max_24h_loss_per_contract * number_of_contracts after a trade exit,
+        trades entering within trading_pause_hours are skipped. The resampled
+        sessions are taken to start 24h apart.
+
+        Returns:
+            dict: Arrays of the path statistics PATH_COLUMNS
+        """
+        paths, horizon = sessions.shape
+        slots = self.pnl.shape[1]
+
+        session_start = (np.arange(horizon, dtype=np.int64) * NS_PER_DAY)[None, :, None]
+        pnl = (self.pnl[sessions] * number_of_contracts).reshape(paths, -1)
+        entry = (self.entry[sessions] + session_start).reshape(paths, -1)
+        exit = (self.exit[sessions] + session_start).reshape(paths, -1)
+        valid = self.valid[sessions].reshape(paths, -1)
+
+        loss_limit = -max_24h_loss_per_contract * number_of_contracts
+        pause_ns = int(trading_pause_hours * 60 * NS_PER_MINUTE)
+
+        equity = np.zeros(paths)
+        peak = np.zeros(paths)
+        max_drawdown = np.zeros(paths)
+        session_pnl = np.zeros(paths)
+        pause_end = np.full(paths, np.iinfo(np.int64).min)
+        pauses = np.zeros(paths, dtype=np.int64)
+        trades = np.zeros(paths, dtype=np.int64)
+
+        for column in range(pnl.shape[1]):
+            if column % slots == 0:
+                session_pnl[:] = 0.0
+
+            taken = valid[:, column] & (entry[:, column] >= pause_end)
+            if not taken.any():
+                continue
+            trade_pnl = np.where(taken, pnl[:, column], 0.0)
+
+            session_pnl += trade_pnl
+            equity += trade_pnl
+            np.maximum(peak, equity, out=peak)
+            np.maximum(max_drawdown, peak - equity, out=max_drawdown)
+            trades += taken
+
+            paused = taken & (session_pnl <= loss_limit)
+            pause_end = np.where(paused, exit[:, column] + pause_ns, pause_end)
+            pauses += paused
+
+        return {'total_pnl': equity, 'max_drawdown': max_drawdown, 'pauses': pauses, 'trades': trades}
+
+
+_simulator = None
+
+
+def _init_worker(simulator: PathSimulator):
+    global _simulator
+    _simulator = simulator
+
+
+def _run_batch(task: tuple) -> tuple:
+    index, seed, paths, horizon, method, block_size, limits = task
+    sessions = _simulator.sample(np.random.default_rng(seed), paths, horizon, method, block_size)
+    return index, _simulator.simulate(sessions, *limits)
+
+
+class MonteCarlo:
+    """Distribution of drawdowns and trading pauses of a trade list, from
+    resampled trading sessions.
+
+    The trades, e.g. BacktestResult.trades or trades_from_orders of the
+    order database, are grouped by the trading session they enter in, with
+    their PnL per contract and entry and exit time within the session. Each
+    path draws sessions with replacement in blocks of block_size consecutive
+    sessions ('bootstrap') or shuffles all sessions ('permutation', the same
+    total PnL in another order) and replays their trades through the 24h
+    loss limit.
+
+    Paths are simulated in batches of batch_size across a process pool. Each
+    batch has its own seed spawned from the run seed, so the results do not
+    depend on the number of processes.
+    """
+
+    def __init__(self, cfg: Configuration, trades: pd.DataFrame, method: str = 'bootstrap', block_size: int = 5,
+                 processes: int = None, batch_size: int = 1000):
+        """
+        :param cfg: Configuration instance with the trading hours and risk limits
+        :param trades: Trades with entry_time, exit_time, pnl and quantity columns
+        :param method: 'bootstrap' or 'permutation'
+        :param block_size: Consecutive sessions drawn at once by the bootstrap
+        :param processes: Worker processes, all cores unless given. 1 runs in this process
+        :param batch_size: Paths simulated at once by a worker
+        """
+        if method not in METHODS:
+            raise ValueError(f"Invalid method: {method}. Available methods: {list(METHODS)}")
+        if len(trades) == 0:
+            raise ValueError("No trades to resample")
+
+        self.config = cfg
+        self.method = method
+        self.block_size = block_size
+        self.processes = os.cpu_count() if processes is None else processes
+        self.batch_size = batch_size
+        self.simulator = self._sessions(trades)
+
+    @property
+    def sessions(self) -> int:
+        return len(self.simulator.pnl)
+
+    def _sessions(self, trades: pd.DataFrame) -> PathSimulator:
+        """Trades grouped into session matrices"""
+        start = _minutes(self.config.trading_start_time) * NS_PER_MINUTE
+        entry_wall = self._wall_ns(trades['entry_time']) - start
+        exit_wall = self._wall_ns(trades['exit_time']) - start
+
+        order = np.argsort(entry_wall, kind='stable')
+        entry_wall, exit_wall = entry_wall[order], exit_wall[order]
+        pnl = (trades['pnl'].to_numpy(dtype=np.float64) / trades['quantity'].to_numpy(dtype=np.float64))[order]
+
+        session = entry_wall // NS_PER_DAY
+        ids, row, counts = np.unique(session, return_inverse=True, return_counts=True)
+        slot = np.arange(len(session)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        shape = (len(ids), int(counts.max()))
+        matrices = {
+            'pnl': np.zeros(shape),
+            'entry': np.zeros(shape, dtype=np.int64),
+            'exit': np.zeros(shape, dtype=np.int64),
+            'valid': np.zeros(shape, dtype=bool),
+        }
+        matrices['pnl'][row, slot] = pnl
+        matrices['entry'][row, slot] = entry_wall - session * NS_PER_DAY
+        matrices['exit'][row, slot] = exit_wall - session * NS_PER_DAY
+        matrices['valid'][row, slot] = True
+
+        logging.debug(f"MonteCarlo: {len(pnl)} trades in {len(ids)} sessions, at most {shape[1]} per session")
+        return PathSimulator(**matrices)
+
+    def _wall_ns(self, times: pd.Series) -> np.ndarray:
+        """Wall clock times in the configured timezone as nanoseconds"""
+        index = pd.DatetimeIndex(times)
+        if index.tz is None:
+            raise ValueError("Trade times must be timezone aware")
+        return index.tz_convert(self.config.timezone).tz_localize(None).as_unit('ns').asi8
+
+    def run(self, paths: int = 10000, horizon: int = None, number_of_contracts: int = None,
+            max_24h_loss_per_contract: float = None, trading_pause_hours: float = None,
+            seed: int = None) -> MonteCarloResult:
+        """Simulate paths of resampled sessions.
+
+        Args:
+            paths: Number of paths
+            horizon: Sessions per path, the number of sessions traded unless
+                given. Permutations always use all sessions
+            number_of_contracts: Contracts per trade, the configured number unless given
+            max_24h_loss_per_contract: Loss limit per contract, the configured limit unless given
+            trading_pause_hours: Pause after the loss limit is reached, the configured pause unless given
+            seed: Seed of the resampling
+
+        Returns:
+            MonteCarloResult: The statistics of every path
+        """
+        started = time.perf_counter()
+        cfg = self.config
+        horizon = self.sessions if horizon is None or self.method == 'permutation' else horizon
+        limits = (
+            cfg.number_of_contracts if number_of_contracts is None else number_of_contracts,
+            cfg.max_24h_loss_per_contract if max_24h_loss_per_contract is None else max_24h_loss_per_contract,
+            cfg.trading_pause_hours if trading_pause_hours is None else trading_pause_hours,
+        )
+
+        sizes = [min(self.batch_size, paths - i) for i in range(0, paths, self.batch_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        tasks = [(i, seeds[i], size, horizon, self.method, self.block_size, limits) for i, size in enumerate(sizes)]
+
+        batches = dict(self.map(tasks))
+        result = {name: np.concatenate([batches[i][name] for i in range(len(tasks))]) for name in PATH_COLUMNS}
+
+        seconds = time.perf_counter() - started
+        logging.info(f"MonteCarlo: {paths} {self.method} paths of {horizon} sessions in {seconds:.2f}s "
+                     f"({paths / seconds:.0f} paths/s, {self.processes} process(es))")
+        return MonteCarloResult(result, horizon, seconds)
+
+    def map(self, tasks: list):
+        """Run the batch tasks across the pool.
+
+        Yields:
+            tuple: (batch index, path statistics) of each batch as it completes
+        """
+        if self.processes == 1 or len(tasks) == 1:
+            _init_worker(self.simulator)
+            try:
+                for task in tasks:
+                    yield _run_batch(task)
+            finally:
+                _init_worker(None)
+        else:
+            with multiprocessing.Pool(min(self.processes, len(tasks)), initializer=_init_worker,
+                                      initargs=(self.simulator,)) as pool:
+                yield from pool.imap_unordered(_run_batch, tasks)
+
+    def sizing_table(self, number_of_contracts: list, max_24h_loss_per_contract: list, paths: int = 10000,
+                     horizon: int = None, seed: int = 0) -> pd.DataFrame:
+        """Summaries of every combination of contract numbers and loss limits.
+        The combinations use the same seed, so they are compared on the same
+        resampled paths.
+
+        Returns:
+            pd.DataFrame: One row of MonteCarloResult.summary() per combination
+        """
+        rows = []
+        for contracts, loss in itertools.product(number_of_contracts, max_24h_loss_per_contract):
+            summary = self.run(paths, horizon, contracts, loss, seed=seed).summary()
+            rows.append({'number_of_contracts': contracts, 'max_24h_loss_per_contract': loss, **summary})
+        return pd.DataFrame(rows)
@@ -0,0 +1,170 @@
+import os
+import re
+import glob
+import logging
+import pandas as pd
+from src.backtest.event_driven import EventDrivenBacktest
+from src.backtest.vectorized import BacktestResult
+from src.configuration import Configuration
+from src.market_data.continuous_contract import ContinuousContract
+from src.market_data.market_data_store import INDEX_FILENAME, MarketDataStore
+from src.monitoring.instrumentation import instrumentation
+from src.utilities.clock import AcceleratedClock
+
+
+# Daily market data files, output/market_data_{ticker}_{YYYYMMDD}.csv, written
+# before bars were saved to the MarketDataStore in output/market_data
+MARKET_DATA_FILE = re.compile(r"^market_data_(?P<ticker>.+)_(?P<date>\d{8})\.csv$")
+
+
+def find_market_data_files(sources: list, tickers: list) -> dict:
+    """Saved market data files of each ticker, oldest first.
+
+    Args:
+        sources (list): Market data files and directories holding them
+        tickers (list): The replayed tickers. Files not named after a ticker
+            are used for the first one
+
+    Returns:
+        dict: Paths of the files keyed by ticker
+    """
+    files = {ticker: [] for ticker in tickers}
+    for source in sources:
+        paths = sorted(glob.glob(os.path.join(source, "market_data_*.csv"))) if os.path.isdir(source) else [source]
+        for path in paths:
+            match = MARKET_DATA_FILE.match(os.path.basename(path))
+            ticker = match.group('ticker') if match else tickers[0]
+            if ticker in files:
+                files[ticker].append(path)
+
+    for paths in files.values():
+        paths.sort(key=_file_date)
+    return files
+
+
+def _file_date(path: str) -> str:
+    """Date of a market data file from its name, its path if not named after one"""
+    match = MARKET_DATA_FILE.match(os.path.basename(path))
+    return match.group('date') if match else path
+
+
+def load_market_data_files(paths: list, timezone: str) -> pd.DataFrame:
+    """Join saved market data files into one history of bars.
+
+    The files of consecutive days overlap by the horizon of the bar buffer,
+    the copy of a bar from the latest file wins.
+
+    Args:
+        paths (list): Market data files, oldest first
+        timezone (str): The timezone of the returned index
+
+    Returns:
+        pd.DataFrame: OHLCV bars indexed by datetime, sorted
+    """
+    frames = []
+    for path in paths:
+        df = pd.read_csv(path, index_col=0)
+        df.index = pd.to_datetime(df.index, utc=True).tz_convert(timezone)
+        frames.append(df[['open', 'high', 'low', 'close', 'volume']])
+
+    if not frames:
+        raise ValueError("No market data files to replay")
+
+    bars = pd.concat(frames)
+    bars = bars[~bars.index.duplicated(keep='last')].sort_index()
+    bars.index.name = 'datetime'
+    return bars
+
+
+def load_store_bars(root: str, cfg: Configuration) -> dict:
+    """Continuous back-adjusted bars of each instrument from a MarketDataStore"""
+    store = MarketDataStore(root, cfg.timezone)
+    bars = {}
+    for ticker in cfg.instruments:
+        series = ContinuousContract(store, ticker, cfg.bar_size, cfg.roll_contract_days_before, cfg.timezone)
+        bars[ticker] = series.read_frame()
+        if bars[ticker].empty:
+            raise ValueError(f"No {ticker} bars stored in {root}")
+    return bars
+
+
+def find_store(source: str) -> str:
+    """Root of the MarketDataStore in a directory, either the directory itself
+    or its market_data subdirectory like in output/. None if there is none."""
+    for root in (source, os.path.join(source, "market_data")):
+        if os.path.isdir(root) and glob.glob(os.path.join(root, "*", INDEX_FILENAME)):
+            return root
+    return None
+
+
+def load_replay_bars(sources: list, cfg: Configuration) -> dict:
+    """Bars of each instrument from the MarketDataStore if the only source is
+    a directory holding one, from legacy market data files otherwise"""
+    root = find_store(sources[0]) if len(sources) == 1 else None
+    if root is not None:
+        return load_store_bars(root, cfg)
+
+    files = find_market_data_files(sources, list(cfg.instruments))
+    missing = [ticker for ticker, paths in files.items() if not paths]
+    if missing:
+        raise ValueError(f"No market data files of {missing} found in {sources}")
+
+    return {ticker: load_market_data_files(paths, cfg.timezone) for ticker, paths in files.items()}
+
+
+def warmup_bars(cfg: Configuration) -> int:
+    """Bars the indicators of the configured strategies need before signals"""
+    periods = [cfg.bollinger_period, cfg.rsi_period]
+    for strategy in cfg.strategies.values():
+        periods += [strategy.get('bollinger_period', cfg.bollinger_period), strategy.get('rsi_period', cfg.rsi_period)]
+    return max(periods) + 1
+
+
+class Replay(EventDrivenBacktest):
+    """Replay of saved market data through the trading system.
+
+    Runs like the EventDrivenBacktest, against a SimulatedBroker serving the
+    bars, with an AcceleratedClock pacing the trading loop at the given speed:
+    1 for real time, 100 for a day in about 15 minutes, None as fast as
+    possible. The hot-path instrumentation is enabled, so the cost of the
+    decision loop is logged per stage at the end and written per iteration
+    to {output_dir}/timings. Like the backtest, no snapshot, metrics or
+    configuration files are written.
+    """
+
+    def __init__(self, cfg: Configuration, bars: dict, output_dir: str, speed: float = None,
+                 start: pd.Timestamp = None, slippage_ticks: int = 0):
+        """
+        :param cfg: Configuration instance
+        :param bars: Bars of each ticker in cfg.instruments, e.g. from load_replay_bars
+        :param output_dir: Directory of the order database and output files of the replay
+        :param speed: Multiple of real time, None to replay as fast as possible
+        :param start: Start of the replay, once the indicators are warmed up unless given
+        :param slippage_ticks: Ticks market orders fill worse than the bar price
+        """
+        if start is None:
+            first = min(pd.DatetimeIndex(ticker_bars.index)[0] for ticker_bars in bars.values())
+            start = first + warmup_bars(cfg) * cfg.bar_size.to_timedelta()
+
+        super().__init__(cfg, bars, output_dir, slippage_ticks, start)
+        self.config.instrumentation = True
+        self.speed = speed
+        self.timings = {}
+
+    def run(self) -> BacktestResult:
+        """Replay the bars from the start time until they run out"""
+        speed = "as fast as possible" if self.speed is None else f"at {self.speed:g}x"
+        logging.info(f"Replay: Starting at {pd.Timestamp(self.start).tz_convert(self.config.timezone)} {speed}")
+
+        instrumentation.reset()
+        try:
+            result = super().run()
+            self.timings = instrumentation.summary()
+            instrumentation.log_summary()
+        finally:
+            instrumentation.configure(False)
+
+        return result
+
+    def _clock(self, start: pd.Timestamp, end: pd.Timestamp) -> AcceleratedClock:
+        return AcceleratedClock(start, end=end, speed=self.speed)
@@ -0,0 +1,319 @@
+import logging
+import numpy as np
+import pandas as pd
+from ibapi.order import Order
+from ibapi.wrapper import OrderState
+from src.api.ibkr_api import IBConnection
+from src.backtest.vectorized import bar_arrays
+from src.configuration import Configuration
+from src.utilities.clock import SimulatedClock
+
+
+DURATION_UNITS = {
+    'S': pd.Timedelta(seconds=1),
+    'D': pd.Timedelta(days=1),
+    'W': pd.Timedelta(weeks=1),
+    'M': pd.Timedelta(days=31),
+    'Y': pd.Timedelta(days=366),
+}
+
+
+def parse_duration(duration: str) -> pd.Timedelta:
+    """Length of an IBKR duration string such as '120 S' or '1 D'"""
+    units, unit = str(duration).split()
+    if unit not in DURATION_UNITS:
+        raise ValueError(f"Duration unit not recognized: {duration}")
+    return int(units) * DURATION_UNITS[unit]
+
+
+class SimulatedBroker(IBConnection):
+    """IBConnection served from a history of bars instead of TWS.
+
+    Order, cancel and position requests are answered synchronously with the
+    callbacks TWS would send (orderStatus, openOrder, position), so the order
+    tracking of IBConnection, PortfolioManager and RiskManager runs unchanged.
+    Historical data and mid prices are served from the bars completed at the
+    time of the simulated clock.
+
+    Fill model:
+    - Orders sent with transmit=False are held until an order of the same
+      group is transmitted, as TWS does for bracket orders.
+    - Market orders fill at the open of the bar forming at the order time, or
+      at the last close between bars, moved against the order by
+      slippage_ticks.
+    - Stop and limit orders work from the bar forming when they are activated
+      and fill on the first completed bar reaching their price, at the bar
+      open if it gapped through. Orders with the same parent are one-cancels-
+      all; if a stop and a limit are reached within one bar the stop fills.
+
+    The broker listens to the clock and processes fills whenever it advances.
+    """
+
+    def __init__(self, bars: dict, cfg: Configuration, sim_clock: SimulatedClock, slippage_ticks: int = 0):
+        """
+        :param bars: Bars of each ticker, as DataFrames or MarketDataStore columns
+        :param cfg: Configuration instance
+        :param sim_clock: Clock of the simulation, advancing it fills orders
+        :param slippage_ticks: Ticks market orders fill worse than the reference price
+        """
+        super().__init__('simulated', 0, cfg.ib_client_id, cfg.timeout, cfg.timezone)
+
+        self.clock = sim_clock
+        self.bar_ns = int(cfg.bar_size.to_timedelta().value)
+        self.tick_sizes = {symbol: instrument['tick_size'] for symbol, instrument in cfg.instruments.items()}
+        self.point_values = {symbol: instrument['point_value'] for symbol, instrument in cfg.instruments.items()}
+        self.slippage_ticks = slippage_ticks
+        self.bars = {}
+        for ticker, ticker_bars in bars.items():
+            self.bars[ticker] = bar_arrays(ticker_bars)
+            self.bars[ticker]['volume'] = np.asarray(ticker_bars['volume'], dtype=np.float64)
+
+        self.fills = []
+        self._orders = {}           # order id -> {'order', 'contract', 'status' args}
+        self._held = []             # orders sent with transmit=False
+        self._working = {}          # order id -> bar index from which the order works
+        self._positions = {}        # ticker -> [quantity, average cost, contract]
+
+        sim_clock.listeners.append(self.on_time)
+
+    def connect(self):
+        self.nextValidId(1)
+        self.connected = True
+        self.reconnected = True
+        logging.info("Connected to the simulated broker")
+
+    def disconnect(self):
+        self.connected = False
+
+    def _wait_for(self, condition, timeout: float = None) -> bool:
+        """Responses are sent synchronously, there is nothing to wait for"""
+        return bool(condition())
+
+    def get_historical_data(self, contract, duration='1 D', bar_size='1 min', timezone='US/Eastern', RTH=False, end=None):
+        """Bars completed within the duration before the current time, or
+        before end if it is earlier"""
+        arrays = self.bars.get(contract.symbol)
+        now_ns = self.clock.now('UTC').value
+        if end is not None:
+            now_ns = min(now_ns, pd.Timestamp(end).value)
+        if arrays is None:
+            return []
+
+        timestamps = arrays['timestamp']
+        first = int(np.searchsorted(timestamps, now_ns - parse_duration(duration).value, side='left'))
+        last = int(np.searchsorted(timestamps, now_ns - self.bar_ns, side='right'))
+        if first >= last:
+            return []
+
+        index = pd.DatetimeIndex(timestamps[first:last], tz='UTC').tz_convert(timezone)
+        index.name = 'datetime'
+        return pd.DataFrame(
+            {name: arrays[name][first:last] for name in ('open', 'high', 'low', 'close', 'volume')},
+            index=index)
+
+    def get_latest_mid_price(self, contract, delayed=False):
+        return self._market_price(contract.symbol)
+
+    def placeOrder(self, orderId, contract, order):
+        """Accept an order. Held orders are released with the first transmitted
+        order of their group."""
+        self._orders[orderId] = {'order': order, 'contract': contract, 'status': None}
+        self.openOrder(orderId, contract, order, OrderState())
+
+        if not order.transmit:
+            self._held.append(orderId)
+            self._status(orderId, 'PreSubmitted')
+            return
+
+        group = [held for held in self._held if self._group(held) == self._group(orderId)]
+        self._held = [held for held in self._held if held not in group]
+
+        for order_id in group + [orderId]:
+            self._release(order_id)
+
+    def cancelOrder(self, orderId, orderCancel=None):
+        record = self._orders.get(orderId)
+        if record is None:
+            return
+
+        if orderId in self._working or orderId in self._held:
+            self._working.pop(orderId, None)
+            if orderId in self._held:
+                self._held.remove(orderId)
+            self._status(orderId, 'Cancelled')
+        else:
+            # Already filled or cancelled, TWS reports the final status again
+            self.orderStatus(orderId, *record['status'])
+
+    def reqOpenOrders(self):
+        """Open orders are reported when placed"""
+
+    def reqPositions(self):
+        for quantity, avg_cost, contract in self._positions.values():
+            if quantity != 0:
+                self.position(self.account_id, contract, quantity, avg_cost)
+
+    def on_time(self, now: pd.Timestamp):
+        """Fill the working orders reached by the bars completed up to now"""
+        if not self._working:
+            return
+
+        now_ns = now.value
+        candidates = []
+        for order_id, start in self._working.items():
+            record = self._orders[order_id]
+            arrays = self.bars[record['contract'].symbol]
+            end = int(np.searchsorted(arrays['timestamp'], now_ns - self.bar_ns, side='right'))
+            if start >= end:
+                continue
+
+            bar = self._first_touch(record['order'], arrays, start, end)
+            if bar is None:
+                self._working[order_id] = end
+            else:
+                # Stops before limits within the same bar
+                candidates.append((bar, record['order'].orderType != 'STP', order_id))
+
+        for bar, _, order_id in sorted(candidates):
+            if order_id not in self._working:
+                continue
+
+            record = self._orders[order_id]
+            order = record['order']
+            arrays = self.bars[record['contract'].symbol]
+            level = order.auxPrice if order.orderType == 'STP' else order.lmtPrice
+            adverse = (order.orderType == 'STP') == (order.action == 'SELL')
+            price = min(arrays['open'][bar], level) if adverse else max(arrays['open'][bar], level)
+
+            del self._working[order_id]
+            self._fill(order_id, price, pd.Timestamp(int(arrays['timestamp'][bar]) + self.bar_ns, tz='UTC'))
+
+            for sibling in [other for other in self._working if self._group(other) == self._group(order_id)]:
+                del self._working[sibling]
+                self._status(sibling, 'Cancelled')
+
+    def _release(self, order_id: int):
+        """Execute a transmitted market order or start working a stop or limit"""
+        record = self._orders[order_id]
+        order = record['order']
+
+        if order.orderType == 'MKT':
+            price = self._market_price(record['contract'].symbol, order.action)
+            if price is None:
+                self._status(order_id, 'Cancelled')
+                logging.warning(f"Simulated broker: No price for {record['contract'].symbol}, order {order_id} cancelled")
+                return
+            self._fill(order_id, price, self.clock.now('UTC'))
+
+        elif order.orderType in ('STP', 'LMT'):
+            arrays = self.bars[record['contract'].symbol]
+            now_ns = self.clock.now('UTC').value
+            forming = int(np.searchsorted(arrays['timestamp'], now_ns, side='right')) - 1
+            if forming < 0 or now_ns >= arrays['timestamp'][forming] + self.bar_ns:
+                forming += 1
+            self._working[order_id] = forming
+            self._status(order_id, 'Submitted')
+
+        else:
+            raise TypeError(f"Order type {order.orderType} is not supported by the simulated broker")
+
+    def _first_touch(self, order: Order, arrays: dict, start: int, end: int):
+        """Index of the first bar in [start, end) reaching the order price, None if none"""
+        if order.orderType == 'STP':
+            touched = (arrays['low'][start:end] <= order.auxPrice) if order.action == 'SELL' \
+                else (arrays['high'][start:end] >= order.auxPrice)
+        else:
+            touched = (arrays['high'][start:end] >= order.lmtPrice) if order.action == 'SELL' \
+                else (arrays['low'][start:end] <= order.lmtPrice)
+
+        first = int(touched.argmax())
+        return start + first if touched[first] else None
+
+    def _fill(self, order_id: int, price: float, time: pd.Timestamp):
+        record = self._orders[order_id]
+        order = record['order']
+        ticker = record['contract'].symbol
+        quantity = float(order.totalQuantity)
+        signed = quantity if order.action == 'BUY' else -quantity
+
+        position = self._positions.setdefault(ticker, [0.0, 0.0, record['contract']])
+        if position[0] == 0 or (position[0] > 0) == (signed > 0):
+            position[1] = (position[0] * position[1] + signed * price) / (position[0] + signed)
+            position[2] = record['contract']
+        position[0] += signed
+        if position[0] == 0:
+            position[1] = 0.0
+
+        self.fills.append({
+            'time': time.tz_convert(self.timezone),
+            'ticker': ticker,
+            'order_id': order_id,
+            'parent_id': order.parentId,
+            'order_type': order.orderType,
+            'action': order.action,
+            'quantity': quantity,
+            'price': price,
+            'position': position[0],
+        })
+        self._status(order_id, 'Filled', quantity, price)
+
+    def _status(self, order_id: int, status: str, filled: float = 0.0, price: float = 0.0):
+        record = self._orders[order_id]
+        remaining = 0.0 if status in ('Filled', 'Cancelled') else float(record['order'].totalQuantity)
+        record['status'] = (status, filled, remaining, price, order_id, record['order'].parentId, price,
+                            self.client_id, '', 0.0)
+        self.orderStatus(order_id, *record['status'])
+
+    def _group(self, order_id: int) -> int:
+        order = self._orders[order_id]['order']
+        return order.parentId or order_id
+
+    def _market_price(self, ticker: str, action: str = None):
+        """Open of the bar forming now or the last close between bars, moved
+        against the given action by the slippage"""
+        arrays = self.bars.get(ticker)
+        if arrays is None:
+            return None
+
+        now_ns = self.clock.now('UTC').value
+        i = int(np.searchsorted(arrays['timestamp'], now_ns, side='right')) - 1
+        if i < 0:
+            return None
+
+        price = arrays['open'][i] if now_ns < arrays['timestamp'][i] + self.bar_ns else arrays['close'][i]
+        if action is not None and self.slippage_ticks:
+            slippage = self.slippage_ticks * self.tick_sizes.get(ticker, 0.0)
+            price += slippage if action == 'BUY' else -slippage
+        return float(price)
+
+    def trades(self) -> pd.DataFrame:
+        """Round trips of each ticker from flat to flat, built from the fills"""
+        reasons = {'STP': 'stop_loss', 'LMT': 'take_profit', 'MKT': 'market'}
+
+        trades = []
+        open_trades = {}
+        for fill in self.fills:
+            ticker = fill['ticker']
+            signed = fill['quantity'] if fill['action'] == 'BUY' else -fill['quantity']
+
+            trade = open_trades.setdefault(ticker, {'entry_time': fill['time'], 'cash': 0.0, 'bought': 0.0, 'cost': 0.0})
+            trade['cash'] -= signed * fill['price']
+            if signed > 0:
+                trade['bought'] += signed
+                trade['cost'] += signed * fill['price']
+
+            if fill['position'] == 0:
+                trades.append((
+                    ticker,
+                    trade['entry_time'],
+                    trade['cost'] / trade['bought'] if trade['bought'] else np.nan,
+                    fill['time'],
+                    fill['price'],
+                    reasons.get(fill['order_type'], fill['order_type']),
+                    trade['cash'] * self.point_values.get(ticker, 1.0),
+                    trade['bought'],
+                ))
+                del open_trades[ticker]
+
+        return pd.DataFrame(trades, columns=[
+            'ticker', 'entry_time', 'entry_price', 'exit_time', 'exit_price', 'exit_reason', 'pnl', 'quantity'])
@@ -0,0 +1,350 @@
+import os
+import copy
+import math
+import time
+import logging
+import itertools
+import multiprocessing
+from collections import OrderedDict
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from src.indicators import kernels
+from src.backtest.vectorized import BacktestResult, VectorizedBacktest, bar_arrays, entry_signals
+from src.configuration import Configuration
+
+
+# Parameters that can be swept, as named in the configuration
+SWEEP_PARAMETERS = (
+    'bollinger_period',
+    'bollinger_std',
+    'rsi_period',
+    'rsi_threshold',
+    'stop_loss_ticks',
+    'take_profit_ticks',
+)
+
+BAR_COLUMNS = ('timestamp', 'open', 'high', 'low', 'close')
+CALENDAR_COLUMNS = ('session', 'tradable', 'eod')
+
+# Summary statistics kept in the results table
+RESULT_COLUMNS = (
+    'trades',
+    'win_rate',
+    'total_pnl',
+    'average_pnl',
+    'profit_factor',
+    'max_drawdown',
+    'trading_pauses',
+)
+
+
+def _check_space(space: dict):
+    for name, values in space.items():
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError(f"Invalid sweep parameter: {name}. Available parameters: {list(SWEEP_PARAMETERS)}")
+        if len(values) == 0:
+            raise ValueError(f"No values given for sweep parameter {name}")
+
+
+def parameter_grid(space: dict) -> list:
+    """All combinations of the parameter values, e.g.
+    parameter_grid({'rsi_period': [14, 28], 'rsi_threshold': [30, 35]})"""
+    _check_space(space)
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*space.values())]
+
+
+def random_parameters(space: dict, samples: int, seed: int = None) -> list:
+    """Distinct combinations drawn at random from the parameter grid, without
+    building the grid"""
+    _check_space(space)
+    names = list(space)
+    sizes = [len(values) for values in space.values()]
+    total = math.prod(sizes)
+
+    rng = np.random.default_rng(seed)
+    parameters = []
+    for index in rng.choice(total, size=min(samples, total), replace=False):
+        index = int(index)
+        combination = {}
+        for name, size in zip(reversed(names), reversed(sizes)):
+            index, position = divmod(index, size)
+            combination[name] = space[name][position]
+        parameters.append({name: combination[name] for name in names})
+    return parameters
+
+
+def rank(results: pd.DataFrame, rank_by: str) -> pd.DataFrame:
+    """Result rows sorted best first by rank_by, with their rank"""
+    if results.empty:
+        return results
+    table = results.sort_values(rank_by, ascending=False, na_position='last', kind='stable')
+    table.insert(0, 'rank', np.arange(1, len(table) + 1))
+    return table.reset_index(drop=True)
+
+
+class SharedArrays:
+    """Named NumPy arrays in one shared memory block.
+
+    The process creating the block owns it and unlinks it once done. Other
+    processes attach with the name and layout and get zero-copy views of the
+    same memory.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, layout: dict, owner: bool):
+        self.shm = shm
+        self.layout = layout
+        self.owner = owner
+        self.arrays = {
+            name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            for name, (dtype, shape, offset) in layout.items()
+        }
+        if not owner:
+            for array in self.arrays.values():
+                array.flags.writeable = False
+
+    @classmethod
+    def create(cls, arrays: dict) -> 'SharedArrays':
+        """Copy the arrays into a new shared memory block"""
+        layout = {}
+        size = 0
+        for name, array in arrays.items():
+            # 64 byte alignment of every array
+            size = (size + 63) // 64 * 64
+            layout[name] = (array.dtype.str, array.shape, size)
+            size += array.nbytes
+
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        shared = cls(shm, layout, owner=True)
+        for name, array in arrays.items():
+            shared.arrays[name][...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, name: str, layout: dict) -> 'SharedArrays':
+        return cls(shared_memory.SharedMemory(name=name), layout, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self):
+        """Release the views and the block, unlinking it if owned"""
+        self.arrays = {}
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class SweepWorker:
+    """Backtests of parameter sets over a range of the bars within one process.
+    Indicators are computed over all bars and cached by their own
+    parameters, so parameter sets and bar ranges sharing a Bollinger or RSI
+    period compute it once."""
+
+    def __init__(self, cfg: Configuration, bars: dict, calendar: dict, cache_size: int = 16):
+        """
+        :param cfg: Configuration instance with the parameters not swept
+        :param bars: Column arrays of the bars, as returned by bar_arrays
+        :param calendar: VectorizedBacktest.calendar of the bar timestamps
+        :param cache_size: Indicator arrays kept in the cache
+        """
+        self.cfg = cfg
+        self.bars = bars
+        self.calendar = calendar
+        self.cache_size = cache_size
+        self._indicators = OrderedDict()
+
+    def indicator(self, key: tuple, compute):
+        values = self._indicators.get(key)
+        if values is None:
+            values = compute()
+            self._indicators[key] = values
+            if len(self._indicators) > self.cache_size:
+                self._indicators.popitem(last=False)
+        else:
+            self._indicators.move_to_end(key)
+        return values
+
+    def backtest(self, parameters: dict, start: int = 0, stop: int = None) -> BacktestResult:
+        """Backtest of the parameter set over the bars in [start, stop)"""
+        cfg = copy.copy(self.cfg)
+        for name, value in parameters.items():
+            setattr(cfg, name, value)
+
+        close = self.bars['close']
+        # Only the middle band enters the signal, bollinger_std does not change it
+        middle = self.indicator(('bollinger_middle', cfg.bollinger_period),
+                                lambda: kernels.rolling_mean_std(close, cfg.bollinger_period)[0])
+        rsi = self.indicator(('rsi', cfg.rsi_period), lambda: kernels.rsi(close, cfg.rsi_period))
+
+        # The signal of the first bar needs the RSI of the bar before
+        context = 1 if start > 0 else 0
+        window = slice(start - context, stop)
+        signals = entry_signals(close[window], middle[window], rsi[window], cfg.rsi_threshold)[context:]
+
+        bars = {name: array[start:stop] for name, array in self.bars.items()}
+        calendar = {name: array[start:stop] for name, array in self.calendar.items()}
+        return VectorizedBacktest(cfg).run(bars, signals, calendar)
+
+    def run(self, parameters: dict, start: int = 0, stop: int = None) -> dict:
+        """Result row of the parameter set: the parameters and summary statistics"""
+        summary = self.backtest(parameters, start, stop).summary()
+        row = dict(parameters)
+        row.update({column: summary[column] for column in RESULT_COLUMNS})
+        row['seconds'] = summary['seconds']
+        return row
+
+
+_worker = None
+
+
+def _init_worker(cfg: Configuration, name: str, layout: dict, cache_size: int):
+    global _worker
+    shared = SharedArrays.attach(name, layout)
+    bars = {name: shared.arrays[name] for name in BAR_COLUMNS}
+    calendar = {name: shared.arrays[name] for name in CALENDAR_COLUMNS}
+    _worker = SweepWorker(cfg, bars, calendar, cache_size)
+    _worker.shared = shared
+
+
+def _release_worker():
+    global _worker
+    if _worker is not None:
+        # The views of the worker have to be released before the block
+        shared, _worker = _worker.shared, None
+        shared.close()
+
+
+def _run_task(task: tuple) -> tuple:
+    start, stop, batch = task
+    return start, stop, [_worker.run(parameters, start, stop) for parameters in batch]
+
+
+class ParameterSweep:
+    """Vectorized backtests of many parameter sets across a process pool.
+
+    The bars and their trading calendar are copied once into shared memory,
+    which every worker maps without copying. Parameter sets are batched by
+    their Bollinger and RSI periods, so each worker computes an indicator
+    once per batch instead of once per parameter set. Results are written to
+    results_path as they arrive and ranked by rank_by when the sweep ends.
+    """
+
+    def __init__(self, cfg: Configuration, bars, processes: int = None, rank_by: str = 'total_pnl',
+                 batch_size: int = 32, cache_size: int = 16):
+        """
+        :param cfg: Configuration instance with the parameters not swept
+        :param bars: Bars as a DataFrame or MarketDataStore columns
+        :param processes: Worker processes, all cores unless given. 1 runs in this process
+        :param rank_by: Result column ranking the parameter sets, higher is better
+        :param batch_size: Most parameter sets sent to a worker at once
+        :param cache_size: Indicator arrays cached per worker
+        """
+        if rank_by not in RESULT_COLUMNS:
+            raise ValueError(f"Invalid ranking column: {rank_by}. Available columns: {list(RESULT_COLUMNS)}")
+
+        self.config = cfg
+        self.bars = bar_arrays(bars)
+        self.processes = os.cpu_count() if processes is None else processes
+        self.rank_by = rank_by
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.results = []
+        self._calendar = None
+
+    @property
+    def calendar(self) -> dict:
+        """Trading calendar of the bars, computed once"""
+        if self._calendar is None:
+            self._calendar = VectorizedBacktest(self.config).calendar(self.bars['timestamp'])
+        return self._calendar
+
+    def batches(self, parameters: list) -> list:
+        """Parameter sets grouped by the indicators they need, split into
+        batches of at most batch_size"""
+        groups = {}
+        for combination in parameters:
+            key = tuple(combination.get(name, getattr(self.config, name)) for name in ('bollinger_period', 'rsi_period'))
+            groups.setdefault(key, []).append(combination)
+
+        return [group[i:i + self.batch_size] for group in groups.values()
+                for i in range(0, len(group), self.batch_size)]
+
+    def table(self) -> pd.DataFrame:
+        """Results so far, best first"""
+        return rank(pd.DataFrame(self.results), self.rank_by)
+
+    def map(self, tasks: list):
+        """Run (start, stop, parameter sets) tasks, each backtesting its
+        parameter sets over the bars in [start, stop), across the pool.
+
+        Yields:
+            tuple: (start, stop, result rows) of each task as it completes
+        """
+        for _, _, batch in tasks:
+            for combination in batch:
+                _check_space({name: [value] for name, value in combination.items()})
+
+        cfg = self.config
+        shared = SharedArrays.create({**self.bars, **self.calendar})
+        try:
+            if self.processes == 1:
+                _init_worker(cfg, shared.name, shared.layout, self.cache_size)
+                for task in tasks:
+                    yield _run_task(task)
+            else:
+                with multiprocessing.Pool(self.processes, initializer=_init_worker,
+                                          initargs=(cfg, shared.name, shared.layout, self.cache_size)) as pool:
+                    yield from pool.imap_unordered(_run_task, tasks)
+
+        finally:
+            if self.processes == 1:
+                _release_worker()
+            shared.close()
+
+    def run(self, parameters: list, results_path: str = None, on_result=None) -> pd.DataFrame:
+        """Backtest each parameter set over all bars.
+
+        Args:
+            parameters: Parameter sets, e.g. from parameter_grid or random_parameters
+            results_path: CSV file the results are appended to as they arrive
+            on_result: Called with each result row as it arrives
+
+        Returns:
+            pd.DataFrame: The ranked results table
+        """
+        started = time.perf_counter()
+        self.results = []
+        n = len(self.bars['timestamp'])
+        tasks = [(0, n, batch) for batch in self.batches(parameters)]
+        logging.info(f"Parameter sweep: {len(parameters)} parameter sets in {len(tasks)} batches, "
+                     f"{n} bars, {self.processes} process(es)")
+
+        results_file = None
+        try:
+            if results_path is not None:
+                results_file = open(results_path, 'w', newline='')
+
+            for _, _, rows in self.map(tasks):
+                self._collect(rows, results_file, on_result)
+
+        finally:
+            if results_file is not None:
+                results_file.close()
+
+        seconds = time.perf_counter() - started
+        logging.info(f"Parameter sweep: {len(self.results)} backtests in {seconds:.2f}s "
+                     f"({len(self.results) / seconds:.1f}/s)")
+        return self.table()
+
+    def _collect(self, rows: list, results_file, on_result):
+        for row in rows:
+            if results_file is not None:
+                pd.DataFrame([row]).to_csv(results_file, header=not self.results, index=False)
+                results_file.flush()
+
+            self.results.append(row)
+            if on_result is not None:
+                on_result(row)
@@ -0,0 +1,263 @@
+import time
+import logging
+import numpy as np
+import pandas as pd
+from src.indicators import kernels
+from src.strategys.bb_rsi_strategy import BollingerBandRSIStrategy
+from src.utilities.utils import us_holidays
+from src.configuration import Configuration
+
+
+NS_PER_MINUTE = 60 * 10**9
+NS_PER_DAY = 24 * 60 * NS_PER_MINUTE
+
+
+def _minutes(hhmm: str) -> int:
+    return int(hhmm[:2]) * 60 + int(hhmm[2:])
+
+
+def bar_arrays(bars) -> dict:
+    """Column arrays ('timestamp' in epoch nanoseconds and OHLC as float64) of
+    bars given as a DataFrame with a timezone aware index or as the column
+    dict returned by MarketDataStore.read"""
+    if isinstance(bars, pd.DataFrame):
+        index = pd.DatetimeIndex(bars.index)
+        if index.tz is None:
+            raise ValueError("Bar timestamps must be timezone aware")
+        arrays = {'timestamp': index.tz_convert('UTC').as_unit('ns').asi8}
+        arrays.update({name: bars[name].to_numpy(dtype=np.float64) for name in ('open', 'high', 'low', 'close')})
+        return arrays
+
+    arrays = {'timestamp': np.asarray(bars['timestamp'], dtype=np.int64)}
+    arrays.update({name: np.ascontiguousarray(bars[name], dtype=np.float64) for name in ('open', 'high', 'low', 'close')})
+    return arrays
+
+
+def entry_signals(close: np.ndarray, middle: np.ndarray, rsi: np.ndarray, rsi_threshold: float) -> np.ndarray:
+    """BUY signals of the Bollinger Band RSI strategy: close below the middle
+    band and the RSI crossing above the threshold"""
+    return BollingerBandRSIStrategy.buy_conditions(close, middle, rsi, rsi_threshold)
+
+
+class BacktestResult:
+    """Trades of a backtest run and their summary statistics. Event driven
+    runs also count the events processed."""
+
+    def __init__(self, trades: pd.DataFrame, pauses: list, bars: int, seconds: float, events: int = None):
+        self.trades = trades
+        self.pauses = pauses
+        self.bars = bars
+        self.seconds = seconds
+        self.events = events
+
+    def equity_curve(self) -> pd.Series:
+        """Cumulative PnL after each trade, indexed by exit time"""
+        return self.trades.set_index('exit_time')['pnl'].cumsum()
+
+    def summary(self) -> dict:
+        pnl = self.trades['pnl'].to_numpy()
+        equity = np.cumsum(pnl)
+        drawdown = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:] - equity if len(pnl) else np.zeros(0)
+        gains = pnl[pnl > 0].sum()
+        losses = -pnl[pnl < 0].sum()
+
+        summary = {
+            'bars': self.bars,
+            'trades': len(pnl),
+            'win_rate': float((pnl > 0).mean()) if len(pnl) else np.nan,
+            'total_pnl': float(pnl.sum()),
+            'average_pnl': float(pnl.mean()) if len(pnl) else np.nan,
+            'profit_factor': float(gains / losses) if losses > 0 else np.nan,
+            'max_drawdown': float(drawdown.max()) if len(drawdown) else 0.0,
+            'exit_reasons': self.trades['exit_reason'].value_counts().to_dict(),
+            'trading_pauses': len(self.pauses),
+            'seconds': self.seconds,
+        }
+        if self.events is not None:
+            summary['events'] = self.events
+            summary['events_per_second'] = self.events / self.seconds if self.seconds > 0 else np.nan
+        return summary
+
+
+class VectorizedBacktest:
+    """Backtest of the Bollinger Band RSI strategy over a history of bars.
+
+    Indicators, entry signals and the trading calendar are computed for all
+    bars with array operations, following BollingerBandRSIStrategy and the
+    RiskManager: a BUY signal on the close of a bar below the middle band with
+    the RSI crossing above rsi_threshold, entries only on trading days within
+    trading hours and one position at a time.
+
+    A signal enters number_of_contracts at the open of the next bar with a
+    bracket of stop_loss_ticks / take_profit_ticks around the entry price. The
+    exit is the first later bar whose low reaches the stop or whose high
+    reaches the take profit, found by searching the future lows and highs in
+    growing chunks. Gaps through a level fill at the bar open; if both levels
+    are reached within one bar the stop is assumed to be hit first.
+
+    With no_endofday_risk, open positions are closed at the open of the first
+    bar of the end of day window (eod_exit_time to trading_end_time) or of the
+    next session. When the realized PnL of a session reaches
+    -max_24h_loss_per_contract per contract, entries are paused for
+    trading_pause_hours.
+    """
+
+    def __init__(self, config: Configuration, search_chunk: int = 256):
+        self.config = config
+        self.search_chunk = search_chunk
+
+        self.tick_size = config.mnq_tick_size
+        self.point_value = config.mnq_point_value
+        self.quantity = config.number_of_contracts
+
+    def signals(self, close: np.ndarray) -> np.ndarray:
+        """Boolean array of the bars closing with a BUY signal"""
+        cfg = self.config
+        middle, _ = kernels.rolling_mean_std(close, cfg.bollinger_period)
+        rsi = kernels.rsi(close, cfg.rsi_period)
+        return entry_signals(close, middle, rsi, cfg.rsi_threshold)
+
+    def calendar(self, timestamps: np.ndarray) -> dict:
+        """Per bar trading calendar flags.
+
+        Returns:
+            dict: 'session' id of the trading session each bar belongs to,
+            'tradable' whether entries are allowed and 'eod' whether the bar is
+            in the end of day exit window
+        """
+        cfg = self.config
+        local = pd.DatetimeIndex(timestamps, tz='UTC').tz_convert(cfg.timezone)
+        wall = local.tz_localize(None).as_unit('ns').asi8
+        minute = (wall % NS_PER_DAY) // NS_PER_MINUTE
+        weekday = local.weekday.to_numpy()
+
+        start = _minutes(cfg.trading_start_time)
+        end = _minutes(cfg.trading_end_time)
+        eod = _minutes(cfg.eod_exit_time)
+
+        if start < end:
+            trading_hours = (minute >= start) & (minute < end)
+        else:
+            trading_hours = (minute >= start) | (minute < end)
+
+        holidays = set()
+        for year in np.unique(local.year):
+            holidays |= us_holidays(int(year))
+        dates = local.tz_localize(None).normalize().as_unit('ns').asi8
+        holiday_dates = np.array(sorted(pd.Timestamp(day).value for day in holidays), dtype=np.int64)
+        holiday = np.isin(dates, holiday_dates)
+
+        trading_day = ~holiday & ((weekday <= 4) | ((weekday == 6) & (minute >= start)))
+
+        # Sessions start at trading_start_time, all bars until the next start share a session
+        session = (wall - start * NS_PER_MINUTE) // NS_PER_DAY
+        eod_window = (minute >= eod) & (minute <= end)
+
+        tradable = trading_day & trading_hours
+        if cfg.no_endofday_risk:
+            tradable &= ~eod_window
+
+        return {'session': session, 'tradable': tradable, 'eod': eod_window}
+
+    def run(self, bars, signals: np.ndarray = None, calendar: dict = None) -> BacktestResult:
+        """Backtest over bars given as a DataFrame or MarketDataStore columns.
+
+        Args:
+            bars: Bars as a DataFrame or a dict of column arrays
+            signals: Precomputed BUY signals of the bars, computed from the
+                configuration unless given
+            calendar: Precomputed calendar() of the bar timestamps
+        """
+        started = time.perf_counter()
+        cfg = self.config
+        arrays = bar_arrays(bars)
+        timestamps = arrays['timestamp']
+        open_, high, low, close = arrays['open'], arrays['high'], arrays['low'], arrays['close']
+        n = len(timestamps)
+
+        if signals is None:
+            signals = self.signals(close)
+        if calendar is None:
+            calendar = self.calendar(timestamps)
+        session = calendar['session']
+
+        # Entries at the open of the bar after the signal, within the same session
+        entry = np.zeros(n, dtype=bool)
+        entry[1:] = signals[:-1] & calendar['tradable'][1:] & (session[1:] == session[:-1])
+        entries = np.flatnonzero(entry)
+
+        # Index of the first bar at or after each bar where open positions are closed
+        if cfg.no_endofday_risk:
+            exit_points = calendar['eod'].copy()
+            exit_points[1:] |= session[1:] != session[:-1]
+            forced_exit = np.where(exit_points, np.arange(n), n)
+            forced_exit = np.minimum.accumulate(forced_exit[::-1])[::-1]
+        else:
+            forced_exit = np.full(n, n)
+
+        loss_limit = -cfg.max_24h_loss_per_contract * self.quantity
+        pause_ns = int(cfg.trading_pause_hours * 60 * NS_PER_MINUTE)
+
+        trades = []
+        pauses = []
+        session_pnl = {}
+        k = 0
+        while k < len(entries):
+            e = entries[k]
+            entry_price = open_[e]
+            stop_price = round((entry_price - cfg.stop_loss_ticks * self.tick_size) / self.tick_size) * self.tick_size
+            take_profit_price = round((entry_price + cfg.take_profit_ticks * self.tick_size) / self.tick_size) * self.tick_size
+
+            end = forced_exit[e]
+            j = self._first_touch(low, high, stop_price, take_profit_price, e, end)
+
+            if j >= 0 and low[j] <= stop_price:
+                x, exit_price, reason = j, min(open_[j], stop_price), 'stop_loss'
+            elif j >= 0:
+                x, exit_price, reason = j, max(open_[j], take_profit_price), 'take_profit'
+            elif end < n:
+                x, exit_price, reason = end, open_[end], 'eod'
+            else:
+                x, exit_price, reason = n - 1, close[n - 1], 'end_of_data'
+
+            pnl = (exit_price - entry_price) * self.point_value * self.quantity
+            trades.append((timestamps[e], entry_price, stop_price, take_profit_price,
+                           timestamps[x], exit_price, reason, pnl))
+
+            # Flat again after the exit bar, whose close can signal the next entry
+            next_entry = x + 1
+            exit_session = session[x]
+            session_pnl[exit_session] = session_pnl.get(exit_session, 0.0) + pnl
+            if session_pnl[exit_session] <= loss_limit:
+                pause_start = int(timestamps[x])
+                pauses.append((pause_start, pause_start + pause_ns))
+                next_entry = max(next_entry, int(np.searchsorted(timestamps, pause_start + pause_ns)))
+
+            k = int(np.searchsorted(entries, next_entry))
+
+        trades = pd.DataFrame(trades, columns=[
+            'entry_time', 'entry_price', 'stop_loss_price', 'take_profit_price',
+            'exit_time', 'exit_price', 'exit_reason', 'pnl'])
+        for column in ('entry_time', 'exit_time'):
+            trades[column] = pd.to_datetime(trades[column].astype(np.int64), utc=True).dt.tz_convert(cfg.timezone)
+        trades['quantity'] = self.quantity
+
+        pauses = [(pd.Timestamp(start, tz='UTC').tz_convert(cfg.timezone),
+                   pd.Timestamp(end, tz='UTC').tz_convert(cfg.timezone)) for start, end in pauses]
+
+        seconds = time.perf_counter() - started
+        logging.info(f"Backtest: {len(trades)} trades over {n} bars in {seconds:.3f}s")
+        return BacktestResult(trades, pauses, n, seconds)
+
+    def _first_touch(self, low, high, stop_price, take_profit_price, start, end) -> int:
+        """Index of the first bar in [start, end) reaching either bracket level, -1 if none"""
+        chunk = self.search_chunk
+        while start < end:
+            stop = min(start + chunk, end)
+            touched = (low[start:stop] <= stop_price) | (high[start:stop] >= take_profit_price)
+            first = int(touched.argmax())
+            if touched[first]:
+                return start + first
+            start = stop
+            chunk *= 2
+        return -1
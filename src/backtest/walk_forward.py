@@ -0,0 +1,232 @@
+import os
+import time
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+from src.backtest.sweep import ParameterSweep, SweepWorker, SWEEP_PARAMETERS, rank
+from src.backtest.vectorized import BacktestResult, NS_PER_MINUTE
+from src.configuration import Configuration
+
+
+# Settings other than the swept parameters that change backtest results
+BACKTEST_SETTINGS = (
+    'timezone',
+    'trading_start_time',
+    'trading_end_time',
+    'eod_exit_time',
+    'no_endofday_risk',
+    'max_24h_loss_per_contract',
+    'trading_pause_hours',
+    'mnq_tick_size',
+    'mnq_point_value',
+    'number_of_contracts',
+)
+
+
+class WalkForwardResult:
+    """Parameters chosen in each in-sample window and the stitched
+    out-of-sample trades"""
+
+    def __init__(self, periods: pd.DataFrame, out_of_sample: BacktestResult):
+        self.periods = periods
+        self.out_of_sample = out_of_sample
+
+    def equity_curve(self) -> pd.Series:
+        """Cumulative out-of-sample PnL after each trade, indexed by exit time"""
+        return self.out_of_sample.equity_curve()
+
+    def summary(self) -> dict:
+        summary = self.out_of_sample.summary()
+        summary['periods'] = len(self.periods)
+        return summary
+
+
+class WalkForward:
+    """Rolling in-sample optimization and out-of-sample evaluation.
+
+    The history is split into windows of in_sample followed by out_of_sample
+    time, rolled forward by out_of_sample. Every parameter set is backtested
+    over each in-sample window, the best by rank_by is backtested over the
+    following out-of-sample window, and the out-of-sample trades of all
+    windows are stitched together.
+
+    The in-sample backtests of all windows run on one ParameterSweep pool.
+    Indicators are computed over the full history, as the live system has
+    the bars before a window, so overlapping windows share them. With a
+    cache_dir, the in-sample results of each window are stored under a key
+    of the window bars, the bars before it and the settings, and a rerun
+    only backtests the windows and parameter sets not cached yet, e.g. after
+    new bars are appended or values are added to the parameter space.
+    """
+
+    def __init__(self, cfg: Configuration, bars, parameters: list, in_sample='60D', out_of_sample='20D',
+                 rank_by: str = 'total_pnl', processes: int = None, cache_dir: str = None):
+        """
+        :param cfg: Configuration instance with the parameters not swept
+        :param bars: Bars as a DataFrame or MarketDataStore columns
+        :param parameters: Parameter sets, e.g. from parameter_grid or random_parameters
+        :param in_sample: Length of the in-sample windows, anything pd.Timedelta accepts
+        :param out_of_sample: Length of the out-of-sample windows and of the step between windows
+        :param rank_by: Result column choosing the in-sample parameters, higher is better
+        :param processes: Worker processes, all cores unless given. 1 runs in this process
+        :param cache_dir: Directory of the in-sample results of each window
+        """
+        if not parameters:
+            raise ValueError("At least one parameter set is required")
+
+        self.config = cfg
+        self.parameters = parameters
+        self.in_sample = pd.Timedelta(in_sample)
+        self.out_of_sample = pd.Timedelta(out_of_sample)
+        if self.in_sample <= pd.Timedelta(0) or self.out_of_sample <= pd.Timedelta(0):
+            raise ValueError("Walk forward windows must have a positive length")
+
+        self.rank_by = rank_by
+        self.cache_dir = cache_dir
+        self.sweep = ParameterSweep(cfg, bars, processes=processes, rank_by=rank_by)
+        self.bars = self.sweep.bars
+
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def windows(self) -> list:
+        """Bar index ranges (in-sample start, out-of-sample start,
+        out-of-sample stop) of the walk forward windows"""
+        timestamps = self.bars['timestamp']
+        if len(timestamps) == 0:
+            return []
+
+        windows = []
+        first = int(timestamps[0])
+        while True:
+            boundaries = np.searchsorted(timestamps, [first,
+                                                      first + self.in_sample.value,
+                                                      first + self.in_sample.value + self.out_of_sample.value])
+            start, split, stop = (int(boundary) for boundary in boundaries)
+            if split >= len(timestamps):
+                break
+            if start < split < stop:
+                windows.append((start, split, stop))
+            first += self.out_of_sample.value
+
+        return windows
+
+    def run(self) -> WalkForwardResult:
+        started = time.perf_counter()
+        windows = self.windows()
+        if not windows:
+            raise ValueError("The bars are shorter than one in-sample and out-of-sample window")
+
+        keys = self._cache_keys(windows)
+        results = [self._load(key) for key in keys]
+
+        # Backtests of the parameter sets not cached yet, across all windows
+        tasks = []
+        for batch in self.sweep.batches(self.parameters):
+            for (start, split, _), cached in zip(windows, results):
+                missing = [parameters for parameters in batch if self._parameter_key(parameters) not in cached]
+                if missing:
+                    tasks.append((start, split, missing))
+
+        self.cache_misses = sum(len(batch) for _, _, batch in tasks)
+        self.cache_hits = len(windows) * len(self.parameters) - self.cache_misses
+        logging.info(f"Walk forward: {len(windows)} windows, {len(self.parameters)} parameter sets, "
+                     f"{self.cache_hits} cached and {self.cache_misses} new in-sample backtests")
+
+        if tasks:
+            index = {window[:2]: i for i, window in enumerate(windows)}
+            for start, split, rows in self.sweep.map(tasks):
+                for row in rows:
+                    results[index[start, split]][self._parameter_key(row)] = row
+
+            for key, cached in zip(keys, results):
+                self._store(key, cached)
+
+        # Out-of-sample backtests of the chosen parameters
+        worker = SweepWorker(self.config, self.bars, self.sweep.calendar)
+        by_key = {self._parameter_key(parameters): parameters for parameters in self.parameters}
+        timestamps = self.bars['timestamp']
+        periods = []
+        trades = []
+        pauses = []
+        for period, ((start, split, stop), cached) in enumerate(zip(windows, results)):
+            in_sample = rank(pd.DataFrame([cached[self._parameter_key(parameters)]
+                                           for parameters in self.parameters]), self.rank_by)
+            best = in_sample.iloc[0]
+            chosen = dict(by_key[self._parameter_key(best)])
+
+            result = worker.backtest(chosen, split, stop)
+            result.trades.insert(0, 'period', period)
+            trades.append(result.trades)
+            pauses += result.pauses
+
+            periods.append({
+                'period': period,
+                'in_sample_start': timestamps[start],
+                'out_of_sample_start': timestamps[split],
+                'out_of_sample_end': timestamps[stop - 1],
+                **chosen,
+                f'in_sample_{self.rank_by}': best[self.rank_by],
+                'out_of_sample_trades': len(result.trades),
+                'out_of_sample_pnl': result.trades['pnl'].sum(),
+            })
+
+        periods = pd.DataFrame(periods)
+        for column in ('in_sample_start', 'out_of_sample_start', 'out_of_sample_end'):
+            periods[column] = pd.to_datetime(periods[column].astype(np.int64), utc=True).dt.tz_convert(self.config.timezone)
+
+        seconds = time.perf_counter() - started
+        out_of_sample = BacktestResult(pd.concat(trades, ignore_index=True), pauses,
+                                       windows[-1][2] - windows[0][1], seconds)
+        logging.info(f"Walk forward: {len(windows)} periods in {seconds:.2f}s, "
+                     f"out-of-sample PnL {out_of_sample.trades['pnl'].sum()}")
+        return WalkForwardResult(periods, out_of_sample)
+
+    def _parameter_key(self, parameters: dict) -> tuple:
+        return tuple(parameters[name] for name in self.parameters[0])
+
+    def _cache_keys(self, windows: list) -> list:
+        """Keys of the in-sample results of each window: a digest of the
+        settings, the bars up to the end of the window (indicators depend on
+        all bars before) and the window bounds"""
+        if self.cache_dir is None:
+            return [None] * len(windows)
+
+        settings = repr(tuple((name, getattr(self.config, name)) for name in BACKTEST_SETTINGS + SWEEP_PARAMETERS
+                              if name not in self.parameters[0]))
+        digest = hashlib.sha1(settings.encode())
+
+        keys = {}
+        hashed = 0
+        for split in sorted({split for _, split, _ in windows}):
+            for array in self.bars.values():
+                digest.update(np.ascontiguousarray(array[hashed:split]).tobytes())
+            hashed = split
+            keys[split] = digest.hexdigest()
+
+        timestamps = self.bars['timestamp']
+        return [f"{keys[split]}_{timestamps[start] // NS_PER_MINUTE}" for start, split, _ in windows]
+
+    def _load(self, key: str) -> dict:
+        """Cached in-sample result rows of a window by parameter set"""
+        if key is None:
+            return {}
+
+        path = os.path.join(self.cache_dir, f"in_sample_{key}.csv")
+        if not os.path.exists(path):
+            return {}
+
+        rows = pd.read_csv(path).to_dict('records')
+        if rows and any(name not in rows[0] for name in self.parameters[0]):
+            return {}
+        return {self._parameter_key(row): row for row in rows}
+
+    def _store(self, key: str, rows: dict):
+        if key is None:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, f"in_sample_{key}.csv")
+        pd.DataFrame(list(rows.values())).to_csv(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
@@ -1,9 +1,7 @@
 import os
-from src.utilities.period import Period
+import copy
 import configparser
 import logging
-from datetime import datetime
-import pytz
 from src.utilities.period import Period
 
 
@@ -17,12 +15,12 @@ class Configuration:
         self.log_level = self._configure_log(self.config.get('Run', 'log_level'))
         logger = logging.getLogger()
         logger.setLevel(self.log_level)
+        self.warm_restart = self.config.getboolean('Run', 'warm_restart', fallback=False)
+        self.debug_dumps = self.config.getboolean('Run', 'debug_dumps', fallback=False)
 
         # Trading section
-        self.ticker = self.config.get('Trading', 'ticker')
         self.order_type = self.config.get('Trading', 'order_type')
         self.exchange = self.config.get('Trading', 'exchange')
-        self.number_of_contracts = self._check_contract_number(self.config.getint('Trading', 'number_of_contracts'))
         self.currency = self.config.get('Trading', 'currency')
         self.trading_start_time = self.config.get('Trading', 'trading_start_time')
         self.trading_end_time = self.config.get('Trading', 'trading_end_time')
@@ -40,11 +38,10 @@ class Configuration:
         self.no_endofday_risk = self.config.getboolean('Risk_Management', 'no_endofday_risk')
 
         # Market Data section
-        self.mnq_tick_size = self.config.getfloat('Market_Data', 'mnq_tick_size')
-        self.mnq_point_value = self.config.getfloat('Market_Data', 'mnq_point_value')
         self.bar_size = Period(self.config.get('Market_Data', 'bar_size'))
         self.horizon = Period(self.config.get('Market_Data', 'horizon'))
         self.save_market_data = self.config.getboolean('Market_Data', 'save_market_data')
+        self.bar_buffer_capacity = self.config.getint('Market_Data', 'bar_buffer_capacity', fallback=2880)
 
         # API section
         self.api = self.config.get('API', 'API')
@@ -55,12 +52,115 @@ class Configuration:
         self.ib_port = self._set_ib_port()
         self.timeout = self.config.getint('API', 'timeout')
 
+        # Monitoring section
+        self.instrumentation = self.config.getboolean('Monitoring', 'instrumentation', fallback=False)
+        self.metrics_port = self.config.getint('Monitoring', 'metrics_port', fallback=0)
+
         # Technical Indicators section
         self.bollinger_period = self.config.getint('Technical_Indicators', 'bollinger_period')
         self.bollinger_std = self.config.getint('Technical_Indicators', 'bollinger_std')
         self.rsi_period = self.config.getint('Technical_Indicators', 'rsi_period')
         self.rsi_threshold = self.config.getint('Technical_Indicators', 'rsi_threshold')
 
+        # Instruments. The first instrument also sets the single-instrument
+        # attributes (ticker, exchange, number_of_contracts, mnq_tick_size, mnq_point_value)
+        self.instruments = self._read_instruments()
+        self._apply_instrument(self, next(iter(self.instruments)))
+
+        # Strategies evaluated on every bar, each trading its own sub-account
+        self.strategies = self._read_strategies()
+        self.strategy_name = None
+
+    def for_instrument(self, symbol: str) -> 'Configuration':
+        """Copy of the configuration with the single-instrument attributes
+        set to those of the given instrument"""
+        if symbol not in self.instruments:
+            raise ValueError(f"Instrument {symbol} not configured. Configured instruments: {list(self.instruments)}")
+
+        cfg = copy.copy(self)
+        self._apply_instrument(cfg, symbol)
+        return cfg
+
+    def for_strategy(self, name: str) -> 'Configuration':
+        """Copy of the configuration with the strategy type, indicator parameters
+        and (optionally) number of contracts of the given strategy"""
+        if name not in self.strategies:
+            raise ValueError(f"Strategy {name} not configured. Configured strategies: {list(self.strategies)}")
+
+        cfg = copy.copy(self)
+        cfg.strategy_name = name
+        for key, value in self.strategies[name].items():
+            setattr(cfg, key, value)
+        return cfg
+
+    def _apply_instrument(self, cfg: 'Configuration', symbol: str):
+        instrument = self.instruments[symbol]
+        cfg.ticker = symbol
+        cfg.exchange = instrument['exchange']
+        cfg.number_of_contracts = instrument['number_of_contracts']
+        cfg.mnq_tick_size = instrument['tick_size']
+        cfg.mnq_point_value = instrument['point_value']
+
+    def _read_instruments(self) -> dict:
+        """Read the traded instruments keyed by symbol. If the Trading section
+        lists instruments, each is defined in its own Instrument_<symbol> section.
+        Otherwise the single ticker of the Trading and Market_Data sections is used."""
+        if not self.config.has_option('Trading', 'instruments'):
+            return {
+                self.config.get('Trading', 'ticker'): {
+                    'exchange': self.exchange,
+                    'number_of_contracts': self._check_contract_number(self.config.getint('Trading', 'number_of_contracts')),
+                    'tick_size': self.config.getfloat('Market_Data', 'mnq_tick_size'),
+                    'point_value': self.config.getfloat('Market_Data', 'mnq_point_value'),
+                }
+            }
+
+        symbols = [symbol.strip() for symbol in self.config.get('Trading', 'instruments').split(',') if symbol.strip()]
+        if not symbols:
+            raise ValueError("At least one instrument must be configured")
+
+        instruments = {}
+        for symbol in symbols:
+            section = f'Instrument_{symbol}'
+            instruments[symbol] = {
+                'exchange': self.config.get(section, 'exchange'),
+                'number_of_contracts': self._check_contract_number(self.config.getint(section, 'number_of_contracts')),
+                'tick_size': self.config.getfloat(section, 'tick_size'),
+                'point_value': self.config.getfloat(section, 'point_value'),
+            }
+
+        return instruments
+
+    def _read_strategies(self) -> dict:
+        """Read the strategies keyed by name. If the Trading section lists 
+        strategies, each is defined in its own Strategy_<name> section with a
+        strategy type and optional overrides of the Technical_Indicators 
+        parameters and number_of_contracts. Otherwise the single strategy of 
+        the Trading section is used."""
+        if not self.config.has_option('Trading', 'strategies'):
+            return {self.strategy: {'strategy': self.strategy}}
+
+        names = [name.strip() for name in self.config.get('Trading', 'strategies').split(',') if name.strip()]
+        if not names:
+            raise ValueError("At least one strategy must be configured")
+
+        strategies = {}
+        for name in names:
+            section = f'Strategy_{name}'
+            strategy = {'strategy': self.config.get(section, 'type')}
+
+            for key in ('bollinger_period', 'bollinger_std', 'rsi_period', 'rsi_threshold'):
+                if self.config.has_option(section, key):
+                    strategy[key] = self.config.getint(section, key)
+
+            if self.config.has_option(section, 'number_of_contracts'):
+                strategy['number_of_contracts'] = self._check_contract_number(
+                    self.config.getint(section, 'number_of_contracts'))
+
+            strategies[name] = strategy
+
+        return strategies
+
     def _configure_log(self, log_level: str):
         if log_level == "Debug":
             return logging.DEBUG
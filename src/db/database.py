@@ -5,6 +5,23 @@ import pandas as pd
 from typing import Union
 from ibapi.order import Order
 import time
+from src.monitoring.instrumentation import timed
+from src.utilities.clock import clock
+
+
+class _TableDump:
+    """Rows of a table formatted as text only when the log record is written"""
+
+    def __init__(self, columns: list, rows: list, width: int):
+        self.columns = columns
+        self.rows = rows
+        self.width = width
+
+    def __str__(self):
+        header = " | ".join(f"{col:<{self.width}}" for col in self.columns)
+        lines = [header, "-" * len(header)]
+        lines.extend(" | ".join(f"{str(val):<{self.width}}" for val in row) for row in self.rows)
+        return "\n".join(lines)
 
 
 class Database:
@@ -16,7 +33,8 @@ class Database:
         if not os.path.exists(self.db_path):
             self._init_db()
         else:
-            logging.info(f"Using existing database at {self.db_path}")
+            logging.info("Using existing database at %s", self.db_path)
+            self._migrate()
 
     def reinitialize(self):
         """Delete the existing database file and reinitialize it.
@@ -46,7 +64,7 @@ class Database:
 
                     try:
                         os.remove(self.db_path)
-                        logging.info(f"Deleted existing database at {self.db_path}")
+                        logging.info("Deleted existing database at %s", self.db_path)
                         break
                     except PermissionError:
                         if attempt < max_attempts - 1:
@@ -83,7 +101,9 @@ class Database:
                         lmt_price REAL,
                         parent_id INTEGER,
                         transmit BOOLEAN NOT NULL,
-                        created_timestamp TIMESTAMP NOT NULL
+                        created_timestamp TIMESTAMP NOT NULL,
+                        ticker TEXT,
+                        account TEXT
                     )
                 ''')
                 # Create positions table
@@ -98,7 +118,8 @@ class Database:
                         quantity INTEGER NOT NULL,
                         avg_price REAL NOT NULL,
                         time_opened TIMESTAMP NOT NULL,
-                        created_timestamp TIMESTAMP NOT NULL
+                        created_timestamp TIMESTAMP NOT NULL,
+                        account TEXT
                     )
                 ''')
                 # Create trading_pause table
@@ -107,7 +128,8 @@ class Database:
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         start_time TIMESTAMP NOT NULL,
                         end_time TIMESTAMP NOT NULL,
-                        created_timestamp TIMESTAMP NOT NULL
+                        created_timestamp TIMESTAMP NOT NULL,
+                        ticker TEXT
                     )
                 ''')
                 # Create order_status table
@@ -134,16 +156,43 @@ class Database:
             logging.error(f"Error initializing database: {str(e)}")
             raise
 
-    def add_order(self, order: Union[Order, list[Order]]):
+    def _migrate(self):
+        """Add the columns introduced after an existing database was created.
+        The ticker of orders and trading pauses is required to share one 
+        database between instruments, the account of orders and positions to 
+        share one instrument between strategies. Rows created before are left 
+        untagged (NULL)."""
+        new_columns = (
+            ('orders', 'ticker'),
+            ('trading_pause', 'ticker'),
+            ('orders', 'account'),
+            ('positions', 'account'),
+        )
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                for table, column in new_columns:
+                    cursor.execute(f"PRAGMA table_info({table})")
+                    columns = [col[1] for col in cursor.fetchall()]
+                    if columns and column not in columns:
+                        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+                        logging.info("DB: Added %s column to %s table", column, table)
+                conn.commit()
+        except Exception as e:
+            logging.error(f"DB: Error migrating database: {str(e)}")
+            raise
+
+    @timed("db.add_order")
+    def add_order(self, order: Union[Order, list[Order]], ticker: str = None, account: str = None):
         """Add a trading order to the database"""
         if not isinstance(order, list):
             order = [order]
 
         success = True
-        current_time = pd.Timestamp.now(tz=self.timezone)
+        current_time = clock.now(tz=self.timezone)
         
         for cur_order in order:
-            logging.debug(f"Adding order to database: {cur_order}")
+            logging.debug("Adding order to database: %s", cur_order)
 
             try:
                 with sqlite3.connect(self.db_path) as conn:
@@ -151,8 +200,8 @@ class Database:
                     cursor.execute('''
                         INSERT INTO orders (
                             order_id, action, order_type, quantity, aux_price,
-                            lmt_price, parent_id, transmit, created_timestamp
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                            lmt_price, parent_id, transmit, created_timestamp, ticker, account
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     ''', (
                         cur_order.orderId,
                         cur_order.action,
@@ -162,10 +211,12 @@ class Database:
                         cur_order.lmtPrice,
                         cur_order.parentId,
                         cur_order.transmit,
-                        current_time.isoformat()
+                        current_time.isoformat(),
+                        ticker,
+                        account
                     ))
                     conn.commit()
-                    logging.debug(f"Added order {cur_order.orderId} to database")
+                    logging.debug("Added order %s to database", cur_order.orderId)
 
             except Exception as e:
                 logging.error(f"DB: Error adding order to database: {str(e)}")
@@ -190,24 +241,27 @@ class Database:
                         'lmt_price': row[5],
                         'parent_id': row[6],
                         'transmit': row[7],
-                        'created_timestamp': row[8]
+                        'created_timestamp': row[8],
+                        'ticker': row[9] if len(row) > 9 else None,
+                        'account': row[10] if len(row) > 10 else None
                     }
                 return None
         except Exception as e:
             logging.error(f"DB: Error getting order from database: {str(e)}")
             return None
 
-    def add_position(self, position):
+    @timed("db.add_position")
+    def add_position(self, position, account: str = None):
         """Add a position to the database"""
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
-                current_time = pd.Timestamp.now(tz=self.timezone)
+                current_time = clock.now(tz=self.timezone)
                 cursor.execute('''
                     INSERT INTO positions (
                         contract_id, ticker, security, currency, expiry,
-                        quantity, avg_price, time_opened, created_timestamp
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        quantity, avg_price, time_opened, created_timestamp, account
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (
                     position.contract_id,
                     position.ticker,
@@ -217,11 +271,12 @@ class Database:
                     position.quantity,
                     position.avg_price,
                     position.time_opened.isoformat(),
-                    current_time.isoformat()
+                    current_time.isoformat(),
+                    account
                 ))
                 conn.commit()
                 position_id = cursor.lastrowid
-                logging.info(f"Added position {position_id} to database")
+                logging.info("Added position %s to database", position_id)
                 return position_id
         except Exception as e:
             logging.error(f"DB: Error adding position to database: {str(e)}")
@@ -277,6 +332,7 @@ class Database:
             logging.error(f"DB: Error getting position from database: {str(e)}")
             return None
 
+    @timed("db.update_position")
     def update_position(self, position):
         """Update an existing position in the database"""
         try:
@@ -305,24 +361,25 @@ class Database:
                     position.id
                 ))
                 conn.commit()
-                logging.info(f"DB: Updated position {position.id}")
+                logging.info("DB: Updated position %s", position.id)
                 return True
         except Exception as e:
             logging.error(f"DB: Error updating position in database: {str(e)}")
             return False
 
-    def add_trading_pause(self, start_time: pd.Timestamp, end_time: pd.Timestamp):
+    @timed("db.add_trading_pause")
+    def add_trading_pause(self, start_time: pd.Timestamp, end_time: pd.Timestamp, ticker: str = None):
         """Add a trading pause period to the database"""
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
-                current_time = pd.Timestamp.now(tz=self.timezone)
+                current_time = clock.now(tz=self.timezone)
                 cursor.execute('''
-                    INSERT INTO trading_pause (start_time, end_time, created_timestamp)
-                    VALUES (?, ?, ?)
-                ''', (start_time.isoformat(), end_time.isoformat(), current_time.isoformat()))
+                    INSERT INTO trading_pause (start_time, end_time, created_timestamp, ticker)
+                    VALUES (?, ?, ?, ?)
+                ''', (start_time.isoformat(), end_time.isoformat(), current_time.isoformat(), ticker))
                 conn.commit()
-                logging.info(f"Added trading pause to DB from {start_time} to {end_time}")
+                logging.info("Added trading pause to DB from %s to %s", start_time, end_time)
                 return True
         except Exception as e:
             logging.error(f"DB: Error adding trading pause to database: {str(e)}")
@@ -376,7 +433,7 @@ class Database:
                     order.order_id
                 ))
                 conn.commit()
-                logging.info(f"DB: Updated order {order.order_id}")
+                logging.info("DB: Updated order %s", order.order_id)
                 return True
         except Exception as e:
             logging.error(f"DB: Error updating order in database: {str(e)}")
@@ -384,100 +441,55 @@ class Database:
 
     def print_all_entries(self):
         """Print all entries from all tables in a readable format"""
+        if not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return True
+
         logging.debug("=== DATABASE ENTRIES ===")
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
-                
-                # Print Orders
-                logging.debug("=== ORDERS ===")
-                cursor.execute("PRAGMA table_info(orders)")
-                order_columns = [col[1] for col in cursor.fetchall()]
-                cursor.execute('SELECT * FROM orders')
-                orders = cursor.fetchall()
-                if orders:
-                    # Create header with column names
-                    header = " | ".join(f"{col:<8}" for col in order_columns)
-                    logging.debug(header)
-                    logging.debug("-" * len(header))
-                    # Print data rows
-                    for order in orders:
-                        row = " | ".join(f"{str(val):<8}" for val in order)
-                        logging.debug(row)
-                else:
-                    logging.debug("No orders found")
-
-                # Print Positions
-                logging.debug("=== POSITIONS ===")
-                cursor.execute("PRAGMA table_info(positions)")
-                position_columns = [col[1] for col in cursor.fetchall()]
-                cursor.execute('SELECT * FROM positions')
-                positions = cursor.fetchall()
-                if positions:
-                    # Create header with column names
-                    header = " | ".join(f"{col:<10}" for col in position_columns)
-                    logging.debug(header)
-                    logging.debug("-" * len(header))
-                    # Print data rows
-                    for pos in positions:
-                        row = " | ".join(f"{str(val):<10}" for val in pos)
-                        logging.debug(row)
-                else:
-                    logging.debug("No positions found")
-
-                # Print Trading Pauses
-                logging.debug("=== TRADING PAUSES ===")
-                cursor.execute("PRAGMA table_info(trading_pause)")
-                pause_columns = [col[1] for col in cursor.fetchall()]
-                cursor.execute('SELECT * FROM trading_pause')
-                pauses = cursor.fetchall()
-                if pauses:
-                    # Create header with column names
-                    header = " | ".join(f"{col:<15}" for col in pause_columns)
-                    logging.debug(header)
-                    logging.debug("-" * len(header))
-                    # Print data rows
-                    for pause in pauses:
-                        row = " | ".join(f"{str(val):<15}" for val in pause)
-                        logging.debug(row)
-                else:
-                    logging.debug("No trading pauses found")
-
-                # Print Order Statuses
-                logging.debug("=== ORDER STATUSES ===")
-                cursor.execute("PRAGMA table_info(order_status)")
-                status_columns = [col[1] for col in cursor.fetchall()]
-                cursor.execute('SELECT * FROM order_status')
-                statuses = cursor.fetchall()
-                if statuses:
-                    # Create header with column names
-                    header = " | ".join(f"{col:<12}" for col in status_columns)
-                    logging.debug(header)
-                    logging.debug("-" * len(header))
-                    # Print data rows
-                    for status in statuses:
-                        row = " | ".join(f"{str(val):<12}" for val in status)
-                        logging.debug(row)
-                else:
-                    logging.debug("No order statuses found")
+
+                # Table, title, column width
+                for table, title, width in (('orders', 'ORDERS', 8),
+                                            ('positions', 'POSITIONS', 10),
+                                            ('trading_pause', 'TRADING PAUSES', 15),
+                                            ('order_status', 'ORDER STATUSES', 12)):
+                    logging.debug("=== %s ===", title)
+                    cursor.execute(f"PRAGMA table_info({table})")
+                    columns = [col[1] for col in cursor.fetchall()]
+                    cursor.execute(f'SELECT * FROM {table}')
+                    rows = cursor.fetchall()
+                    if rows:
+                        # One record per table, rendered by the log writer thread
+                        logging.debug("%s", _TableDump(columns, rows, width))
+                    else:
+                        logging.debug("No %s found", title.lower())
 
                 return True
         except Exception as e:
             logging.error(f"DB: Error printing database entries: {str(e)}")
             return False
 
-    def get_all_orders_and_positions(self):
-        """Get all orders and positions from the database"""
+    @timed("db.get_all_orders_and_positions")
+    def get_all_orders_and_positions(self, ticker: str = None, account: str = None):
+        """Get all orders and positions from the database. If a ticker is given, 
+        only orders and positions of that ticker (and untagged orders created 
+        before orders were tagged with their ticker) are returned. If an account
+        is given, only orders and positions of that strategy sub-account are returned."""
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
+
+                order_where, order_params = self._order_scope(ticker, account)
+
+                position_where, position_params = self._position_scope(ticker, account)
                 
                 # Get all order IDs
-                cursor.execute('SELECT order_id FROM orders ORDER BY created_timestamp DESC')
+                cursor.execute(f'SELECT order_id FROM orders {order_where} ORDER BY created_timestamp DESC', order_params)
                 order_ids = [row[0] for row in cursor.fetchall()]
                 
                 # Get all position IDs
-                cursor.execute('SELECT id FROM positions ORDER BY created_timestamp ASC')
+                cursor.execute(f'SELECT id FROM positions {position_where} ORDER BY created_timestamp ASC', position_params)
                 position_ids = [row[0] for row in cursor.fetchall()]
                 
                 # Get orders and positions using existing methods
@@ -495,16 +507,92 @@ class Database:
                 'positions': []
             }
 
-    def get_trading_pauses(self):
-        """Get all trading pauses from the database"""
+    def get_latest_order(self, ticker: str = None, account: str = None):
+        """Get the order with the highest order id, filtered like 
+        get_all_orders_and_positions. Returns None if there are no orders."""
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT start_time, end_time, created_timestamp
-                    FROM trading_pause 
-                    ORDER BY start_time DESC
-                ''')
+                where, params = self._order_scope(ticker, account)
+                cursor.execute(f'SELECT order_id FROM orders {where} ORDER BY order_id DESC LIMIT 1', params)
+                row = cursor.fetchone()
+                return self.get_order(row[0]) if row else None
+        except Exception as e:
+            logging.error(f"DB: Error getting latest order: {str(e)}")
+            return None
+
+    @staticmethod
+    def _order_scope(ticker: str = None, account: str = None, alias: str = None):
+        """WHERE clause and parameters selecting the orders of a ticker (including
+        untagged orders) and strategy sub-account. The columns are qualified
+        with the table alias of the orders if given."""
+        prefix = f"{alias}." if alias else ""
+        filters, params = [], []
+        if ticker is not None:
+            filters.append(f'({prefix}ticker = ? OR {prefix}ticker IS NULL)')
+            params.append(ticker)
+        if account is not None:
+            filters.append(f'{prefix}account = ?')
+            params.append(account)
+        return (f"WHERE {' AND '.join(filters)}" if filters else ""), params
+
+    @staticmethod
+    def _position_scope(ticker: str = None, account: str = None):
+        """WHERE clause and parameters selecting the positions of a ticker and 
+        strategy sub-account"""
+        filters, params = [], []
+        if ticker is not None:
+            filters.append('ticker = ?')
+            params.append(ticker)
+        if account is not None:
+            filters.append('account = ?')
+            params.append(account)
+        return (f"WHERE {' AND '.join(filters)}" if filters else ""), params
+
+    def delete_orders_and_positions(self, ticker: str = None, account: str = None):
+        """Delete the orders, their statuses and the positions of a ticker and 
+        strategy sub-account, scoped like get_all_orders_and_positions. The rows
+        of other instruments and strategies sharing the database are kept."""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+
+                order_where, order_params = self._order_scope(ticker, account)
+                position_where, position_params = self._position_scope(ticker, account)
+
+                cursor.execute(f'DELETE FROM order_status WHERE order_id IN (SELECT order_id FROM orders {order_where})',
+                               order_params)
+                cursor.execute(f'DELETE FROM orders {order_where}', order_params)
+                orders_deleted = cursor.rowcount
+                cursor.execute(f'DELETE FROM positions {position_where}', position_params)
+                positions_deleted = cursor.rowcount
+                conn.commit()
+
+                logging.info("DB: Deleted %s orders and %s positions of ticker %s, account %s", 
+                             orders_deleted, positions_deleted, ticker, account)
+        except Exception as e:
+            logging.error(f"DB: Error deleting orders and positions: {str(e)}")
+            raise
+
+    def get_trading_pauses(self, ticker: str = None):
+        """Get all trading pauses from the database. If a ticker is given, only 
+        pauses of that ticker (and untagged pauses) are returned."""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                if ticker is None:
+                    cursor.execute('''
+                        SELECT start_time, end_time, created_timestamp
+                        FROM trading_pause 
+                        ORDER BY start_time DESC
+                    ''')
+                else:
+                    cursor.execute('''
+                        SELECT start_time, end_time, created_timestamp
+                        FROM trading_pause 
+                        WHERE ticker = ? OR ticker IS NULL
+                        ORDER BY start_time DESC
+                    ''', (ticker,))
                 rows = cursor.fetchall()
                 if rows:
                     return [{
@@ -517,6 +605,7 @@ class Database:
             logging.error(f"DB: Error getting trading pauses from database: {str(e)}")
             return []
 
+    @timed("db.add_order_status")
     def add_order_status(self, order_id: int, status_dict: dict):
         """Add a new order status to the database
         
@@ -527,7 +616,7 @@ class Database:
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
-                current_time = pd.Timestamp.now(tz=self.timezone)
+                current_time = clock.now(tz=self.timezone)
                 
                 cursor.execute('''
                     INSERT INTO order_status (
@@ -551,12 +640,13 @@ class Database:
                 ))
                 
                 conn.commit()
-                logging.debug(f"Added status for order {order_id} to DB")
+                logging.debug("Added status for order %s to DB", order_id)
                 return True
         except Exception as e:
             logging.error(f"DB: Error adding order status: {str(e)}")
             return False
 
+    @timed("db.update_order_status")
     def update_order_status(self, order_id: int, status_dict: dict):
         """Update an existing order status in the database
         
@@ -567,7 +657,7 @@ class Database:
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
-                current_time = pd.Timestamp.now(tz=self.timezone)
+                current_time = clock.now(tz=self.timezone)
                 
                 cursor.execute('''
                     UPDATE order_status SET
@@ -599,7 +689,7 @@ class Database:
                 ))
                 
                 conn.commit()
-                logging.info(f"DB: Updated status for order {order_id}")
+                logging.info("DB: Updated status for order %s", order_id)
                 return True
         except Exception as e:
             logging.error(f"DB: Error updating order status: {str(e)}")
@@ -639,6 +729,7 @@ class Database:
             logging.error(f"DB: Error getting order status: {str(e)}")
             return None
 
+    @timed("db.get_all_order_statuses")
     def get_all_order_statuses(self):
         """Get all order statuses from the database
         
@@ -659,4 +750,47 @@ class Database:
                 
         except Exception as e:
             logging.error(f"DB: Error getting all order statuses: {str(e)}")
-            return {}
\ No newline at end of file
+            return {}
+
+    def get_filled_orders(self, ticker: str = None, account: str = None):
+        """Get the filled orders with their fills, oldest first, filtered like
+        get_all_orders_and_positions
+
+        Returns:
+            list: Dictionaries with the order_id, action, order_type, parent_id,
+                ticker, account, created_timestamp, filled, avg_fill_price and
+                filled_timestamp (the last status update) of each order
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                where, params = self._order_scope(ticker, account, alias='o')
+                where = f"{where} AND" if where else "WHERE"
+                cursor.execute(f'''
+                    SELECT o.order_id, o.action, o.order_type, o.parent_id, o.ticker, o.account,
+                           o.created_timestamp, s.filled, s.avg_fill_price, s.last_modified
+                    FROM orders o
+                    JOIN order_status s ON s.order_id = o.order_id
+                    {where} s.status = 'Filled' AND s.filled > 0
+                    ORDER BY s.last_modified ASC, o.order_id ASC
+                ''', params)
+
+                return [
+                    {
+                        'order_id': row[0],
+                        'action': row[1],
+                        'order_type': row[2],
+                        'parent_id': row[3],
+                        'ticker': row[4],
+                        'account': row[5],
+                        'created_timestamp': pd.Timestamp(row[6]),
+                        'filled': row[7],
+                        'avg_fill_price': row[8],
+                        'filled_timestamp': pd.Timestamp(row[9])
+                    }
+                    for row in cursor.fetchall()
+                ]
+
+        except Exception as e:
+            logging.error(f"DB: Error getting filled orders: {str(e)}")
+            return []
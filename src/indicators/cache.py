@@ -0,0 +1,344 @@
+import threading
+import weakref
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from src.indicators import kernels
+from src.indicators.incremental import RollingBollinger, WilderRSI
+from src.market_data.bar_buffer import BarBuffer, next_series_id
+from src.market_data.resampler import MultiTimeframeBars
+from src.monitoring.metrics import metrics
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+def _bollinger_bands(close, period, std) -> dict:
+    middle, upper, lower = kernels.bollinger_bands(close, period, std)
+    return {'middle': middle, 'upper': upper, 'lower': lower}
+
+
+def _bollinger_outputs(bollinger: RollingBollinger) -> dict:
+    return {'middle': bollinger.middle[-1], 'upper': bollinger.upper[-1], 'lower': bollinger.lower[-1]}
+
+
+def _rsi_output(rsi: WilderRSI) -> float:
+    return rsi.values[-1]
+
+
+# Indicator name: (compute over the full history, incremental updater, latest updater output)
+INDICATORS = {
+    'bollinger_bands': (_bollinger_bands, RollingBollinger, _bollinger_outputs),
+    'rsi': (kernels.rsi, WilderRSI, _rsi_output),
+}
+
+
+class FrameSeries:
+    """Close prices of a DataFrame of bars as a series of the IndicatorCache.
+    DataFrames carry no version, so every wrapped frame is a series of its own
+    with a single version."""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self.series_id = next_series_id()
+        self.version = (0, len(frame), 0)
+        self._columns = {}
+
+    def __len__(self):
+        return len(self.frame)
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in self._columns:
+            self._columns[name] = self.frame[name].to_numpy(dtype=np.float64)
+        return self._columns[name]
+
+
+class _Entry:
+    __slots__ = ('version', 'values', 'updater', 'last_close', 'nbytes')
+
+    def __init__(self, version, values, updater, last_close):
+        self.version = version
+        self.values = values
+        self.updater = updater
+        self.last_close = last_close
+        arrays = values.values() if isinstance(values, dict) else (values,)
+        self.nbytes = sum(array.nbytes for array in arrays)
+
+
+class IndicatorCache:
+    """Indicators over the full history of bar series, shared by all consumers.
+
+    Entries are keyed by (series id, indicator, parameters) and hold the values
+    for one version of the series, e.g. a BarBuffer. A request for the current
+    version returns the cached arrays, so every consumer gets the same arrays
+    and indicators are computed once. If bars were only appended or the latest
+    bar revised since the entry was computed, only the values of those bars
+    are recomputed, by the O(1) updaters of src.indicators.incremental kept
+    with the entry; anything else recomputes the indicator with the NumPy
+    kernels.
+
+    Returned arrays are read-only and are never modified afterwards, an update
+    produces new arrays. The least recently used entries are evicted once the
+    cached arrays exceed max_bytes, and the entries of a series are dropped
+    when the series is garbage collected.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 2**20):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+
+        self._entries = OrderedDict()
+        self._tracked = set()
+        # Reentrant, a collected series may drop its entries while the lock is held
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.updates = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def bollinger_bands(self, market_data: BarBuffer, period, std) -> dict:
+        """Bollinger Bands ('middle', 'upper', 'lower') of the close prices"""
+        return self.get(market_data, 'bollinger_bands', period, std)
+
+    def rsi(self, market_data: BarBuffer, period) -> np.ndarray:
+        """RSI of the close prices"""
+        return self.get(market_data, 'rsi', period)
+
+    def get(self, market_data: BarBuffer, indicator: str, *params):
+        """Values of an indicator over all bars of the series"""
+        with self._lock:
+            return self._get(market_data, indicator, params).values
+
+    def updater(self, market_data: BarBuffer, indicator: str, *params):
+        """Incremental updater of an indicator positioned at the latest bar of
+        the series, warmed up over the bars if not created yet"""
+        with self._lock:
+            entry = self._get(market_data, indicator, params)
+            if entry.updater is None:
+                entry.updater = self._warm_up(indicator, params, market_data.column('close'))
+            return entry.updater
+
+    def restore(self, market_data: BarBuffer, indicator: str, params: tuple, state: dict):
+        """Cache an indicator of the series with an updater restored from a
+        state saved by updater(...).get_state(), e.g. after a warm restart"""
+        self._check(indicator)
+        compute, create, _ = INDICATORS[indicator]
+
+        with self._lock:
+            close = market_data.column('close')
+            updater = create(*params)
+            updater.set_state(state)
+            values = self._freeze(compute(close, *params))
+            self._store((market_data.series_id, indicator, tuple(params)),
+                        _Entry(market_data.version, values, updater, self._last_close(close)))
+            self._track(market_data)
+
+    def invalidate(self, series_id: int):
+        """Drop all entries of a series"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == series_id]:
+                self.nbytes -= self._entries.pop(key).nbytes
+            self._tracked.discard(series_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def _get(self, market_data, indicator: str, params: tuple) -> _Entry:
+        self._check(indicator)
+        compute = INDICATORS[indicator][0]
+
+        key = (market_data.series_id, indicator, params)
+        version = market_data.version
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == version:
+            self._entries.move_to_end(key)
+            self._count('hit')
+            return entry
+
+        close = market_data.column('close')
+        appended = version[1] - entry.version[1] if entry is not None else -1
+        if entry is not None and entry.version[0] == version[0] and 0 <= appended < len(close):
+            entry = self._update(entry, indicator, params, close, appended)
+            self._count('updated')
+        else:
+            entry = _Entry(None, self._freeze(compute(close, *params)), None, self._last_close(close))
+            self._count('miss')
+
+        entry.version = version
+        self._store(key, entry)
+        self._track(market_data)
+        return entry
+
+    def _update(self, entry: _Entry, indicator: str, params: tuple, close: np.ndarray, appended: int) -> _Entry:
+        """Entry of the series after bars were appended to it and its latest
+        bar possibly revised. Only the values from the previous latest bar on
+        are recomputed."""
+        output = INDICATORS[indicator][2]
+        last = len(close) - appended - 1
+
+        updater = entry.updater
+        if updater is None:
+            updater = self._warm_up(indicator, params, close[:last + 1])
+        elif close[last] != entry.last_close:
+            updater.revise(float(close[last]))
+
+        outputs = [output(updater)]
+        for value in close[last + 1:].tolist():
+            updater.update(value)
+            outputs.append(output(updater))
+
+        if isinstance(entry.values, dict):
+            values = {name: self._extend(array, last, [row[name] for row in outputs])
+                      for name, array in entry.values.items()}
+        else:
+            values = self._extend(entry.values, last, outputs)
+        return _Entry(None, values, updater, self._last_close(close))
+
+    @staticmethod
+    def _extend(previous: np.ndarray, last: int, outputs: list) -> np.ndarray:
+        """Values of the bars before the previous latest bar, still held by the
+        series, followed by the recomputed ones"""
+        values = np.empty(last + len(outputs))
+        values[:last] = previous[len(previous) - 1 - last:len(previous) - 1]
+        values[last:] = outputs
+        return _read_only(values)
+
+    @staticmethod
+    def _warm_up(indicator: str, params: tuple, close: np.ndarray):
+        updater = INDICATORS[indicator][1](*params)
+        for value in close.tolist():
+            updater.update(value)
+        return updater
+
+    @staticmethod
+    def _freeze(values):
+        if isinstance(values, dict):
+            return {name: _read_only(array) for name, array in values.items()}
+        return _read_only(values)
+
+    @staticmethod
+    def _last_close(close: np.ndarray):
+        return float(close[-1]) if len(close) else None
+
+    @staticmethod
+    def _check(indicator: str):
+        if indicator not in INDICATORS:
+            raise ValueError(f"Invalid indicator: {indicator}. Available indicators: {list(INDICATORS)}")
+
+    def _store(self, key, entry: _Entry):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.nbytes -= previous.nbytes
+
+        self._entries[key] = entry
+        self.nbytes += entry.nbytes
+
+        # The entry just stored is kept even if it alone exceeds the budget
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+
+        metrics.gauge('indicator_cache_bytes', 'Size of the arrays in the indicator cache').set(self.nbytes)
+
+    def _track(self, market_data):
+        if market_data.series_id not in self._tracked:
+            self._tracked.add(market_data.series_id)
+            weakref.finalize(market_data, self.invalidate, market_data.series_id)
+
+    def _count(self, result: str):
+        if result == 'hit':
+            self.hits += 1
+        elif result == 'updated':
+            self.updates += 1
+        else:
+            self.misses += 1
+        metrics.counter('indicator_cache_requests_total', 'Indicator cache requests by result',
+                        labels={'result': result}).inc()
+
+
+indicator_cache = IndicatorCache()
+
+
+class CachedIndicators:
+    """Indicators over all bars of a BarBuffer served from an IndicatorCache.
+    Strategies evaluated on the buffer share the cached arrays, which are
+    updated as bars are added. Bars of larger bar sizes are resampled
+    incrementally from the same buffer."""
+
+    def __init__(self, market_data: BarBuffer, cache: IndicatorCache = None):
+        self.market_data = market_data
+        self.cache = indicator_cache if cache is None else cache
+        self._requested = set()
+        self._timeframes = None
+
+    def __len__(self):
+        return len(self.market_data)
+
+    @property
+    def data(self):
+        """The bars as a DataFrame, for strategies without array support"""
+        return self.market_data.to_frame()
+
+    @property
+    def computed(self):
+        """Number of distinct indicators requested through this view"""
+        return len(self._requested)
+
+    def close(self) -> np.ndarray:
+        """Zero-copy view of the close prices"""
+        return self.market_data.column('close')
+
+    def bollinger_bands(self, period, std) -> dict:
+        """Bollinger Bands ('middle', 'upper', 'lower') of the close prices"""
+        self._requested.add(('bollinger_bands', period, std))
+        return self.cache.bollinger_bands(self.market_data, period, std)
+
+    def rsi(self, period) -> np.ndarray:
+        """RSI of the close prices"""
+        self._requested.add(('rsi', period))
+        return self.cache.rsi(self.market_data, period)
+
+    def timeframe(self, bar_size) -> BarBuffer:
+        """Bars of a larger bar size, e.g. '15min', including the bar being formed"""
+        if self._timeframes is None:
+            self._timeframes = MultiTimeframeBars(self.market_data)
+        return self._timeframes.bars(bar_size)
+
+    def get_state(self) -> dict:
+        """Updater states of the requested indicators at the latest bar, used
+        to snapshot the indicators with the buffer"""
+        if self.market_data.empty:
+            return {'last_timestamp': None, 'last_close': None, 'indicators': []}
+
+        return {
+            'last_timestamp': int(self.market_data.timestamps(1)[0]),
+            'last_close': float(self.market_data.column('close', 1)[0]),
+            'indicators': [
+                {'key': list(key), 'state': self.cache.updater(self.market_data, key[0], *key[1:]).get_state()}
+                for key in sorted(self._requested)
+            ],
+        }
+
+    def set_state(self, state: dict):
+        """Restore indicators saved by get_state after the bars were restored.
+        The indicators are recomputed from the bars instead if the saved last
+        bar is not the latest bar of the buffer."""
+        keys = [tuple(saved['key']) for saved in state['indicators']]
+        self._requested.update(keys)
+
+        if self.market_data.empty or state['last_timestamp'] != int(self.market_data.timestamps(1)[0]) \
+                or state['last_close'] != float(self.market_data.column('close', 1)[0]):
+            return
+
+        for key, saved in zip(keys, state['indicators']):
+            self.cache.restore(self.market_data, key[0], key[1:], saved['state'])
@@ -0,0 +1,209 @@
+import math
+import numpy as np
+
+
+class RollingBollinger:
+    """Bollinger Bands updated in O(1) per bar.
+
+    Keeps the closes of the current window in a ring buffer together with
+    their rolling sum and sum of squares. Sums are taken over the closes minus
+    a reference price to avoid cancellation in the variance, and are
+    recomputed from the window every `recompute_every` updates to bound
+    floating point drift. Outputs match ta.volatility.BollingerBands
+    (population standard deviation, NaN until `period` bars were seen).
+    """
+
+    def __init__(self, period: int, std: float, recompute_every: int = 1024):
+        if period < 1:
+            raise ValueError("Bollinger period must be at least 1")
+
+        self.period = period
+        self.std = std
+        self.recompute_every = recompute_every
+
+        self._window = np.zeros(period, dtype=np.float64)
+        self._count = 0
+        self._pos = 0
+        self._shift = 0.0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._since_recompute = 0
+
+        # Latest two outputs, the last element is the latest bar
+        self.middle = np.full(2, np.nan)
+        self.upper = np.full(2, np.nan)
+        self.lower = np.full(2, np.nan)
+
+    def update(self, close: float):
+        """Add a new bar"""
+        if self._count == 0:
+            self._shift = close
+
+        x = close - self._shift
+        if self._count >= self.period:
+            old = self._window[self._pos]
+            self._sum -= old
+            self._sumsq -= old * old
+
+        self._window[self._pos] = x
+        self._sum += x
+        self._sumsq += x * x
+        self._pos = (self._pos + 1) % self.period
+        self._count += 1
+
+        self._since_recompute += 1
+        if self._since_recompute >= self.recompute_every:
+            self._recompute()
+
+        for output in (self.middle, self.upper, self.lower):
+            output[0] = output[1]
+        self._set_outputs()
+
+    def revise(self, close: float):
+        """Replace the close of the latest bar"""
+        if self._count == 0:
+            raise IndexError("Cannot revise the last bar before any bar was added")
+
+        last = (self._pos - 1) % self.period
+        old = self._window[last]
+        x = close - self._shift
+
+        self._window[last] = x
+        self._sum += x - old
+        self._sumsq += x * x - old * old
+        self._set_outputs()
+
+    def _set_outputs(self):
+        if self._count < self.period:
+            return
+
+        n = self.period
+        mean = self._sum / n
+        variance = max(self._sumsq / n - mean * mean, 0.0)
+        deviation = self.std * math.sqrt(variance)
+
+        middle = mean + self._shift
+        self.middle[1] = middle
+        self.upper[1] = middle + deviation
+        self.lower[1] = middle - deviation
+
+    def _recompute(self):
+        """Recompute the sums exactly, re-centred on the current window mean"""
+        n = min(self._count, self.period)
+        values = self._window[:n] if self._count < self.period else self._window
+
+        centre = values.mean()
+        values -= centre
+        self._shift += centre
+        self._sum = float(values.sum())
+        self._sumsq = float(np.dot(values, values))
+        self._since_recompute = 0
+
+    def get_state(self) -> dict:
+        return {
+            'window': self._window.copy(),
+            'outputs': np.stack([self.middle, self.upper, self.lower]),
+            'count': self._count,
+            'pos': self._pos,
+            'shift': self._shift,
+            'sum': self._sum,
+            'sumsq': self._sumsq,
+            'since_recompute': self._since_recompute,
+        }
+
+    def set_state(self, state: dict):
+        window = np.asarray(state['window'], dtype=np.float64)
+        if len(window) != self.period:
+            raise ValueError(f"Bollinger state has period {len(window)}, expected {self.period}")
+
+        self._window = window.copy()
+        self.middle, self.upper, self.lower = (row.copy() for row in np.asarray(state['outputs'], dtype=np.float64))
+        self._count = int(state['count'])
+        self._pos = int(state['pos'])
+        self._shift = float(state['shift'])
+        self._sum = float(state['sum'])
+        self._sumsq = float(state['sumsq'])
+        self._since_recompute = int(state['since_recompute'])
+
+
+class WilderRSI:
+    """RSI with Wilder-smoothed average gains and losses, updated in O(1) per bar.
+
+    The state before the latest bar is kept so a revised bar can be applied
+    again. Outputs match ta.momentum.RSIIndicator: the first bar counts as a
+    zero change, averages follow y = (1 - 1/period) * y + 1/period * x and the
+    RSI is NaN until `period` bars were seen and 100 when there are no losses.
+    """
+
+    def __init__(self, period: int):
+        if period < 1:
+            raise ValueError("RSI period must be at least 1")
+
+        self.period = period
+        self.alpha = 1.0 / period
+
+        self._count = 0
+        self._prev_close = np.nan
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+        self._before_last = None
+
+        # Latest two outputs, the last element is the latest bar
+        self.values = np.full(2, np.nan)
+
+    def update(self, close: float):
+        """Add a new bar"""
+        self._before_last = (self._count, self._prev_close, self._avg_gain, self._avg_loss)
+        self._apply(close)
+        self.values[0] = self.values[1]
+        self.values[1] = self._value()
+
+    def revise(self, close: float):
+        """Replace the close of the latest bar"""
+        if self._before_last is None:
+            raise IndexError("Cannot revise the last bar before any bar was added")
+
+        self._count, self._prev_close, self._avg_gain, self._avg_loss = self._before_last
+        self._apply(close)
+        self.values[1] = self._value()
+
+    def _apply(self, close: float):
+        if self._count == 0:
+            self._avg_gain = 0.0
+            self._avg_loss = 0.0
+        else:
+            change = close - self._prev_close
+            gain = change if change > 0 else 0.0
+            loss = -change if change < 0 else 0.0
+            self._avg_gain += self.alpha * (gain - self._avg_gain)
+            self._avg_loss += self.alpha * (loss - self._avg_loss)
+
+        self._prev_close = close
+        self._count += 1
+
+    def _value(self) -> float:
+        if self._count < self.period:
+            return np.nan
+        if self._avg_loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + self._avg_gain / self._avg_loss)
+
+    def get_state(self) -> dict:
+        return {
+            'values': self.values.copy(),
+            'count': self._count,
+            'prev_close': self._prev_close,
+            'avg_gain': self._avg_gain,
+            'avg_loss': self._avg_loss,
+            'before_last': list(self._before_last) if self._before_last is not None else None,
+        }
+
+    def set_state(self, state: dict):
+        self.values = np.asarray(state['values'], dtype=np.float64).copy()
+        self._count = int(state['count'])
+        self._prev_close = float(state['prev_close'])
+        self._avg_gain = float(state['avg_gain'])
+        self._avg_loss = float(state['avg_loss'])
+        before_last = state['before_last']
+        self._before_last = None if before_last is None else (
+            int(before_last[0]), float(before_last[1]), float(before_last[2]), float(before_last[3]))
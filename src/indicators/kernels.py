@@ -0,0 +1,163 @@
+"""NumPy kernels for batch indicator computation.
+
+The kernels operate on contiguous float64 arrays and return float64 arrays of
+the same length, with NaN where the indicator is not yet defined. They match
+the ta library (ta.volatility.BollingerBands, ta.momentum.RSIIndicator with
+fillna=False) and are meant for research and backtests over long histories.
+Inputs are expected to be free of NaNs.
+"""
+import math
+import numpy as np
+
+
+# Rows processed per block by the rolling window kernel
+_ROLLING_BLOCK = 1 << 14
+
+# Largest growth of the scaling factors of the blocked EWM recurrence
+_MAX_EWM_SCALE = 1e150
+
+
+def _as_float_array(values) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def rolling_mean_std(values, window: int):
+    """Rolling mean and population standard deviation over `window` values.
+
+    The array is processed in blocks. Each block is centred on its own mean
+    before the cumulative sums of values and squares are taken, which keeps
+    the sums small and the variance free of cancellation on long histories.
+    """
+    x = _as_float_array(values)
+    if window < 1:
+        raise ValueError("Window must be at least 1")
+
+    n = len(x)
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    if n < window:
+        return mean, std
+
+    for first in range(window - 1, n, _ROLLING_BLOCK):
+        last = min(first + _ROLLING_BLOCK, n)
+        block = x[first - window + 1:last]
+
+        centre = block.mean()
+        centred = block - centre
+
+        sums = np.empty(len(block) + 1)
+        sums[0] = 0.0
+        np.cumsum(centred, out=sums[1:])
+        squares = np.empty(len(block) + 1)
+        squares[0] = 0.0
+        np.square(centred, out=centred)
+        np.cumsum(centred, out=squares[1:])
+
+        # Window sums divided by the window length, written into the outputs
+        block_mean = mean[first:last]
+        np.subtract(sums[window:], sums[:-window], out=block_mean)
+        block_mean /= window
+        variance = std[first:last]
+        np.subtract(squares[window:], squares[:-window], out=variance)
+        variance /= window
+        variance -= block_mean * block_mean
+        np.maximum(variance, 0.0, out=variance)
+        np.sqrt(variance, out=variance)
+        block_mean += centre
+
+    return mean, std
+
+
+def bollinger_bands(close, window: int = 20, window_dev: float = 2):
+    """Bollinger Bands (middle, upper, lower) of the close prices"""
+    middle, std = rolling_mean_std(close, window)
+    deviation = window_dev * std
+    return middle, middle + deviation, middle - deviation
+
+
+def ewm(values, alpha: float) -> np.ndarray:
+    """Exponentially weighted mean y[t] = (1 - alpha) * y[t-1] + alpha * x[t],
+    starting at y[0] = x[0] (pandas ewm with adjust=False).
+
+    The recurrence is solved in closed form within blocks: scaling x[k] by
+    (1 - alpha)^-k turns it into a cumulative sum. Blocks are sized so the
+    scaling factors cannot overflow and the last value of each block carries
+    into the next.
+    """
+    x = _as_float_array(values)
+    n = len(x)
+    out = np.empty(n)
+    if n == 0:
+        return out
+    if not 0 < alpha <= 1:
+        raise ValueError("Alpha must be in (0, 1]")
+
+    out[0] = x[0]
+    if alpha == 1:
+        out[:] = x
+        return out
+
+    decay = 1.0 - alpha
+    block = max(1, min(n, int(math.log(_MAX_EWM_SCALE) / -math.log(decay))))
+
+    steps = np.arange(1, block + 1, dtype=np.float64)
+    growth = alpha * decay ** -steps  # alpha * (1 - alpha)^-k
+    shrink = decay ** steps           # (1 - alpha)^k
+
+    carry = x[0]
+    for first in range(1, n, block):
+        last = min(first + block, n)
+        m = last - first
+        y = out[first:last]
+        np.multiply(x[first:last], growth[:m], out=y)
+        np.cumsum(y, out=y)
+        y += carry
+        y *= shrink[:m]
+        carry = y[-1]
+
+    return out
+
+
+def wilder_averages(close, window: int):
+    """Wilder-smoothed average gains and losses (alpha = 1 / window) of the
+    close prices, counting the first bar as a zero change"""
+    x = _as_float_array(close)
+    if window < 1:
+        raise ValueError("Window must be at least 1")
+
+    change = np.zeros(len(x))
+    if len(x) > 1:
+        np.subtract(x[1:], x[:-1], out=change[1:])
+
+    avg_gain = ewm(np.maximum(change, 0.0), 1.0 / window)
+    np.negative(change, out=change)
+    np.maximum(change, 0.0, out=change)
+    avg_loss = ewm(change, 1.0 / window)
+    return avg_gain, avg_loss
+
+
+def rsi_from_averages(avg_gain: np.ndarray, avg_loss: np.ndarray, window: int) -> np.ndarray:
+    """RSI from Wilder averages. Both arrays are overwritten, the result is
+    returned in avg_gain."""
+    no_loss = avg_loss == 0
+
+    # 100 - 100 / (1 + gain / loss) == 100 * gain / (gain + loss)
+    values = avg_gain
+    total = avg_loss
+    total += avg_gain
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(values, total, out=values)
+    values *= 100.0
+    values[no_loss] = 100.0
+    values[:window - 1] = np.nan
+    return values
+
+
+def rsi(close, window: int = 14) -> np.ndarray:
+    """Relative Strength Index with Wilder smoothing (alpha = 1 / window).
+
+    The first bar counts as a zero change, values before `window` bars are
+    NaN and the RSI is 100 when the average loss is zero.
+    """
+    avg_gain, avg_loss = wilder_averages(close, window)
+    return rsi_from_averages(avg_gain, avg_loss, window)
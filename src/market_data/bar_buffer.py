@@ -0,0 +1,235 @@
+import itertools
+import numpy as np
+import pandas as pd
+
+
+BAR_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+BAR_DTYPES = {
+    'timestamp': np.int64,      # epoch nanoseconds (UTC)
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.float32,
+}
+
+
+_series_ids = itertools.count(1)
+
+
+def next_series_id() -> int:
+    """Process-unique id of a series of bars, e.g. of a BarBuffer"""
+    return next(_series_ids)
+
+
+class BarBuffer:
+    """Fixed-capacity, append-only buffer of OHLCV bars.
+
+    Bars are stored column-wise in preallocated NumPy arrays of twice the
+    capacity. Appends write past the last bar and, once the end of the storage
+    is reached, the most recent ``capacity`` bars are moved back to the front.
+    This keeps appends amortised O(1), keeps memory flat for the lifetime of
+    the process and guarantees that any window of the latest bars is a
+    contiguous, zero-copy view.
+
+    Each buffer has a process-unique series_id and a version that changes
+    whenever the bars change, so derived data can be cached per version.
+    """
+
+    def __init__(self, capacity: int, timezone: str = 'UTC'):
+        if capacity <= 1:
+            raise ValueError("Bar buffer capacity must be greater than 1")
+
+        self.capacity = capacity
+        self.timezone = timezone
+
+        self._storage = {
+            name: np.zeros(2 * capacity, dtype=dtype) for name, dtype in BAR_DTYPES.items()
+        }
+        self._start = 0
+        self._end = 0
+
+        self.series_id = next_series_id()
+        self._generation = 0
+        self._appended = 0
+        self._revision = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def empty(self) -> bool:
+        return self._end == self._start
+
+    @property
+    def version(self) -> tuple:
+        """(generation, bars appended, last bar revision). Only the last element
+        changes when the latest bar is revised; the generation changes when the
+        buffer is cleared or restored."""
+        return (self._generation, self._appended, self._revision)
+
+    @property
+    def last_timestamp(self) -> pd.Timestamp:
+        """Timestamp of the latest stored bar, or None if the buffer is empty"""
+        if self.empty:
+            return None
+        return pd.Timestamp(int(self._storage['timestamp'][self._end - 1]), tz='UTC').tz_convert(self.timezone)
+
+    def append(self, timestamp, open_, high, low, close, volume):
+        """Append a bar after the latest stored bar"""
+        ts = self._to_epoch_ns(timestamp)
+
+        if not self.empty and ts <= self._storage['timestamp'][self._end - 1]:
+            raise ValueError(f"Bar timestamp {timestamp} is not after the latest bar {self.last_timestamp}")
+
+        if self._end == 2 * self.capacity:
+            self._compact()
+        elif len(self) == self.capacity:
+            self._start += 1
+
+        self._write(self._end, ts, open_, high, low, close, volume)
+        self._end += 1
+        self._appended += 1
+        self._revision = 0
+
+    def replace_last(self, timestamp, open_, high, low, close, volume):
+        """Overwrite the latest bar in place, e.g. when the forming bar is revised"""
+        if self.empty:
+            raise IndexError("Cannot replace the last bar of an empty buffer")
+
+        ts = self._to_epoch_ns(timestamp)
+        if ts != self._storage['timestamp'][self._end - 1]:
+            raise ValueError(f"Bar timestamp {timestamp} does not match the latest bar {self.last_timestamp}")
+
+        self._write(self._end - 1, ts, open_, high, low, close, volume)
+        self._revision += 1
+
+    def update(self, timestamp, open_, high, low, close, volume) -> bool:
+        """Append a new bar or revise the latest one. Bars older than the latest
+        stored bar are ignored. Returns True if a new bar was appended."""
+        ts = self._to_epoch_ns(timestamp)
+
+        if self.empty or ts > self._storage['timestamp'][self._end - 1]:
+            self.append(ts, open_, high, low, close, volume)
+            return True
+
+        if ts == self._storage['timestamp'][self._end - 1]:
+            self._write(self._end - 1, ts, open_, high, low, close, volume)
+            self._revision += 1
+
+        return False
+
+    def extend(self, bars: pd.DataFrame) -> int:
+        """Merge a sorted DataFrame of bars (datetime index, OHLCV columns).
+
+        Bars before the latest stored bar are skipped, the bar matching the
+        latest stored bar replaces it and later bars are appended.
+
+        Returns:
+            int: The number of bars appended
+        """
+        if bars.empty:
+            return 0
+
+        timestamps = self._index_to_epoch_ns(bars.index)
+        values = {name: bars[name].to_numpy() for name in BAR_COLUMNS}
+
+        start = 0
+        if not self.empty:
+            start = int(np.searchsorted(timestamps, self._storage['timestamp'][self._end - 1], side='left'))
+
+        appended = 0
+        for i in range(start, len(timestamps)):
+            appended += self.update(
+                timestamps[i],
+                values['open'][i],
+                values['high'][i],
+                values['low'][i],
+                values['close'][i],
+                values['volume'][i])
+
+        return appended
+
+    def column(self, name: str, n: int = None) -> np.ndarray:
+        """Zero-copy view of a column over the latest n bars (all bars if n is None)"""
+        start = self._start if n is None else max(self._start, self._end - n)
+        return self._storage[name][start:self._end]
+
+    def timestamps(self, n: int = None) -> np.ndarray:
+        """Zero-copy view of the epoch nanosecond timestamps of the latest n bars"""
+        return self.column('timestamp', n)
+
+    def window(self, n: int = None) -> dict:
+        """Zero-copy views of all columns over the latest n bars"""
+        return {name: self.column(name, n) for name in BAR_DTYPES}
+
+    def to_frame(self, n: int = None) -> pd.DataFrame:
+        """Copy the latest n bars into a DataFrame indexed by datetime"""
+        index = pd.DatetimeIndex(self.timestamps(n).copy(), tz='UTC').tz_convert(self.timezone)
+        index.name = 'datetime'
+
+        return pd.DataFrame(
+            {name: self.column(name, n).copy() for name in BAR_COLUMNS},
+            index=index)
+
+    def clear(self):
+        self._start = 0
+        self._end = 0
+        self._generation += 1
+
+    def get_state(self) -> dict:
+        """Copies of all columns, used to snapshot the buffer"""
+        return {name: array.copy() for name, array in self.window().items()}
+
+    def set_state(self, state: dict):
+        """Replace the buffer contents with columns saved by get_state. Only 
+        the latest capacity bars are kept."""
+        timestamps = np.asarray(state['timestamp'], dtype=BAR_DTYPES['timestamp'])
+        if len(timestamps) > 1 and np.any(np.diff(timestamps) <= 0):
+            raise ValueError("Bar timestamps must be strictly increasing")
+
+        n = min(len(timestamps), self.capacity)
+        for name, dtype in BAR_DTYPES.items():
+            column = np.asarray(state[name], dtype=dtype)
+            if len(column) != len(timestamps):
+                raise ValueError(f"Column {name} has {len(column)} bars, expected {len(timestamps)}")
+            self._storage[name][:n] = column[len(column) - n:]
+
+        self._start = 0
+        self._end = n
+        self._generation += 1
+
+    def _write(self, i, ts, open_, high, low, close, volume):
+        storage = self._storage
+        storage['timestamp'][i] = ts
+        storage['open'][i] = open_
+        storage['high'][i] = high
+        storage['low'][i] = low
+        storage['close'][i] = close
+        storage['volume'][i] = volume
+
+    def _compact(self):
+        """Move the latest capacity - 1 bars to the front of the storage so the
+        next append has room, dropping the oldest bar."""
+        keep = self.capacity - 1
+        for array in self._storage.values():
+            array[:keep] = array[self._end - keep:self._end]
+        self._start = 0
+        self._end = keep
+
+    @staticmethod
+    def _to_epoch_ns(timestamp) -> int:
+        if isinstance(timestamp, (int, np.integer)):
+            return int(timestamp)
+        timestamp = pd.Timestamp(timestamp)
+        if timestamp.tzinfo is None:
+            raise ValueError("Bar timestamps must be timezone aware")
+        return timestamp.value
+
+    @staticmethod
+    def _index_to_epoch_ns(index: pd.Index) -> np.ndarray:
+        index = pd.DatetimeIndex(index)
+        if index.tz is None:
+            raise ValueError("Bar timestamps must be timezone aware")
+        return index.tz_convert('UTC').as_unit('ns').asi8
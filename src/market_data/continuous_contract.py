@@ -0,0 +1,201 @@
+import logging
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+from src.api.api_utils import contract_window
+from src.market_data.bar_buffer import BAR_COLUMNS, BAR_DTYPES
+from src.market_data.market_data_store import MarketDataStore, contract_key
+
+
+ADJUSTMENTS = ('difference', 'ratio', 'none')
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+
+
+class ContinuousContract:
+    """Back-adjusted continuous series of a futures symbol, stitched from the
+    per-contract bars of a MarketDataStore.
+
+    Each contract contributes its bars from the roll of the previous contract
+    up to its own roll, at the same roll times get_current_contract uses. At
+    each roll the older bars are shifted by the price difference ('difference')
+    or scaled by the price ratio ('ratio') between the new and the old
+    contract at the last bar before the roll, so the series has no jump at the
+    roll and the bars of the current contract are unadjusted. The prices are
+    compared at the same bar if the new contract has one, otherwise the
+    first open of the new contract is compared with the last close of the old.
+
+    The series is cached. When only the latest contract got new bars they are
+    appended to the cached series, as the latest contract is never adjusted.
+    New contracts or bars of older contracts rebuild the series.
+    """
+
+    def __init__(self, store: MarketDataStore, symbol: str, bar_size, roll_contract_days_before: int,
+                 timezone: str, adjustment: str = 'difference'):
+        """
+        :param store: Store of the per-contract bars
+        :param symbol: Futures symbol, e.g. 'MNQ'
+        :param bar_size: Bar size of the stored bars, part of the storage keys
+        :param roll_contract_days_before: Days before expiry to roll to next contract
+        :param timezone: The timezone of the roll dates
+        :param adjustment: 'difference', 'ratio' or 'none'
+        """
+        if adjustment not in ADJUSTMENTS:
+            raise ValueError(f"Invalid adjustment: {adjustment}. Available adjustments: {list(ADJUSTMENTS)}")
+
+        self.store = store
+        self.symbol = symbol
+        self.bar_size = bar_size
+        self.roll_contract_days_before = roll_contract_days_before
+        self.timezone = timezone
+        self.adjustment = adjustment
+
+        self.contracts = []
+        self.rolls = []
+        self.rebuilds = 0
+        self._columns = None
+        self._signature = None
+
+    def keys(self) -> dict:
+        """Storage keys of the stored contracts of the symbol and bar size,
+        keyed by contract month, oldest first"""
+        keys = {}
+        for key in self.store.contracts():
+            month = key[len(self.symbol) + 1:len(self.symbol) + 7]
+            contract = SimpleNamespace(symbol=self.symbol, lastTradeDateOrContractMonth=month)
+            if month.isdigit() and contract_key(contract, self.bar_size) == key:
+                keys[month] = key
+        return dict(sorted(keys.items()))
+
+    def columns(self) -> dict:
+        """Column arrays of the whole continuous series, keyed by 'timestamp'
+        and the OHLCV column names"""
+        keys = self.keys()
+        signature = tuple((key, self.store.rows(key)) for key in keys.values())
+        cached = self._signature
+
+        if (not signature or cached is None or len(signature) != len(cached)
+                or signature[:-1] != cached[:-1] or signature[-1][0] != cached[-1][0]):
+            self._build(keys)
+        elif signature[-1][1] != cached[-1][1]:
+            self._append_latest(keys)
+        else:
+            self._refresh_last_bar(keys)
+
+        self._signature = signature
+        return self._columns
+
+    def read(self, start=None, end=None) -> dict:
+        """Views of the continuous series between start and end (inclusive)"""
+        columns = self.columns()
+        timestamps = columns['timestamp']
+        lo = 0 if start is None else int(np.searchsorted(timestamps, pd.Timestamp(start).value, side='left'))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, pd.Timestamp(end).value, side='right'))
+        return {name: values[lo:max(lo, hi)] for name, values in columns.items()}
+
+    def read_frame(self, start=None, end=None) -> pd.DataFrame:
+        """The continuous series between start and end (inclusive) as a DataFrame indexed by datetime"""
+        bars = self.read(start, end)
+
+        index = pd.DatetimeIndex(bars['timestamp'], tz='UTC').tz_convert(self.timezone)
+        index.name = 'datetime'
+
+        return pd.DataFrame({name: bars[name].copy() for name in BAR_COLUMNS}, index=index)
+
+    def _segment(self, month: str, key: str) -> dict:
+        """Stored bars of a contract while it is the current contract"""
+        start, end = contract_window(month, self.roll_contract_days_before, self.timezone)
+        lo, hi = self.store.locate(key, start, end - pd.Timedelta(1))
+        return {name: values[lo:hi] for name, values in self.store.columns(key).items()}
+
+    def _build(self, keys: dict):
+        segments = []
+        for month, key in keys.items():
+            segment = self._segment(month, key)
+            if len(segment['timestamp']) > 0:
+                segments.append((month, key, segment))
+
+        self.contracts = [month for month, _, _ in segments]
+        self.rolls = []
+        self.rebuilds += 1
+
+        if not segments:
+            self._columns = {name: np.empty(0, dtype=dtype) for name, dtype in BAR_DTYPES.items()}
+            return
+
+        # Adjustment of the bars before each roll relative to the contract after it
+        adjustments = []
+        for (old_month, _, old), (new_month, new_key, new) in zip(segments, segments[1:]):
+            timestamp = old['timestamp'][-1]
+            new_timestamps = self.store.columns(new_key)['timestamp']
+            idx = int(np.searchsorted(new_timestamps, timestamp, side='right')) - 1
+
+            old_price = float(old['close'][-1])
+            if idx >= 0 and new_timestamps[idx] == timestamp:
+                new_price = float(self.store.columns(new_key)['close'][idx])
+            else:
+                new_price = float(new['open'][0])
+
+            if self.adjustment == 'ratio':
+                adjustment = new_price / old_price
+            elif self.adjustment == 'difference':
+                adjustment = new_price - old_price
+            else:
+                adjustment = 0.0
+            adjustments.append(adjustment)
+            self.rolls.append({'time': int(new['timestamp'][0]), 'from': old_month, 'to': new_month,
+                               'adjustment': adjustment})
+
+        # Adjustments accumulate backwards from the latest contract
+        if self.adjustment == 'ratio':
+            cumulative = np.append(np.cumprod(adjustments[::-1])[::-1], 1.0)
+        else:
+            cumulative = np.append(np.cumsum(adjustments[::-1])[::-1], 0.0)
+
+        columns = {}
+        for name, dtype in BAR_DTYPES.items():
+            parts = []
+            for (_, _, segment), factor in zip(segments, cumulative):
+                values = np.asarray(segment[name], dtype=dtype)
+                if name in PRICE_COLUMNS:
+                    values = values * factor if self.adjustment == 'ratio' else values + factor
+                parts.append(values)
+            columns[name] = np.concatenate(parts)
+
+        self._columns = columns
+        logging.debug("ContinuousContract: Built %s %s bars from %s contract(s), %s roll(s)",
+                      len(columns['timestamp']), self.symbol, len(segments), len(self.rolls))
+
+    def _append_latest(self, keys: dict):
+        """Append the new bars of the latest contract, which is not adjusted"""
+        month, key = next(reversed(keys.items()))
+        segment = self._segment(month, key)
+        if not self.contracts or self.contracts[-1] != month:
+            self._build(keys)
+            return
+
+        last = self._columns['timestamp'][-1]
+        start = int(np.searchsorted(segment['timestamp'], last, side='left'))
+        if start == len(segment['timestamp']) or segment['timestamp'][start] != last:
+            self._build(keys)
+            return
+
+        self._columns = {
+            name: np.concatenate((values[:-1], np.asarray(segment[name][start:], dtype=values.dtype)))
+            for name, values in self._columns.items()
+        }
+
+    def _refresh_last_bar(self, keys: dict):
+        """Copy the latest bar again, it may have been revised in place"""
+        if not self.contracts:
+            return
+
+        month, key = next(reversed(keys.items()))
+        if self.contracts[-1] != month:
+            return
+
+        columns = self.store.columns(key)
+        if len(columns['timestamp']) and columns['timestamp'][-1] == self._columns['timestamp'][-1]:
+            for name, values in self._columns.items():
+                values[-1] = columns[name][-1]
+
@@ -0,0 +1,224 @@
+import functools
+import logging
+import numpy as np
+import pandas as pd
+from src.market_data.bar_buffer import BarBuffer
+from src.monitoring.metrics import metrics
+from src.utilities.utils import us_holidays
+
+
+NS_PER_MINUTE = 60 * 10**9
+NS_PER_DAY = 24 * 60 * NS_PER_MINUTE
+MINUTES_PER_WEEK = 7 * 24 * 60
+
+# CME Globex equity index futures trade from Sunday 17:00 to Friday 16:00
+# Central time, with a daily break from 16:00 to 17:00
+CME_TIMEZONE = 'US/Central'
+CME_SESSION_OPEN = 17 * 60
+CME_SESSION_CLOSE = 16 * 60
+
+QUALITY_CHECKS = ('unsorted', 'duplicate', 'invalid', 'zero_volume', 'outlier', 'gap', 'missing_bars')
+
+
+@functools.lru_cache(maxsize=None)
+def _open_minutes_before() -> np.ndarray:
+    """Number of CME session minutes before each minute of the week, the
+    week starting Monday 00:00 Central time"""
+    minute = np.arange(MINUTES_PER_WEEK)
+    weekday, minute_of_day = np.divmod(minute, 24 * 60)
+
+    in_break = (minute_of_day >= CME_SESSION_CLOSE) & (minute_of_day < CME_SESSION_OPEN)
+    is_open = np.where(weekday < 4, ~in_break, False)
+    is_open |= (weekday == 4) & (minute_of_day < CME_SESSION_CLOSE)
+    is_open |= (weekday == 6) & (minute_of_day >= CME_SESSION_OPEN)
+
+    return np.concatenate(([0], np.cumsum(is_open)))
+
+
+def session_minutes(timestamps: np.ndarray) -> np.ndarray:
+    """Number of CME session minutes from a fixed origin up to each epoch
+    nanosecond timestamp. The difference between two timestamps is the
+    session time between them, without the daily breaks and weekends."""
+    wall = pd.DatetimeIndex(timestamps, tz='UTC').tz_convert(CME_TIMEZONE).tz_localize(None).asi8
+    minutes = wall // NS_PER_MINUTE
+
+    # 1970-01-01 was a Thursday, shift so that weeks start on Monday
+    week, minute_of_week = np.divmod(minutes + 3 * 24 * 60, MINUTES_PER_WEEK)
+    before = _open_minutes_before()
+    return week * before[-1] + before[minute_of_week]
+
+
+class QualityReport:
+    """Outcome of the checks of one batch of bars: the cleaned bars, the
+    number of bars failing each check and the gaps in the expected bar grid"""
+
+    def __init__(self, bars: pd.DataFrame, counts: dict, gaps: list):
+        self.bars = bars
+        self.counts = counts
+        self.gaps = gaps
+
+    @property
+    def clean(self) -> bool:
+        return not any(self.counts.values())
+
+
+class DataQuality:
+    """Vectorized checks of the bars returned by historical data requests.
+
+    Each batch is sorted and de-duplicated (the latest copy of a bar wins),
+    bars with missing, non-positive or inconsistent prices are dropped and
+    zero-volume bars are counted. Single-bar spikes are dropped: bars whose
+    close jumps away and straight back, both moves being more than
+    z_threshold standard deviations of the recent 1-bar log returns. Bars
+    expected on the CME session grid but missing, from the last bar already
+    held on, are reported as gaps so they can be requested again.
+
+    The number of bars failing each check is exported as a counter per
+    ticker and check.
+    """
+
+    def __init__(self, ticker: str, bar_size, z_threshold: float = 10.0, history: int = 1000,
+                 min_history: int = 30):
+        """
+        :param ticker: Instrument of the bars, used as metrics label
+        :param bar_size: Bar size (Period) of the checked bars
+        :param z_threshold: Return z-score of both moves of a spike
+        :param history: Recent returns kept to estimate their standard deviation
+        :param min_history: Returns required before spikes are detected
+        """
+        self.ticker = ticker
+        self.z_threshold = z_threshold
+        self.history = history
+        self.min_history = min_history
+
+        bar_ns = bar_size.to_timedelta().value
+        # The session grid is only checked for minute bars dividing a day
+        self.bar_minutes = bar_ns // NS_PER_MINUTE if bar_ns % NS_PER_MINUTE == 0 and NS_PER_DAY % bar_ns == 0 else None
+
+        self.counts = {check: 0 for check in QUALITY_CHECKS}
+        self._returns = np.empty(0, dtype=np.float64)
+        self._counters = {
+            check: metrics.counter('market_data_quality_issues_total', 'Bars failing a market data quality check',
+                                   labels={'ticker': ticker, 'check': check})
+            for check in QUALITY_CHECKS
+        }
+
+    def check(self, bars: pd.DataFrame, last_timestamp: pd.Timestamp = None, last_close: float = None) -> QualityReport:
+        """Check a batch of bars.
+
+        Args:
+            bars: Bars indexed by datetime, as returned by get_historical_data
+            last_timestamp: Latest bar already held, gaps are only reported after it
+            last_close: Close of that bar, the reference of the first return
+
+        Returns:
+            QualityReport: The cleaned bars, the issue counts and the gaps as
+                (last bar before, first bar after, missing bars) timestamps
+        """
+        counts = dict.fromkeys(QUALITY_CHECKS, 0)
+        if bars.empty:
+            return QualityReport(bars, counts, [])
+
+        timestamps = BarBuffer._index_to_epoch_ns(bars.index)
+        steps = np.diff(timestamps)
+        counts['unsorted'] = int(np.count_nonzero(steps < 0))
+        if counts['unsorted'] or np.any(steps == 0):
+            order = np.argsort(timestamps, kind='stable')
+            bars, timestamps = bars.iloc[order], timestamps[order]
+            # Keep the latest copy of a bar
+            keep = np.append(timestamps[1:] != timestamps[:-1], True)
+            counts['duplicate'] = int(np.count_nonzero(~keep))
+            bars, timestamps = bars.iloc[keep], timestamps[keep]
+
+        # Bars up to last_timestamp were counted with an earlier batch
+        new = np.ones(len(timestamps), dtype=bool)
+        if last_timestamp is not None:
+            new = timestamps > pd.Timestamp(last_timestamp).value
+
+        prices = bars[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64)
+        valid = np.all(np.isfinite(prices) & (prices > 0), axis=1)
+        valid &= (prices[:, 1] >= np.maximum(prices[:, 0], prices[:, 3]))
+        valid &= (prices[:, 2] <= np.minimum(prices[:, 0], prices[:, 3]))
+        counts['invalid'] = int(np.count_nonzero(~valid & new))
+        counts['zero_volume'] = int(np.count_nonzero((bars['volume'].to_numpy() == 0) & valid & new))
+
+        gaps = self._gaps(timestamps[valid], last_timestamp)
+        counts['gap'] = len(gaps)
+        counts['missing_bars'] = sum(missing for _, _, missing in gaps)
+
+        close = prices[valid, 3]
+        new = new[valid]
+        spikes = np.zeros(len(close), dtype=bool)
+        spikes[new] = self._spikes(close[new], last_close)
+        counts['outlier'] = int(np.count_nonzero(spikes))
+
+        keep = valid.copy()
+        keep[np.flatnonzero(valid)[spikes]] = False
+        if not keep.all():
+            bars = bars.iloc[keep]
+
+        self._remember_returns(close[new & ~spikes], last_close)
+
+        for check, count in counts.items():
+            if count:
+                self.counts[check] += count
+                self._counters[check].inc(count)
+
+        report = QualityReport(bars, counts, gaps)
+        if not report.clean:
+            logging.warning(f"{self.ticker}: Market data quality issues: " +
+                            ", ".join(f"{check}: {count}" for check, count in counts.items() if count))
+        return report
+
+    def _gaps(self, timestamps: np.ndarray, last_timestamp) -> list:
+        """Runs of bars missing from the session grid after last_timestamp"""
+        if self.bar_minutes is None:
+            return []
+
+        if last_timestamp is not None:
+            last = pd.Timestamp(last_timestamp).value
+            timestamps = np.concatenate(([last], timestamps[timestamps > last]))
+        if len(timestamps) < 2:
+            return []
+
+        minutes = session_minutes(timestamps)
+        missing = np.diff(minutes) // self.bar_minutes - 1
+        gaps = []
+        for i in np.flatnonzero(missing > 0).tolist():
+            before = pd.Timestamp(int(timestamps[i]), tz='UTC').tz_convert(CME_TIMEZONE)
+            after = pd.Timestamp(int(timestamps[i + 1]), tz='UTC').tz_convert(CME_TIMEZONE)
+            # Holiday sessions close early or not at all
+            holidays = us_holidays(before.year) | us_holidays(after.year)
+            days = pd.date_range(before.normalize(), after.normalize(), freq='D')
+            if any(day.date() in holidays for day in days):
+                continue
+            gaps.append((before, after, int(missing[i])))
+        return gaps
+
+    def _spikes(self, close: np.ndarray, last_close: float) -> np.ndarray:
+        """Bars whose close jumps away and straight back"""
+        spikes = np.zeros(len(close), dtype=bool)
+        reference = close if last_close is None else np.concatenate(([last_close], close))
+        returns = np.diff(np.log(reference))
+        if len(returns) < 2:
+            return spikes
+
+        history = self._returns if len(self._returns) >= self.min_history else returns
+        if len(history) < self.min_history:
+            return spikes
+        scale = 1.4826 * np.median(np.abs(history - np.median(history)))
+        if scale == 0:
+            return spikes
+
+        z = returns / scale
+        spike = (np.abs(z[:-1]) > self.z_threshold) & (np.abs(z[1:]) > self.z_threshold) & (np.sign(z[:-1]) != np.sign(z[1:]))
+        # Returns are into each bar, one fewer than bars without a last close
+        offset = 0 if last_close is not None else 1
+        spikes[offset:offset + len(spike)] = spike
+        return spikes
+
+    def _remember_returns(self, close: np.ndarray, last_close: float):
+        reference = close if last_close is None else np.concatenate(([last_close], close))
+        if len(reference) < 2:
+            return
+        self._returns = np.concatenate((self._returns, np.diff(np.log(reference))))[-self.history:]
@@ -0,0 +1,275 @@
+import os
+import json
+import logging
+import numpy as np
+import pandas as pd
+from src.market_data.bar_buffer import BAR_COLUMNS, BAR_DTYPES, BarBuffer
+from src.api.api_utils import historical_duration
+from src.utilities.clock import clock
+
+
+INDEX_FILENAME = "index.json"
+FORMAT_VERSION = 2
+NS_PER_DAY = 24 * 60 * 60 * 10**9
+
+
+def contract_key(contract, bar_size=None) -> str:
+    """Storage key of a contract, e.g. 'MNQ_202506', or of its bars of one
+    bar size, e.g. 'MNQ_202506_1min'"""
+    key = f"{contract.symbol}_{contract.lastTradeDateOrContractMonth}"
+    if bar_size is not None:
+        key += "_" + str(bar_size).replace(" ", "")
+    return key
+
+
+class MarketDataStore:
+    """Append-only, on-disk store of OHLCV bars.
+
+    Bars are stored per key, i.e. per contract and bar size, as one raw
+    little-endian binary file per column holding all bars, using the same
+    fixed-width dtypes as the in-memory BarBuffer. Reads memory-map the
+    columns and return zero-copy views: the timestamp column is the time
+    index, a range is located by binary search on it and only the pages of
+    the range are read from disk. A small JSON index per key records the row
+    count and the first/last timestamp and row offset of every trading date
+    (in the configured timezone), so appends only touch the end of the files.
+
+    Layout:
+        {root}/{key}/index.json
+        {root}/{key}/{column}.bin
+    """
+
+    def __init__(self, root: str, timezone: str = 'UTC'):
+        self.root = root
+        self.timezone = timezone
+        self._indexes = {}
+        self._columns = {}
+
+        os.makedirs(self.root, exist_ok=True)
+
+    def contracts(self) -> list:
+        """Keys of all contracts held in the store"""
+        return sorted(
+            entry for entry in os.listdir(self.root)
+            if os.path.exists(os.path.join(self.root, entry, INDEX_FILENAME)))
+
+    def partitions(self, key: str) -> list:
+        """Trading date entries of a key, oldest first"""
+        return list(self._load_index(key)['partitions'])
+
+    def rows(self, key: str) -> int:
+        """Number of stored bars"""
+        return self._load_index(key)['rows']
+
+    def last_timestamp(self, key: str) -> int:
+        """Epoch nanosecond timestamp of the latest stored bar, or None"""
+        partitions = self._load_index(key)['partitions']
+        return partitions[-1]['last'] if partitions else None
+
+    def append(self, key: str, bars: dict) -> int:
+        """Persist the bars that are not stored yet.
+
+        Args:
+            key (str): The contract key
+            bars (dict): Sorted column arrays keyed by 'timestamp' and the OHLCV
+                column names, e.g. BarBuffer.window()
+
+        Bars older than the latest stored bar are skipped and a bar with the
+        same timestamp as the latest stored bar overwrites it in place, so the
+        cost of a write is proportional to the number of new bars.
+
+        Returns:
+            int: The number of bars appended
+        """
+        timestamps = np.asarray(bars['timestamp'], dtype=np.int64)
+        if len(timestamps) == 0:
+            return 0
+
+        index = self._load_index(key)
+        partitions = index['partitions']
+
+        start = 0
+        if partitions:
+            last = partitions[-1]['last']
+            start = int(np.searchsorted(timestamps, last, side='left'))
+
+            if start < len(timestamps) and timestamps[start] == last:
+                self._overwrite_last_row(key, index['rows'], {name: bars[name][start] for name in BAR_COLUMNS})
+                start += 1
+
+        new_timestamps = timestamps[start:]
+        if len(new_timestamps) == 0:
+            return 0
+
+        new_bars = {'timestamp': new_timestamps}
+        for name in BAR_COLUMNS:
+            new_bars[name] = np.ascontiguousarray(bars[name][start:], dtype=BAR_DTYPES[name])
+
+        contract_dir = os.path.join(self.root, key)
+        os.makedirs(contract_dir, exist_ok=True)
+        self._columns.pop(key, None)
+
+        for name, dtype in BAR_DTYPES.items():
+            path = os.path.join(contract_dir, f"{name}.bin")
+            self._truncate(path, index['rows'] * np.dtype(dtype).itemsize)
+            with open(path, 'ab') as f:
+                f.write(new_bars[name].astype(np.dtype(dtype).newbyteorder('<'), copy=False).tobytes())
+
+        local = pd.DatetimeIndex(new_timestamps, tz='UTC').tz_convert(self.timezone)
+        days = local.tz_localize(None).asi8 // NS_PER_DAY
+        run_starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        run_ends = np.r_[run_starts[1:], len(days)]
+        dates = local[run_starts].strftime('%Y%m%d')
+
+        for date, run_start, run_end in zip(dates, run_starts, run_ends):
+            if partitions and partitions[-1]['date'] == date:
+                partition = partitions[-1]
+            else:
+                partition = {'date': date, 'offset': index['rows'] + int(run_start), 'rows': 0,
+                             'first': int(new_timestamps[run_start]), 'last': None}
+                partitions.append(partition)
+
+            partition['rows'] += int(run_end - run_start)
+            partition['last'] = int(new_timestamps[run_end - 1])
+
+        index['rows'] += len(new_timestamps)
+        self._save_index(key, index)
+        logging.debug("MarketDataStore: Appended %s bars to %s", len(new_timestamps), key)
+
+        return len(new_timestamps)
+
+    def append_frame(self, key: str, bars: pd.DataFrame) -> int:
+        """Persist the bars of a DataFrame indexed by datetime, e.g. as returned
+        by IBConnection.get_historical_data"""
+        if bars.empty:
+            return 0
+
+        columns = {'timestamp': BarBuffer._index_to_epoch_ns(bars.index)}
+        columns.update({name: bars[name].to_numpy() for name in BAR_COLUMNS})
+        return self.append(key, columns)
+
+    def ingest(self, api, contract, bar_size, horizon) -> int:
+        """Request the bars missing since the latest stored bar of the contract
+        from IB, up to the horizon, and append them.
+
+        Args:
+            api: IBConnection to request the historical data from
+            contract: The contract
+            bar_size (Period): The bar size, part of the storage key
+            horizon (Period): The longest history requested
+
+        Returns:
+            int: The number of bars appended
+        """
+        key = contract_key(contract, bar_size)
+        last = self.last_timestamp(key)
+        last = None if last is None else pd.Timestamp(last, tz='UTC').tz_convert(self.timezone)
+
+        duration = historical_duration(last, clock.now(tz=self.timezone), bar_size, horizon)
+        bars = api.get_historical_data(contract, duration, str(bar_size), self.timezone)
+        if not isinstance(bars, pd.DataFrame):
+            logging.error(f"No {key} data returned from IBKR API")
+            return 0
+
+        appended = self.append_frame(key, bars)
+        logging.info("MarketDataStore: Ingested %s new bar(s) of %s (%s requested)", appended, key, duration)
+        return appended
+
+    def columns(self, key: str) -> dict:
+        """Read-only memory-mapped views of all stored bars, keyed by
+        'timestamp' and the OHLCV column names"""
+        columns = self._columns.get(key)
+        if columns is None:
+            rows = self._load_index(key)['rows']
+            contract_dir = os.path.join(self.root, key)
+            columns = {
+                name: np.memmap(os.path.join(contract_dir, f"{name}.bin"), dtype=np.dtype(dtype).newbyteorder('<'),
+                                mode='r', shape=(rows,)).view(np.ndarray)
+                if rows > 0 else np.empty(0, dtype=dtype)
+                for name, dtype in BAR_DTYPES.items()
+            }
+            self._columns[key] = columns
+        return columns
+
+    def locate(self, key: str, start=None, end=None) -> tuple:
+        """Row range [lo, hi) of the bars between start and end (inclusive),
+        found by binary search on the timestamps"""
+        timestamps = self.columns(key)['timestamp']
+        lo = 0 if start is None else int(np.searchsorted(timestamps, self._to_epoch_ns(start), side='left'))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, self._to_epoch_ns(end), side='right'))
+        return lo, max(lo, hi)
+
+    def read(self, key: str, start=None, end=None) -> dict:
+        """Read the stored bars of a key between start and end (inclusive).
+
+        Args:
+            key (str): The contract key
+            start: Timestamp or epoch nanoseconds. None reads from the first bar
+            end: Timestamp or epoch nanoseconds. None reads up to the last bar
+
+        Returns:
+            dict: Zero-copy, read-only column arrays keyed by 'timestamp' and
+                the OHLCV column names
+        """
+        lo, hi = self.locate(key, start, end)
+        return {name: values[lo:hi] for name, values in self.columns(key).items()}
+
+    def read_frame(self, key: str, start=None, end=None) -> pd.DataFrame:
+        """Read the stored bars of a key into a DataFrame indexed by datetime"""
+        bars = self.read(key, start, end)
+
+        index = pd.DatetimeIndex(bars['timestamp'].astype(np.int64), tz='UTC').tz_convert(self.timezone)
+        index.name = 'datetime'
+
+        return pd.DataFrame({name: bars[name].astype(BAR_DTYPES[name]) for name in BAR_COLUMNS}, index=index)
+
+    def _overwrite_last_row(self, key: str, rows: int, row: dict):
+        contract_dir = os.path.join(self.root, key)
+
+        for name in BAR_COLUMNS:
+            dtype = np.dtype(BAR_DTYPES[name]).newbyteorder('<')
+            with open(os.path.join(contract_dir, f"{name}.bin"), 'r+b') as f:
+                f.seek((rows - 1) * dtype.itemsize)
+                f.write(np.asarray(row[name], dtype=dtype).tobytes())
+
+    def _load_index(self, key: str) -> dict:
+        if key not in self._indexes:
+            path = os.path.join(self.root, key, INDEX_FILENAME)
+
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    index = json.load(f)
+                if index.get('version') != FORMAT_VERSION:
+                    raise ValueError(f"Unsupported market data store format of {key}: {index.get('version')}")
+                self._indexes[key] = index
+            else:
+                self._indexes[key] = {
+                    'version': FORMAT_VERSION,
+                    'columns': {name: np.dtype(dtype).str for name, dtype in BAR_DTYPES.items()},
+                    'rows': 0,
+                    'partitions': []
+                }
+
+        return self._indexes[key]
+
+    def _save_index(self, key: str, index: dict):
+        contract_dir = os.path.join(self.root, key)
+        os.makedirs(contract_dir, exist_ok=True)
+
+        path = os.path.join(contract_dir, INDEX_FILENAME)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _truncate(path: str, size: int):
+        """Drop rows written after the last index update, e.g. after a crash"""
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            os.truncate(path, size)
+
+    @staticmethod
+    def _to_epoch_ns(timestamp) -> int:
+        if isinstance(timestamp, (int, np.integer)):
+            return int(timestamp)
+        return pd.Timestamp(timestamp).value
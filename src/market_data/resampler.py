@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+from src.market_data.bar_buffer import BarBuffer
+from src.utilities.period import Period
+
+
+NS_PER_DAY = 24 * 60 * 60 * 10**9
+
+
+def bar_size_ns(bar_size) -> int:
+    """Length of a bar size given as a Period, a Timedelta or a string such
+    as '15min', in nanoseconds. The bar size has to divide one day."""
+    if isinstance(bar_size, Period):
+        bar_size = bar_size.to_timedelta()
+    size = pd.Timedelta(bar_size).value
+
+    if size <= 0 or NS_PER_DAY % size != 0:
+        raise ValueError(f"Bar size {bar_size} does not divide one day")
+    return size
+
+
+def bucket_starts(timestamps: np.ndarray, size: int, timezone: str) -> np.ndarray:
+    """Epoch nanosecond start of the bar of the given size containing each
+    timestamp. Bars are aligned to local midnight, as DataFrame.resample does."""
+    index = pd.DatetimeIndex(timestamps, tz='UTC').tz_convert(timezone)
+    local = index.tz_localize(None).asi8
+    return np.asarray(timestamps, dtype=np.int64) - (local % NS_PER_DAY) % size
+
+
+def resample_frame(bars: pd.DataFrame, bar_size, timezone: str) -> pd.DataFrame:
+    """Bars of a sorted DataFrame aggregated to a larger bar size, labelled by
+    their start. Buckets without bars are left out."""
+    size = bar_size_ns(bar_size)
+    timestamps = BarBuffer._index_to_epoch_ns(bars.index)
+    if len(timestamps) == 0:
+        return bars.iloc[:0]
+
+    labels = bucket_starts(timestamps, size, timezone)
+    starts = np.flatnonzero(np.diff(labels, prepend=labels[0] - 1))
+    aggregated = _aggregate({name: bars[name].to_numpy() for name in bars.columns}, starts)
+
+    index = pd.DatetimeIndex(labels[starts], tz='UTC').tz_convert(timezone)
+    index.name = bars.index.name
+    return pd.DataFrame(aggregated, index=index)
+
+
+def _aggregate(columns: dict, starts: np.ndarray) -> dict:
+    """OHLCV of the buckets beginning at the starts offsets"""
+    ends = np.append(starts[1:], len(columns['close'])) - 1
+    return {
+        'open': columns['open'][starts],
+        'high': np.maximum.reduceat(columns['high'], starts),
+        'low': np.minimum.reduceat(columns['low'], starts),
+        'close': columns['close'][ends],
+        'volume': np.add.reduceat(columns['volume'], starts),
+    }
+
+
+class Resampler:
+    """Bars of a larger bar size derived from a BarBuffer, updated incrementally.
+
+    sync() only aggregates the base bars added or revised since the last
+    sync. The bar being formed is re-aggregated from the base bars in its
+    bucket and revised in place, completed bars are never touched again. If
+    the base buffer was cleared or restored, the derived bars are rebuilt
+    from the base buffer.
+
+    Derived bars are labelled by their start and aligned to local midnight,
+    so they match DataFrame.resample(bar_size) of the base bars.
+    """
+
+    def __init__(self, market_data: BarBuffer, bar_size, capacity: int = None):
+        """
+        :param market_data: Buffer of the base bars
+        :param bar_size: Derived bar size as a Period, Timedelta or string, e.g. '15min'
+        :param capacity: Derived bars kept, the capacity of the base buffer unless given
+        """
+        self.market_data = market_data
+        self.bar_size = bar_size
+        self.size = bar_size_ns(bar_size)
+        self.bars = BarBuffer(capacity or market_data.capacity, market_data.timezone)
+
+        self._version = None
+        self._last_timestamp = None
+
+    def __len__(self):
+        return len(self.bars)
+
+    def sync(self) -> BarBuffer:
+        """Bring the derived bars up to date with the base bars"""
+        market_data = self.market_data
+        version = market_data.version
+        if version == self._version:
+            return self.bars
+
+        if market_data.empty:
+            self._reset()
+            self._version = version
+            return self.bars
+
+        timestamps = market_data.timestamps()
+
+        start = 0
+        idx = None
+        if self._last_timestamp is not None and self._version[0] == version[0]:
+            idx = int(np.searchsorted(timestamps, self._last_timestamp))
+            if idx == len(timestamps) or timestamps[idx] != self._last_timestamp:
+                idx = None
+
+        if idx is None:
+            self._reset()
+        else:
+            # The last synced bar may have been revised, so the bar it belongs
+            # to is aggregated again from the start of its bucket
+            bucket = bucket_starts(timestamps[idx:idx + 1], self.size, market_data.timezone)[0]
+            start = int(np.searchsorted(timestamps, bucket))
+
+        self._merge({name: array[start:] for name, array in market_data.window().items()})
+
+        self._version = version
+        self._last_timestamp = int(timestamps[-1])
+        return self.bars
+
+    def _merge(self, window: dict):
+        labels = bucket_starts(window['timestamp'], self.size, self.market_data.timezone)
+        starts = np.flatnonzero(np.diff(labels, prepend=labels[0] - 1))
+        aggregated = _aggregate(window, starts)
+
+        for i, label in enumerate(labels[starts].tolist()):
+            self.bars.update(
+                label,
+                aggregated['open'][i],
+                aggregated['high'][i],
+                aggregated['low'][i],
+                aggregated['close'][i],
+                aggregated['volume'][i])
+
+    def _reset(self):
+        self.bars.clear()
+        self._last_timestamp = None
+
+
+class MultiTimeframeBars:
+    """Derived bar sizes of one base bar feed.
+
+    A Resampler is created on the first request of a bar size and synced on
+    every request, which costs nothing when the base bars did not change.
+    """
+
+    def __init__(self, market_data: BarBuffer):
+        self.market_data = market_data
+        self._resamplers = {}
+
+    def __len__(self):
+        return len(self._resamplers)
+
+    def bars(self, bar_size) -> BarBuffer:
+        """Up to date bars of the given bar size"""
+        key = bar_size_ns(bar_size)
+        resampler = self._resamplers.get(key)
+        if resampler is None:
+            resampler = self._resamplers[key] = Resampler(self.market_data, bar_size)
+        return resampler.sync()
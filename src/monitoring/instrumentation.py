@@ -0,0 +1,237 @@
+import os
+import json
+import math
+import time
+import logging
+import logging.handlers
+import functools
+from src.monitoring.metrics import metrics
+
+
+class LatencyHistogram:
+    """Fixed-memory histogram of durations in seconds.
+
+    Durations are counted in logarithmically spaced buckets between
+    min_value and max_value (bucket_ratio apart), so memory is constant no
+    matter how many samples are recorded. Percentiles are approximated by
+    the upper edge of the bucket they fall in.
+    """
+
+    def __init__(self, min_value: float = 1e-6, max_value: float = 100.0, bucket_ratio: float = 1.25):
+        self.min_value = min_value
+        self.bucket_ratio = bucket_ratio
+        self._log_ratio = math.log(bucket_ratio)
+        self.n_buckets = int(math.ceil(math.log(max_value / min_value) / self._log_ratio)) + 1
+        self.counts = [0] * self.n_buckets
+
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value: float):
+        if value <= self.min_value:
+            idx = 0
+        else:
+            idx = min(int(math.log(value / self.min_value) / self._log_ratio) + 1, self.n_buckets - 1)
+
+        self.counts[idx] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def bucket_upper_bound(self, idx: int) -> float:
+        return self.min_value * self.bucket_ratio ** idx
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-th percentile (0-100) of the recorded durations"""
+        if self.count == 0:
+            return 0.0
+
+        rank = q / 100 * self.count
+        cumulative = 0
+        for idx, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and count > 0:
+                return min(self.bucket_upper_bound(idx), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+
+class _Stage:
+    """Context manager timing one stage"""
+    __slots__ = ('_instrumentation', '_name', '_start')
+
+    def __init__(self, instrumentation, name: str):
+        self._instrumentation = instrumentation
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._instrumentation.record(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class _NullStage:
+    """Context manager used when instrumentation is disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Instrumentation:
+    """Records hot-path stage durations into fixed-memory histograms.
+
+    Stages are timed with the stage() context manager or the timed()
+    decorator. Durations recorded between begin_iteration() and
+    end_iteration() are summed per stage and written as one JSON line per
+    iteration to a size-rotated file. When disabled, stage() returns a shared
+    no-op context manager and timed functions are called directly.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.histograms = {}
+        self.iterations = 0
+
+        self._exported = {}
+        self._iteration_stages = {}
+        self._iteration_start = None
+        self._file_logger = None
+
+    def configure(self, enabled: bool, output_path: str = None, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5):
+        """Enable or disable instrumentation and set up the per-iteration timing file"""
+        self.enabled = enabled
+
+        if enabled and output_path is not None:
+            os.makedirs(output_path, exist_ok=True)
+
+            file_logger = logging.getLogger('instrumentation.timings')
+            file_logger.propagate = False
+            file_logger.setLevel(logging.INFO)
+            for handler in file_logger.handlers[:]:
+                file_logger.removeHandler(handler)
+                handler.close()
+
+            handler = logging.handlers.RotatingFileHandler(
+                os.path.join(output_path, 'timings.jsonl'),
+                maxBytes=max_bytes,
+                backupCount=backup_count)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            file_logger.addHandler(handler)
+
+            self._file_logger = file_logger
+
+    def stage(self, name: str):
+        """Context manager timing the enclosed block as stage `name`"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record(self, name: str, seconds: float):
+        """Record a stage duration. Durations are also exported as the
+        stage_duration_seconds metric."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+            self._exported[name] = metrics.histogram(
+                'stage_duration_seconds', 
+                'Duration of instrumented hot-path stages', 
+                labels={'stage': name})
+        histogram.record(seconds)
+        self._exported[name].observe(seconds)
+
+        if self._iteration_start is not None:
+            self._iteration_stages[name] = self._iteration_stages.get(name, 0.0) + seconds
+
+    def begin_iteration(self):
+        """Start collecting the stage breakdown of a new loop iteration"""
+        if not self.enabled:
+            return
+        self._iteration_stages = {}
+        self._iteration_start = time.perf_counter()
+
+    def end_iteration(self) -> dict:
+        """Finish the current iteration and write its stage breakdown"""
+        if not self.enabled or self._iteration_start is None:
+            return None
+
+        total = time.perf_counter() - self._iteration_start
+        self._iteration_start = None
+        self.iterations += 1
+        self.record('iteration', total)
+
+        breakdown = {
+            'time': time.time(),
+            'iteration': self.iterations,
+            'total': total,
+            'stages': self._iteration_stages,
+        }
+
+        if self._file_logger is not None:
+            self._file_logger.info(json.dumps(breakdown))
+
+        return breakdown
+
+    def summary(self) -> dict:
+        """Summary statistics of all stages, keyed by stage name"""
+        return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def log_summary(self):
+        for name, stats in self.summary().items():
+            logging.info(
+                f"Timing {name}: count={stats['count']} mean={stats['mean'] * 1e3:.3f}ms "
+                f"p50={stats['p50'] * 1e3:.3f}ms p99={stats['p99'] * 1e3:.3f}ms max={stats['max'] * 1e3:.3f}ms")
+
+    def reset(self):
+        self.histograms = {}
+        self._exported = {}
+        self.iterations = 0
+        self._iteration_stages = {}
+        self._iteration_start = None
+
+
+instrumentation = Instrumentation()
+
+
+def timed(name: str):
+    """Decorator timing every call of the decorated function as stage `name`"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not instrumentation.enabled:
+                return func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                instrumentation.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
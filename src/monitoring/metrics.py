@@ -0,0 +1,227 @@
+import os
+import sys
+import math
+import logging
+import threading
+
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Counter:
+    """Monotonically increasing value"""
+    kind = 'counter'
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def samples(self, name: str, labels: tuple):
+        yield name, labels, self.value
+
+
+class Gauge:
+    """Value that can go up and down, optionally computed when collected"""
+    kind = 'gauge'
+
+    def __init__(self):
+        self.value = 0.0
+        self._function = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def set_function(self, function):
+        """Compute the value with function() whenever the gauge is collected"""
+        self._function = function
+
+    def samples(self, name: str, labels: tuple):
+        value = self.value
+        if self._function is not None:
+            value = self._function()
+            if value is None:
+                return
+        yield name, labels, value
+
+
+class Histogram:
+    """Cumulative histogram with fixed bucket upper bounds"""
+    kind = 'histogram'
+
+    def __init__(self, buckets: tuple = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for idx, upper in enumerate(self.buckets):
+            if value <= upper:
+                break
+        else:
+            idx = len(self.buckets)
+
+        self.counts[idx] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name: str, labels: tuple):
+        cumulative = 0
+        for upper, count in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += count
+            yield f"{name}_bucket", labels + (('le', _format_value(upper)),), cumulative
+        yield f"{name}_sum", labels, self.sum
+        yield f"{name}_count", labels, self.count
+
+
+class MetricsRegistry:
+    """Registry of counters, gauges and histograms rendered in the Prometheus
+    text exposition format."""
+
+    def __init__(self):
+        self._metrics = {}          # name -> (kind, help, {labels: metric})
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str = "", labels: dict = None) -> Counter:
+        return self._get_or_create(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str = "", labels: dict = None) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str = "", labels: dict = None, buckets: tuple = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labels, buckets)
+
+    def _get_or_create(self, cls, name, help, labels, *args):
+        key = tuple(sorted(labels.items())) if labels else ()
+
+        entry = self._metrics.get(name)
+        if entry is not None:
+            metric = entry[2].get(key)
+            if metric is not None:
+                return metric
+
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = (cls.kind, help, {})
+
+            kind, _, series = self._metrics[name]
+            if kind != cls.kind:
+                raise ValueError(f"Metric {name} is already registered as a {kind}")
+
+            if key not in series:
+                series[key] = cls(*args)
+            return series[key]
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format"""
+        lines = []
+        for name, (kind, help, series) in sorted(self._metrics.items()):
+            if help:
+                lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+
+            for labels, metric in list(series.items()):
+                for sample_name, sample_labels, value in metric.samples(name, labels):
+                    lines.append(f"{sample_name}{_format_labels(sample_labels)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        """Write all metrics to a file in the Prometheus text format"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def reset(self):
+        with self._lock:
+            self._metrics = {}
+
+
+metrics = MetricsRegistry()
+
+
+class MetricsServer:
+    """Serves the registry on http://{host}:{port}/metrics from a daemon thread"""
+
+    def __init__(self, registry: MetricsRegistry, port: int, host: str = "127.0.0.1"):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self.registry
+
+        class _Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logging.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def resident_memory_bytes():
+    """Resident set size of the current process in bytes, None if unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import resource
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes on Linux
+        return max_rss if sys.platform == 'darwin' else max_rss * 1024
+    except ImportError:
+        return None
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{k}="{_escape(v)}"' for k, v in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
@@ -0,0 +1,118 @@
+import sys
+import time
+import builtins
+import logging
+
+
+class _ImportNode:
+    __slots__ = ('name', 'seconds', 'children')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+        self.children = []
+
+    @property
+    def self_seconds(self) -> float:
+        return self.seconds - sum(child.seconds for child in self.children)
+
+
+class _Phase:
+    """Context manager timing one startup phase"""
+    __slots__ = ('_profile', '_name', '_start')
+
+    def __init__(self, profile, name: str):
+        self._profile = profile
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._profile.phases.append((self._name, self._start - self._profile.origin, time.perf_counter() - self._start))
+        return False
+
+
+class StartupProfile:
+    """Times the startup phases of the trading system and, when enabled, the
+    tree of modules imported during startup.
+
+    Phases are always recorded, they are only entered once per process. The
+    import tree is recorded by wrapping builtins.__import__ between
+    enable_import_profiling() and disable_import_profiling(). Only the first
+    import of a module is timed, the time of a module includes its own imports.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.phases = []
+        self.imports = _ImportNode('<startup>')
+
+        self._stack = [self.imports]
+        self._original_import = None
+
+    def phase(self, name: str):
+        """Context manager timing the enclosed block as startup phase `name`"""
+        return _Phase(self, name)
+
+    def elapsed(self) -> float:
+        """Seconds since the profile was created"""
+        return time.perf_counter() - self.origin
+
+    def enable_import_profiling(self):
+        if self._original_import is not None:
+            return
+
+        original_import = self._original_import = builtins.__import__
+        stack = self._stack
+
+        def profiled_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level != 0 or name in sys.modules:
+                return original_import(name, globals, locals, fromlist, level)
+
+            node = _ImportNode(name)
+            stack[-1].children.append(node)
+            stack.append(node)
+            start = time.perf_counter()
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                node.seconds = time.perf_counter() - start
+                stack.pop()
+
+        builtins.__import__ = profiled_import
+
+    def disable_import_profiling(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def report(self, min_import_ms: float = 1.0) -> str:
+        """Startup report with the phase timings and the import tree. Imports
+        faster than min_import_ms are left out."""
+        lines = ["Startup phases (start offset, duration):"]
+        for name, offset, seconds in self.phases:
+            lines.append(f"  {name:<32} +{offset * 1e3:9.1f}ms {seconds * 1e3:9.1f}ms")
+
+        if self.imports.children:
+            total = sum(child.seconds for child in self.imports.children)
+            lines.append(f"Imports ({total * 1e3:.1f}ms, cumulative / self):")
+            self._report_imports(self.imports, 1, min_import_ms / 1e3, lines)
+
+        return "\n".join(lines)
+
+    def _report_imports(self, node: _ImportNode, depth: int, min_seconds: float, lines: list):
+        for child in sorted(node.children, key=lambda child: child.seconds, reverse=True):
+            if child.seconds < min_seconds:
+                continue
+            lines.append(f"  {'  ' * (depth - 1)}{child.name:<{max(48 - 2 * depth, 8)}} "
+                         f"{child.seconds * 1e3:9.1f}ms {child.self_seconds * 1e3:9.1f}ms")
+            self._report_imports(child, depth + 1, min_seconds, lines)
+
+    def log_report(self, min_import_ms: float = 1.0):
+        for line in self.report(min_import_ms).splitlines():
+            logging.info(line)
+
+
+startup_profile = StartupProfile()
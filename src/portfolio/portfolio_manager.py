@@ -9,19 +9,28 @@ from src.portfolio.position import Position
 from src.api.ibkr_api import IBConnection
 from src.configuration import Configuration
 import logging
-import time
 from src.db.database import Database
 from src.api.api_utils import get_current_contract, order_from_dict
 from src.utilities.utils import trading_day_start_time_ts
+from src.monitoring.instrumentation import timed
+from src.monitoring.metrics import metrics
+from src.utilities.clock import clock
 
 
 class PortfolioManager:
 
-    def __init__(self, config: Configuration, api: IBConnection, db: Database):
+    def __init__(self, config: Configuration, api: IBConnection, db: Database, account: str = None):
         self.config = config
         self.api = api
         self.db = db
 
+        # Sub-account of the strategy trading through this portfolio. Orders and
+        # positions are tagged with it so several strategies can trade one instrument.
+        self.account = account
+        self.metric_labels = {'ticker': self.config.ticker}
+        if account is not None:
+            self.metric_labels['account'] = account
+
         self.positions: List[Position] = []
         self.orders: List[List[(Order, bool)]] = []       #list of bracket orders (list of 3 orders). bool is for whether an order has been resubmitted when cancelled
         self.order_statuses: Dict[int, Dict] = {}          #order id -> order status
@@ -38,20 +47,23 @@ class PortfolioManager:
             logging.error(f"Order {order_id} not found in API or local order statuses")
             return None
         
+    @timed("update_positions")
     def update_positions(self):
         """Update the positions from the API."""
-        logging.info(f"{self.__class__.__name__}: Updating positions from orders.")
-        logging.debug(f"{self.__class__.__name__}: There are {self._total_orders()} orders")
+        logging.info("%s: Updating positions from orders.", self.__class__.__name__)
+        logging.debug("%s: There are %s orders", self.__class__.__name__, self._total_orders())
 
         for bracket_order in self.orders:
             for order, _ in bracket_order:
-                logging.info(f"Order: {str(order)}")
+                logging.debug("Order: %s", order)
         
         self.api.request_open_orders()
 
         if len(self.orders) > 0:
             filled_count, cancelled_count, pending_count = self._get_order_status_count()
-            logging.debug(f"Order statuses: {filled_count} filled, {cancelled_count} cancelled, {pending_count} pending")
+            logging.debug("Order statuses: %s filled, %s cancelled, %s pending", filled_count, cancelled_count, pending_count)
+
+        positions_updated = False
 
         for bracket_idx, bracket_order in enumerate(self.orders):
             
@@ -61,13 +73,15 @@ class PortfolioManager:
                 
                 if order_status['status'] == 'Filled' and not already_handled:
 
+                    positions_updated = True
+
                     order_details = self.api.get_open_order(order.orderId)
                     contract = order_details['contract']
                     
                     if order.orderType == 'MKT' and order.action == 'BUY':
 
                         if len(self.positions) == 0:
-                            logging.info(f"Buy order filled, creating new position.")
+                            logging.info("Buy order filled, creating new position.")
 
                             position = Position(
                             ticker=contract.symbol,
@@ -81,14 +95,14 @@ class PortfolioManager:
                             )
 
                             self.positions.append(position)
-                            self.db.add_position(position)
+                            self.db.add_position(position, self.account)
 
                             self.db.update_order_status(order.orderId, order_status)
 
                             self.orders[bracket_idx][order_idx] = (order, True)
 
                         else:
-                            logging.info(f"Buy order filled, updating position.")
+                            logging.info("Buy order filled, updating position.")
 
                             position = copy.deepcopy(self.positions[-1])
 
@@ -103,13 +117,13 @@ class PortfolioManager:
                             self.orders[bracket_idx][order_idx] = (order, True)
                             
                             self.positions.append(position)
-                            self.db.add_position(position)
+                            self.db.add_position(position, self.account)
 
                             self.db.update_order_status(order.orderId, order_status)
 
                     elif order.orderType == 'MKT' and order.action == 'SELL':
 
-                        logging.info(f"Market sell order filled, updating position.")
+                        logging.info("Market sell order filled, updating position.")
 
                         position = copy.deepcopy(self.positions[-1])
 
@@ -124,13 +138,13 @@ class PortfolioManager:
                         self.orders[bracket_idx][order_idx] = (order, True)
 
                         self.positions.append(position)
-                        self.db.add_position(position)
+                        self.db.add_position(position, self.account)
 
                         self.db.update_order_status(order.orderId, order_status)
                     
                     elif order.orderType == 'STP' or order.orderType == 'LMT' and order.action == 'SELL':
 
-                        logging.info(f"{order.orderType} order filled, updating position.")
+                        logging.info("%s order filled, updating position.", order.orderType)
 
                         position = copy.deepcopy(self.positions[-1])
 
@@ -145,7 +159,7 @@ class PortfolioManager:
                         self.orders[bracket_idx][order_idx] = (order, True)
 
                         self.positions.append(position)
-                        self.db.add_position(position)
+                        self.db.add_position(position, self.account)
 
                         self.db.update_order_status(order.orderId, order_status)
 
@@ -157,12 +171,17 @@ class PortfolioManager:
         msg += f" Currently {len(self.positions)} position(s)."
 
         logging.info(msg)
-        if len(self.positions) > 0:
-            for position in self.positions:
-                logging.info(str(position))
+        for position in self.positions:
+            logging.debug("%s", position)
 
-        self.db.print_all_entries()
+        metrics.gauge('portfolio_position_quantity', 'Contracts currently held', 
+                      labels=self.metric_labels).set(self.current_position_quantity())
 
+        # Only dump the DB tables when fills were processed
+        if positions_updated and self.config.debug_dumps:
+            self.db.print_all_entries()
+
+    @timed("daily_pnl")
     def daily_pnl(self):
         """Update the daily PnL. The daily pnl is made up from the PnL of all filled orders."""
         index_pnl = 0
@@ -201,8 +220,13 @@ class PortfolioManager:
             if filled_count >= 2:
                 index_pnl += current_order_pnl
 
-        return index_pnl * self.config.mnq_point_value
+        pnl = index_pnl * self.config.mnq_point_value
+        metrics.gauge('portfolio_daily_pnl', 'Realized PnL of the current trading day', 
+                      labels=self.metric_labels).set(pnl)
+
+        return pnl
 
+    @timed("place_bracket_order")
     def place_bracket_order(self, contract: Contract = None):
         """Place a bracket order"""
         logging.debug("Placing bracket order.")
@@ -220,7 +244,7 @@ class PortfolioManager:
         stop_loss_price = round(stop_loss_price/self.config.mnq_tick_size) * self.config.mnq_tick_size
         take_profit_limit_price = round(take_profit_limit_price/self.config.mnq_tick_size) * self.config.mnq_tick_size
 
-        logging.debug(f"STP price: {stop_loss_price}, LMT price: {take_profit_limit_price}")
+        logging.debug("STP price: %s, LMT price: %s", stop_loss_price, take_profit_limit_price)
 
         bracket = self.api.create_bracket_order(
             "BUY", 
@@ -239,8 +263,10 @@ class PortfolioManager:
     def _handle_successful_bracket_order(self, bracket: List[Order]):
         """Handle a successful bracket order. This is called when all orders were accepted by the API."""
         logging.info("All orders were accepted by the API.")
+        metrics.counter('portfolio_bracket_orders_total', 'Bracket orders accepted by the API', 
+                        labels=self.metric_labels).inc()
         self.orders.append(list(zip(bracket, [False] * len(bracket))))
-        self.db.add_order(bracket)
+        self.db.add_order(bracket, self.config.ticker, self.account)
 
         for order in bracket:
             order_id = order.orderId
@@ -254,12 +280,12 @@ class PortfolioManager:
         logging.error("Order callbacks not received for all orders.")
         logging.warning(f"Pausing for {self.config.timeout} seconds before rechecking order statuses.")
 
-        time.sleep(self.config.timeout)
+        clock.sleep(self.config.timeout)
 
         logging.warning("Checking order statuses again after pause.")
 
         for order in bracket:
-            logging.info(f"Order {order.orderId} status - {self.api.order_statuses[order.orderId]}")
+            logging.info("Order %s status - %s", order.orderId, self.api.order_statuses[order.orderId])
 
         # If order statuses are now received, then we can process positions
         if all(self._get_order_status(order.orderId) for order in bracket):
@@ -283,14 +309,16 @@ class PortfolioManager:
                     self.api.cancel_order(mkt_order.orderId)
 
                     if self.api.order_statuses[mkt_order.orderId]['status'] == "Cancelled":
-                        logging.info(f"MKT order {mkt_order.orderId} was cancelled successfully.")
-                        logging.info(f"Now cancelling LMT and STP orders")
+                        logging.info("MKT order %s was cancelled successfully.", mkt_order.orderId)
+                        logging.info("Now cancelling LMT and STP orders")
 
                         self.api.cancel_order(lmt_order.orderId)
                         self.api.cancel_order(stp_order.orderId)
 
-                        logging.info(f"LMT order {lmt_order.orderId} status: {self.api.order_statuses[lmt_order.orderId]['status']}")
-                        logging.info(f"STP order {stp_order.orderId} status: {self.api.order_statuses[stp_order.orderId]['status']}")
+                        logging.info("LMT order %s status: %s",
+                                     lmt_order.orderId, self.api.order_statuses[lmt_order.orderId]['status'])
+                        logging.info("STP order %s status: %s",
+                                     stp_order.orderId, self.api.order_statuses[stp_order.orderId]['status'])
 
                         if (self.api.order_statuses[lmt_order.orderId]['status'] != "Cancelled" or
                             self.api.order_statuses[stp_order.orderId]['status'] != "Cancelled"):
@@ -298,7 +326,8 @@ class PortfolioManager:
                             return
 
                 else:
-                    logging.info(f"MKT order {mkt_order.orderId} status received: {self.api.order_statuses[mkt_order.orderId]['status']}")
+                    logging.info("MKT order %s status received: %s",
+                                 mkt_order.orderId, self.api.order_statuses[mkt_order.orderId]['status'])
 
                 if not self.api.order_statuses[lmt_order.orderId] or not self.api.order_statuses[stp_order.orderId]:
                     # If we're here it means that the MKT order was accepted by the API but not the brackets.
@@ -310,12 +339,12 @@ class PortfolioManager:
                     self.api.cancel_order(stp_order.orderId)
 
                     if self.api.order_statuses[lmt_order.orderId]['status'] == "Cancelled":
-                        logging.info(f"LMT order {lmt_order.orderId} was cancelled successfully.")
+                        logging.info("LMT order %s was cancelled successfully.", lmt_order.orderId)
                     else:
                         logging.error(f"Could not cancel LMT order. Status: {self.api.order_statuses[lmt_order.orderId]['status']}")
 
                     if self.api.order_statuses[stp_order.orderId]['status'] == "Cancelled":
-                        logging.info(f"STP order {stp_order.orderId} was cancelled successfully.")
+                        logging.info("STP order %s was cancelled successfully.", stp_order.orderId)
                     else:
                         logging.error(f"Could not cancel STP order. Status: {self.api.order_statuses[stp_order.orderId]['status']}")
 
@@ -338,7 +367,7 @@ class PortfolioManager:
                         new_order_details = self.api.get_open_order(new_order_id)
                         
                         self.orders.append([(new_order_details['order'], False)])
-                        self.db.add_order(new_order_details['order'])
+                        self.db.add_order(new_order_details['order'], self.config.ticker, self.account)
                         self.db.add_order_status(new_order_id, self._get_order_status(new_order_id))
 
                         self.update_positions()
@@ -350,7 +379,7 @@ class PortfolioManager:
                     
                     logging.error(f"Should not be here. Order statuses received for all orders but not handled.")
                     for order in bracket:
-                        logging.info(f"Order {order.orderId} status - {self.api.order_statuses[order.orderId]}")
+                        logging.info("Order %s status - %s", order.orderId, self.api.order_statuses[order.orderId])
 
             except Exception as e:
                 logging.error(f"Error handling cancellations for failed bracket order: {e}")
@@ -376,6 +405,7 @@ class PortfolioManager:
     def current_position_quantity(self):
         return self.positions[-1].quantity if len(self.positions) > 0 else 0
 
+    @timed("check_cancelled_market_order")
     def check_cancelled_market_order(self):
         """Check for cancelled market orders and resubmit them if required."""
         logging.debug("Checking for cancelled market orders.")
@@ -397,7 +427,7 @@ class PortfolioManager:
 
                     if self.config.resubmit_cancelled_order:
 
-                        logging.info(f"Resubmitting order type: {order.orderType}, id:{order.orderId}.")
+                        logging.info("Resubmitting order type: %s, id:%s.", order.orderType, order.orderId)
                         already_resubmitted = True
 
                         order_details = self.api.get_open_order(order.orderId)
@@ -405,7 +435,7 @@ class PortfolioManager:
                         self.place_bracket_order(order_details['contract'])
 
                     else:
-                        logging.info(f"Not resubmitting cancelled order type: {order.orderType}, id:{order.orderId}.")
+                        logging.info("Not resubmitting cancelled order type: %s, id:%s.", order.orderType, order.orderId)
 
         if not found_cancelled_order:
             logging.debug("No cancelled orders found.")
@@ -450,7 +480,7 @@ class PortfolioManager:
                 order_status = self._get_order_status(order.orderId)
                 
                 if order_status['status'] not in ['Filled', 'Cancelled']:
-                    logging.info(f"Cancelling order {order.orderId} of type {order.orderType}")
+                    logging.info("Cancelling order %s of type %s", order.orderId, order.orderType)
                     self.api.cancel_order(order.orderId)
 
     def close_all_positions(self):
@@ -465,7 +495,7 @@ class PortfolioManager:
         position = self.positions[-1]
 
         if position.quantity > 0:
-            logging.info(f"Closing position for {position.ticker} with quantity {position.quantity}")
+            logging.info("Closing position for %s with quantity %s", position.ticker, position.quantity)
             matching_position = self.api.get_matching_position(position)
 
             if matching_position is None:
@@ -492,7 +522,7 @@ class PortfolioManager:
             order_details = self.api.get_open_order(order_id)
             self.orders.append([(order_details['order'], False)])
 
-            self.db.add_order(order_details['order'])
+            self.db.add_order(order_details['order'], self.config.ticker, self.account)
 
             order_id = order_details['order'].orderId
             self.db.add_order_status(order_id, self._get_order_status(order_id))
@@ -519,35 +549,70 @@ class PortfolioManager:
         self.positions = []
         self.order_statuses = {}
 
+    def _check_state_with_api(self):
+        """Check that the latest loaded position actually still exists in IBKR. 
+        If not, the orders and positions of this instrument and strategy are 
+        deleted from the database and the portfolio state is reinitialized."""
+        if len(self.positions) > 0:
+            latest_db_position = self.positions[-1]
+            matching_position = self.api.get_matching_position(latest_db_position)
+
+            if matching_position is None:
+                msg = f"Inconsistent DB state: Position {latest_db_position.ticker} with quantity {latest_db_position.quantity}"
+                msg += f" from DB not found in IBKR. Clearing its orders, positions and portfolio state."
+                logging.error(msg)
+
+                self.cancel_all_orders()
+                self.clear_orders_statuses_positions()
+                self.db.delete_orders_and_positions(self.config.ticker, self.account)
+                if self.config.debug_dumps:
+                    self.db.print_all_entries()
+
+            elif latest_db_position.quantity > int(matching_position['position']):
+                msg = f"Inconsistent DB state: Position {latest_db_position.ticker} has {latest_db_position.quantity} contracts."
+                msg += f" Only {int(matching_position['position'])} contracts are found on IBKR."
+                msg += f" Clearing its orders, positions and portfolio state."
+                logging.error(msg)
+                
+                self.cancel_all_orders()
+                self.clear_orders_statuses_positions()
+                self.db.delete_orders_and_positions(self.config.ticker, self.account)
+                if self.config.debug_dumps:
+                    self.db.print_all_entries()
+            else:
+                logging.info("DB state consistent with IBKR.")
+
     def populate_from_db(self, check_state: bool = True):
         """Populate the orders from the database. Only orders created after the 
         trading day start time are loaded. By loading orders and setting 
         already_handled to False, we can ensure that the orders are processed 
         again and dont have to load the positions from the database.
         """
-        logging.info("PortfolioManager: Populating orders from database.")
-        self.db.print_all_entries()
+        owner = self.config.ticker if self.account is None else f"{self.config.ticker} ({self.account})"
+        logging.info("PortfolioManager: Populating %s orders from database.", owner)
+        if self.config.debug_dumps:
+            self.db.print_all_entries()
 
-        raw_orders_and_positions = self.db.get_all_orders_and_positions()
+        raw_orders_and_positions = self.db.get_all_orders_and_positions(self.config.ticker, self.account)
         raw_orders = raw_orders_and_positions['orders']
         raw_positions = raw_orders_and_positions['positions']
 
         trading_day_start = trading_day_start_time_ts(self.config.trading_start_time, self.config.timezone)
 
-        logging.debug(f"PortfolioManager: Raw orders found: {len(raw_orders_and_positions['orders'])}")
+        logging.debug("PortfolioManager: Raw orders found: %s", len(raw_orders_and_positions['orders']))
         loaded_orders = []
         for order in raw_orders:
             time_created = pd.to_datetime(order['created_timestamp'])
             if time_created > trading_day_start:
                 loaded_orders.append(order_from_dict(order))
 
-        logging.debug(f"Loaded {len(loaded_orders)} orders from database.")
+        logging.debug("Loaded %s orders from database.", len(loaded_orders))
 
 
         logging.info("PortfolioManager: Populating order statuses from database.")
 
         raw_order_statuses = self.db.get_all_order_statuses()
-        logging.debug(f"PortfolioManager: Raw order statuses found: {len(raw_order_statuses)}")
+        logging.debug("PortfolioManager: Raw order statuses found: %s", len(raw_order_statuses))
 
         for order_id, status in raw_order_statuses.items():
             time_last_modified = pd.to_datetime(status['last_modified'])
@@ -555,7 +620,7 @@ class PortfolioManager:
             if time_last_modified > trading_day_start:
                 self.order_statuses[order_id] = status
 
-        logging.debug(f"Loaded {len(self.order_statuses)} order statuses from database.")
+        logging.debug("Loaded %s order statuses from database.", len(self.order_statuses))
 
         # Set whether a position has been logged from filled orders
         filled_flags = []
@@ -576,7 +641,7 @@ class PortfolioManager:
         self.orders = bracket_orders
 
         logging.info("PortfolioManager: Populating positions from database.")
-        logging.debug(f"PortfolioManager: Raw positions found: {len(raw_positions)}")
+        logging.debug("PortfolioManager: Raw positions found: %s", len(raw_positions))
 
         for position in raw_positions:
             time_created = pd.to_datetime(position['created_timestamp'])
@@ -584,38 +649,88 @@ class PortfolioManager:
             if time_created > trading_day_start:
                 self.positions.append(Position.from_dict(position))
 
-        logging.debug(f"Loaded {len(self.positions)} positions from database.")
+        logging.debug("Loaded %s positions from database.", len(self.positions))
 
         # Check that the latest position from the DB actually still exists in IBKR
         if check_state:
-            if len(self.positions) > 0:
-                latest_db_position = self.positions[-1]
-                matching_position = self.api.get_matching_position(latest_db_position)
-
-                if matching_position is None:
-                    msg = f"Inconsistent DB state: Position {latest_db_position.ticker} with quantity {latest_db_position.quantity}"
-                    msg += f" from DB not found in IBKR. Reinitializing database and portfolio state."
-                    logging.error(msg)
-
-                    self.cancel_all_orders()
-                    self.clear_orders_statuses_positions()
-                    self.db.reinitialize()
-                    self.db.print_all_entries()
-
-                elif latest_db_position.quantity > int(matching_position['position']):
-                    msg = f"Inconsistent DB state: Position {latest_db_position.ticker} has {latest_db_position.quantity} contracts."
-                    msg += f" Only {int(matching_position['position'])} contracts are found on IBKR."
-                    msg += f" Reinitializing database and portfolio state."
-                    logging.error(msg)
-                    
-                    self.cancel_all_orders()
-                    self.clear_orders_statuses_positions()
-                    self.db.reinitialize()
-                    self.db.print_all_entries()
-                else:
-                    logging.info("DB state consistent with IBKR.")
+            self._check_state_with_api()
 
         return len(loaded_orders), len(self.order_statuses), len(self.positions)
 
+    def get_state(self) -> dict:
+        """Orders with their statuses and positions, used to snapshot the portfolio"""
+        orders = []
+        order_statuses = {}
+        for bracket_order in self.orders:
+            bracket = []
+            for order, already_handled in bracket_order:
+                bracket.append({
+                    'order_id': order.orderId,
+                    'action': order.action,
+                    'order_type': order.orderType,
+                    'quantity': order.totalQuantity,
+                    'aux_price': order.auxPrice,
+                    'lmt_price': order.lmtPrice,
+                    'parent_id': order.parentId,
+                    'transmit': order.transmit,
+                    'already_handled': already_handled,
+                })
+
+                order_status = self._get_order_status(order.orderId)
+                if order_status:
+                    order_statuses[order.orderId] = dict(order_status)
+            orders.append(bracket)
+
+        positions = [{
+            'ticker': position.ticker,
+            'security': position.security,
+            'currency': position.currency,
+            'expiry': position.expiry,
+            'contract_id': position.contract_id,
+            'quantity': position.quantity,
+            'avg_price': position.avg_price,
+            'time_opened': position.time_opened,
+        } for position in self.positions]
+
+        return {
+            'orders': orders,
+            'order_statuses': order_statuses,
+            'positions': positions,
+        }
+
+    def restore_state(self, state: dict, check_state: bool = True):
+        """Restore orders, order statuses and positions saved by get_state 
+        instead of replaying the orders from the database."""
+        self.clear_orders_statuses_positions()
+
+        self.orders = [
+            [(order_from_dict(order), order['already_handled']) for order in bracket] 
+            for bracket in state['orders']
+        ]
+        self.order_statuses = {int(order_id): status for order_id, status in state['order_statuses'].items()}
+        self.positions = [
+            Position.from_dict({**position, 'time_opened': pd.Timestamp(position['time_opened'])}) 
+            for position in state['positions']
+        ]
+
+        logging.info("PortfolioManager: Restored %s orders and %s positions from snapshot.",
+                     self._total_orders(), len(self.positions))
+
+        if check_state:
+            self._check_state_with_api()
+
+        return self._total_orders(), len(self.order_statuses), len(self.positions)
+
+    def is_state_current(self, state: dict) -> bool:
+        """Whether a state saved by get_state holds the latest orders of the 
+        current trading day in the database. If orders were added after the 
+        state was saved, the portfolio must be populated from the database."""
+        saved_order_ids = [order['order_id'] for bracket in state['orders'] for order in bracket]
+        latest_order = self.db.get_latest_order(self.config.ticker, self.account)
+
+        trading_day_start = trading_day_start_time_ts(self.config.trading_start_time, self.config.timezone)
+        if latest_order is None or pd.to_datetime(latest_order['created_timestamp']) <= trading_day_start:
+            return not saved_order_ids
 
+        return bool(saved_order_ids) and latest_order['order_id'] == max(saved_order_ids)
 
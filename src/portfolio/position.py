@@ -1,5 +1,6 @@
 from datetime import datetime
 import pandas as pd
+from src.utilities.clock import clock
 
 
 class Position:
@@ -34,7 +35,7 @@ class Position:
         self.contract_id = contract_id
         self.quantity = quantity
         self.avg_price = avg_price
-        self.time_opened = pd.Timestamp.now(tz=timezone) if time_opened is None else time_opened
+        self.time_opened = clock.now(tz=timezone) if time_opened is None else time_opened
 
     @staticmethod
     def from_dict(data: dict) -> 'Position':
@@ -1,13 +1,10 @@
-import time
 from src.portfolio.portfolio_manager import PortfolioManager
-import datetime
-import pytz
 import pandas as pd
-import os
 from src.db.database import Database
 import logging
-from src.utilities.utils import trading_day_start_time_ts
-import holidays
+from src.utilities.utils import trading_day_start_time_ts, us_holidays
+from src.monitoring.metrics import metrics
+from src.utilities.clock import clock
 
 
 class RiskManager:
@@ -20,8 +17,10 @@ class RiskManager:
                  trading_pause_hours, 
                  mnq_tick_size,
                  stop_loss_ticks, 
-                 take_profit_ticks):        
+                 take_profit_ticks,
+                 ticker=None):        
         self.timezone = timezone
+        self.ticker = ticker
         self.trading_start = pd.to_datetime(trading_start_time, format='%H%M').tz_localize(self.timezone).time()
         self.trading_end = pd.to_datetime(trading_end_time, format='%H%M').tz_localize(self.timezone).time()
         self.max_24h_loss = max_24h_loss
@@ -41,15 +40,21 @@ class RiskManager:
     
     def set_trading_pause_time(self, db: Database = None):
         """Set the start time for trading pause"""
-        self.pause_start_time = pd.Timestamp.now(tz=self.timezone)
+        self.pause_start_time = clock.now(tz=self.timezone)
         self.pause_end_time = self.pause_start_time + pd.Timedelta(hours=self.trading_pause_hours)
+        metrics.counter('risk_trading_pauses_total', 'Trading pauses triggered by the 24h loss limit', 
+                        labels={'ticker': self.ticker} if self.ticker else None).inc()
 
         if db is not None:
-            db.add_trading_pause(self.pause_start_time, self.pause_end_time)
+            db.add_trading_pause(self.pause_start_time, self.pause_end_time, self.ticker)
 
     def can_resume_trading_after_pause(self, now: pd.Timestamp):
         """Check if trading can resume after pause"""
+        paused_gauge = metrics.gauge('risk_trading_paused', 'Whether trading is currently paused', 
+                                     labels={'ticker': self.ticker} if self.ticker else None)
+
         if self.pause_start_time is None:
+            paused_gauge.set(0)
             return True
         
         if now >= self.pause_end_time:
@@ -58,12 +63,15 @@ class RiskManager:
             logging.info(msg)
             self.pause_start_time = None
             self.pause_end_time = None
+            paused_gauge.set(0)
             return True
+        
+        paused_gauge.set(1)
         return False
     
     def is_trading_hours(self, now: pd.Timestamp):
         """Check if current time is within trading hours"""
-        logging.debug(f"RiskManager: Checking trading time. Current timestamp: {now}")
+        logging.debug("RiskManager: Checking trading time. Current timestamp: %s", now)
         current_time = now.time()
         
         # Trading hours are generally from 9 PM to 4 PM EST next day
@@ -74,11 +82,10 @@ class RiskManager:
             
     def is_trading_day(self, now_timestamp: pd.Timestamp):
         """Check if today is a trading day (Sunday through Friday)"""
-        logging.debug(f"RiskManager: Checking trading day. Current timestamp: {now_timestamp}")
-        us_holidays = holidays.UnitedStates()
+        logging.debug("RiskManager: Checking trading day. Current timestamp: %s", now_timestamp)
         weekday = now_timestamp.weekday()
 
-        if now_timestamp.date() in us_holidays:
+        if now_timestamp.date() in us_holidays(now_timestamp.year):
             return False
         
         # Sunday through Friday (6-4)
@@ -91,9 +98,9 @@ class RiskManager:
     def populate_from_db(self, db: Database):
         """Load trading pauses from database and simply set the pause times
         based of the latest entry in the db"""
-        logging.info(f"RiskManager: Populating trading pause times from DB")
+        logging.info("RiskManager: Populating trading pause times from DB")
 
-        trading_pauses = db.get_trading_pauses()
+        trading_pauses = db.get_trading_pauses(self.ticker)
 
         if len(trading_pauses) == 0:
             logging.info("No trading pauses found in database")
@@ -102,15 +109,17 @@ class RiskManager:
         latest_pause = trading_pauses[-1]
         self.pause_start_time = latest_pause['start_time']
         self.pause_end_time = latest_pause['end_time']
-        logging.debug(f"Loaded trading pause: {latest_pause['start_time']} to {latest_pause['end_time']}")
+        logging.debug("Loaded trading pause: %s to %s", latest_pause['start_time'], latest_pause['end_time'])
         return
     
     def perform_eod_close(self, 
                            now: pd.Timestamp, 
                            eod_exit_time: str, 
                            market_close_time: str,
-                           ptf_manager: PortfolioManager):
-        """Perform end of day checks"""
+                           ptf_manager: PortfolioManager,
+                           wait_for_close: bool = True):
+        """Perform end of day checks. If wait_for_close is False, the caller is 
+        responsible for waiting until the market close after closing positions."""
         eod_cutoff = pd.Timestamp(
                 now.year, 
                 now.month, 
@@ -128,14 +137,15 @@ class RiskManager:
                 tz=self.timezone)
 
         if market_close_time >= now >= eod_cutoff:
-            logging.info(f"Current time: {now} - End of day approaching - closing all positions and cancelling orders")
+            logging.info("Current time: %s - End of day approaching - closing all positions and cancelling orders", now)
             
             ptf_manager.cancel_all_orders()
             ptf_manager.close_all_positions()
 
-            seconds_until_close = (market_close_time - now).total_seconds()
-            logging.info(f"Sleeping for {seconds_until_close} seconds until market close")
-            time.sleep(seconds_until_close)
+            if wait_for_close:
+                seconds_until_close = (market_close_time - now).total_seconds()
+                logging.info("Sleeping for %s seconds until market close", seconds_until_close)
+                clock.sleep(seconds_until_close)
             return True
         
         return False
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+import numpy as np
 
 
 
@@ -7,6 +8,7 @@ class AbstractStrategy(ABC):
     Abstract interface for trading strategies.
 
     Defines methods for processing market data and generating trade signals.
+    Signal series hold the Signal values as int8, one per bar.
     """
     @staticmethod
     @abstractmethod
@@ -19,3 +21,33 @@ class AbstractStrategy(ABC):
         :return: Signal
         """
         pass
+
+    @classmethod
+    def generate_signal(cls, indicators, cfg):
+        """
+        Generate a trade signal from indicators shared with the other strategies
+        evaluated on the same bars. By default generate_signals is called on a 
+        copy of the bars, strategies override this to reuse shared indicators.
+
+        :param indicators: SharedIndicators instance
+        :param cfg: Configuration instance
+        :return: Signal
+        """
+        return cls.generate_signals(indicators.data.copy(), cfg)
+
+    @classmethod
+    def generate_signal_series(cls, indicators, cfg):
+        """
+        Generate the signal of every bar, as generate_signal would on the bars
+        up to it. By default generate_signals is called on each prefix of the
+        bars, strategies override this with a vectorized implementation.
+
+        :param indicators: Indicators over the full history, e.g. SharedIndicators
+        :param cfg: Configuration instance
+        :return: np.ndarray of int8 Signal values
+        """
+        data = indicators.data
+        signals = np.empty(len(data), dtype=np.int8)
+        for end in range(1, len(data) + 1):
+            signals[end - 1] = cls.generate_signals(data.iloc[:end].copy(), cfg).value
+        return signals
@@ -1,7 +1,8 @@
 from src.strategys.abstract_strategy import AbstractStrategy
-from src.utilities.technical_analysis import TechnicalAnalysis
+from src.utilities.technical_analysis import SharedIndicators
 from src.utilities.enums import Signal
 import logging
+import numpy as np
 import pandas as pd
 from src.configuration import Configuration
 
@@ -11,34 +12,49 @@ class BollingerBandRSIStrategy(AbstractStrategy):
     A trading strategy based on Bollinger Bands and RSI indicators.
     Generates buy signals when price is below middle BB and RSI crosses above threshold.
     """
-    
+
     @staticmethod
-    def generate_signals(historical_data: pd.DataFrame, cfg: Configuration):        
-        # Initialize technical analysis with config
+    def buy_conditions(close: np.ndarray, bb_middle: np.ndarray, rsi: np.ndarray, rsi_threshold) -> np.ndarray:
+        """Boolean array of the bars meeting the BUY conditions. The first bar
+        has no previous RSI and never does. Shared by the single bar and the 
+        batch evaluation, and by the vectorized backtest."""
+        buy = np.zeros(len(close), dtype=bool)
+        buy[1:] = ((close[1:] < bb_middle[1:]) &
+                   (rsi[:-1] < rsi_threshold) &
+                   (rsi[1:] > rsi_threshold))
+        return buy
+
+    @classmethod
+    def generate_signals(cls, historical_data: pd.DataFrame, cfg: Configuration):
+        """Signal of the last bar. The bars are not modified."""
         logging.debug("Generating signals for Bollinger Band RSI strategy.")
+        return cls.generate_signal(SharedIndicators(historical_data), cfg)
 
-        ta = TechnicalAnalysis(cfg)
-        
-        ta.calculate_indicators(historical_data)
-        
-        if len(historical_data) < 2:
-            historical_data.loc[historical_data.index[-1], 'signal'] = Signal.HOLD.name
+    @classmethod
+    def generate_signal(cls, indicators, cfg: Configuration):
+        """Generate a signal from shared indicators without modifying the bars.
+        Only the latest two values are used."""
+        if len(indicators) < 2:
             return Signal.HOLD
-            
-        last_row = historical_data.iloc[-1]
-        prev_row = historical_data.iloc[-2]
-        
-        price_below_mid_bb = last_row['close'] < last_row['bb_middle']
-        
-        rsi_crossover = (prev_row['rsi'] < ta.rsi_threshold and 
-                        last_row['rsi'] > ta.rsi_threshold)
-        
-        if price_below_mid_bb and rsi_crossover:
-            historical_data.loc[historical_data.index[-1], 'signal'] = Signal.BUY.name
-            logging.debug("BollingerBandRSIStrategy: BUY signal generated.")
+
+        bb_middle = indicators.bollinger_bands(cfg.bollinger_period, cfg.bollinger_std)['middle']
+        rsi = indicators.rsi(cfg.rsi_period)
+        close = indicators.close()
+
+        if cls.buy_conditions(close[-2:], bb_middle[-2:], rsi[-2:], cfg.rsi_threshold)[-1]:
+            logging.debug("BollingerBandRSIStrategy (%s): BUY signal generated.", cfg.strategy_name)
             return Signal.BUY
         else:
-            historical_data.loc[historical_data.index[-1], 'signal'] = Signal.HOLD.name
-            logging.debug("BollingerBandRSIStrategy: HOLD signal generated.")
+            logging.debug("BollingerBandRSIStrategy (%s): HOLD signal generated.", cfg.strategy_name)
             return Signal.HOLD
-            
+
+    @classmethod
+    def generate_signal_series(cls, indicators, cfg: Configuration) -> np.ndarray:
+        """Signals of all bars from indicators over the full history"""
+        bb_middle = indicators.bollinger_bands(cfg.bollinger_period, cfg.bollinger_std)['middle']
+        rsi = indicators.rsi(cfg.rsi_period)
+        buy = cls.buy_conditions(indicators.close(), bb_middle, rsi, cfg.rsi_threshold)
+
+        signals = np.full(len(buy), Signal.HOLD.value, dtype=np.int8)
+        signals[buy] = Signal.BUY.value
+        return signals
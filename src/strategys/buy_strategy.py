@@ -0,0 +1,23 @@
+from src.strategys.abstract_strategy import AbstractStrategy
+from src.utilities.enums import Signal
+import numpy as np
+import pandas as pd
+from src.configuration import Configuration
+
+
+class BuyStrategy(AbstractStrategy):
+    """
+    Always generates a buy signal. Used for testing order placement.
+    """
+
+    @staticmethod
+    def generate_signals(historical_data: pd.DataFrame, cfg: Configuration):
+        return Signal.BUY
+
+    @classmethod
+    def generate_signal(cls, indicators, cfg: Configuration):
+        return Signal.BUY
+
+    @classmethod
+    def generate_signal_series(cls, indicators, cfg: Configuration):
+        return np.full(len(indicators), Signal.BUY.value, dtype=np.int8)
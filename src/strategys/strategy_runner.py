@@ -0,0 +1,107 @@
+import time
+import logging
+import pandas as pd
+from src.strategys.bb_rsi_strategy import BollingerBandRSIStrategy
+from src.strategys.buy_strategy import BuyStrategy
+from src.utilities.technical_analysis import SharedIndicators
+from src.indicators.cache import CachedIndicators
+from src.market_data.bar_buffer import BarBuffer
+from src.utilities.enums import Signal
+from src.configuration import Configuration
+from src.monitoring.metrics import metrics
+
+
+# Strategy types available to the 'strategy' setting and Strategy_<name> sections
+STRATEGIES = {
+    'bollinger_rsi': BollingerBandRSIStrategy,
+    'buy': BuyStrategy,   #for testing - always buys
+}
+
+
+def get_strategy(strategy_type: str):
+    """Strategy class registered under the given type"""
+    if strategy_type not in STRATEGIES:
+        raise ValueError(f"Invalid strategy: {strategy_type}. Available strategies: {list(STRATEGIES)}")
+    return STRATEGIES[strategy_type]
+
+
+class StrategyRunner:
+    """Evaluates the strategies of one instrument on a shared window of bars.
+
+    Indicators are read from the shared IndicatorCache, so they are computed
+    once per parameter set and shared between the strategies. When the runner
+    is given the instrument's bar buffer, the cached indicators of the buffer
+    are updated incrementally as bars are added, otherwise they are computed
+    over the bars passed to evaluate(). The CPU time of each
+    evaluation is exported per strategy and in total per bar, labelled with
+    the number of strategies, so the cost of adding strategies can be
+    followed.
+    """
+
+    def __init__(self, ticker: str, configs: dict, market_data: BarBuffer = None):
+        """
+        :param ticker: Instrument the strategies trade
+        :param configs: Configuration of each strategy keyed by strategy name
+        :param market_data: Bar buffer of the instrument, enables evaluate() without bars
+        """
+        if not configs:
+            raise ValueError(f"No strategies configured for {ticker}")
+
+        self.ticker = ticker
+        self.strategies = {name: (get_strategy(cfg.strategy), cfg) for name, cfg in configs.items()}
+        self.last_cpu_seconds = 0.0
+        self.indicators = CachedIndicators(market_data) if market_data is not None else None
+
+        self._cpu_per_bar = metrics.histogram(
+            'strategy_runner_cpu_seconds',
+            'CPU time to evaluate all strategies of an instrument on one bar',
+            labels={'ticker': ticker, 'strategies': len(self.strategies)})
+        self._cpu_per_strategy = {
+            name: metrics.histogram(
+                'strategy_cpu_seconds',
+                'CPU time of one strategy evaluation',
+                labels={'ticker': ticker, 'strategy': name})
+            for name in self.strategies
+        }
+
+    def evaluate(self, historical_data: pd.DataFrame = None) -> dict:
+        """Signal of every strategy, keyed by strategy name. Strategies are 
+        evaluated on the given bars or, if none are given, on the bar buffer
+        with its incrementally updated cached indicators."""
+        start = time.thread_time()
+
+        if historical_data is None:
+            if self.indicators is None:
+                raise ValueError("No bars to evaluate: the runner has no bar buffer")
+            indicators = self.indicators
+        else:
+            indicators = SharedIndicators(historical_data)
+
+        signals = {}
+        for name, (strategy, cfg) in self.strategies.items():
+            strategy_start = time.thread_time()
+            signals[name] = strategy.generate_signal(indicators, cfg)
+            self._cpu_per_strategy[name].observe(time.thread_time() - strategy_start)
+
+        self.last_cpu_seconds = time.thread_time() - start
+        self._cpu_per_bar.observe(self.last_cpu_seconds)
+
+        logging.debug("%s: Evaluated %s strategies with %s indicator(s) in %.3fms CPU",
+                      self.ticker, len(self.strategies), indicators.computed, self.last_cpu_seconds * 1e3)
+        return signals
+
+    def evaluate_series(self, historical_data: pd.DataFrame) -> dict:
+        """Signals of every strategy for all bars, as int8 Signal values keyed
+        by strategy name. Equal to evaluate() on each prefix of the bars."""
+        indicators = SharedIndicators(historical_data)
+
+        return {name: strategy.generate_signal_series(indicators, cfg)
+                for name, (strategy, cfg) in self.strategies.items()}
+
+    @staticmethod
+    def aggregate(signals: dict) -> dict:
+        """Number of strategies per generated signal"""
+        counts = {signal: 0 for signal in Signal}
+        for signal in signals.values():
+            counts[signal] += 1
+        return counts
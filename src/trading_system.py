@@ -1,29 +1,38 @@
-from src.utilities.logger import Logger
-import time
-from datetime import datetime
 from src.risk_manager import RiskManager
 import logging
 from src.api.ibkr_api import IBConnection
 from src.configuration import Configuration
-from src.strategys.bb_rsi_strategy import BollingerBandRSIStrategy
+from src.strategys.strategy_runner import StrategyRunner
 from src.utilities.enums import Signal
 from src.db.database import Database
 import pandas as pd
 import os
-import shutil
 from src.portfolio.portfolio_manager import PortfolioManager
+from src.market_data.bar_buffer import BarBuffer
+from src.market_data.market_data_store import MarketDataStore, contract_key
+from src.market_data.continuous_contract import ContinuousContract
+from src.market_data.data_quality import DataQuality
+from src.api.api_utils import historical_duration, backfill_duration
+from src.monitoring.instrumentation import instrumentation
+from src.monitoring.metrics import metrics, MetricsServer, resident_memory_bytes
+from src.monitoring.startup_profile import startup_profile
+from src.utilities.logger import Logger
+from src.utilities.snapshot import write_snapshot, read_snapshot, SnapshotError
+from src.utilities.utils import trading_day_start_time_ts, shift_date_by_period
+from src.utilities.clock import clock
 
 
+# Gaps of one batch of bars requested again, further gaps are left unfilled
+MAX_BACKFILL_REQUESTS = 3
 
-class TradingSystem:
 
-    def __init__(self, cfg: Configuration):
-        self.api = IBConnection(
-            cfg.ib_host, 
-            cfg.ib_port, 
-            cfg.ib_client_id, 
-            cfg.timeout,
-            cfg.timezone)
+class TradingInstrument:
+    """Per-instrument state of the trading system: configuration view, 
+    strategies with their portfolio sub-accounts, risk limits and market data."""
+
+    def __init__(self, cfg: Configuration, api: IBConnection, db: Database):
+        self.config = cfg
+        self.ticker = cfg.ticker
         self.risk_manager = RiskManager(
             cfg.timezone, 
             cfg.trading_start_time, 
@@ -32,29 +41,87 @@ class TradingSystem:
             cfg.trading_pause_hours, 
             cfg.mnq_tick_size, 
             cfg.stop_loss_ticks, 
-            cfg.take_profit_ticks)
-        self.strategy = BollingerBandRSIStrategy()
+            cfg.take_profit_ticks,
+            cfg.ticker)
+
+        # Each strategy trades its own sub-account. Orders are only tagged with 
+        # the strategy name when several strategies share the instrument.
+        multiple_strategies = len(cfg.strategies) > 1
+        self.portfolio_managers = {
+            name: PortfolioManager(cfg.for_strategy(name), api, db, name if multiple_strategies else None)
+            for name in cfg.strategies
+        }
+        self.market_data = BarBuffer(cfg.bar_buffer_capacity, cfg.timezone)
+        self.strategy_runner = StrategyRunner(
+            self.ticker, 
+            {name: portfolio_manager.config for name, portfolio_manager in self.portfolio_managers.items()},
+            self.market_data)
+
+        self.data_quality = DataQuality(self.ticker, cfg.bar_size)
+
+        # Set when the next historical request must cover the full horizon
+        self.full_window_required = True
+
+    def get_current_contract(self):
+        return next(iter(self.portfolio_managers.values())).get_current_contract()
+
+    def daily_pnl(self):
+        """Daily PnL summed over the strategy sub-accounts"""
+        return sum(portfolio_manager.daily_pnl() for portfolio_manager in self.portfolio_managers.values())
+
+    def number_of_contracts(self):
+        """Number of contracts traded by all strategy sub-accounts"""
+        return sum(portfolio_manager.config.number_of_contracts for portfolio_manager in self.portfolio_managers.values())
+
+
+class TradingSystem:
+
+    def __init__(self, cfg: Configuration, api: IBConnection = None, db: Database = None, output_dir: str = None):
+        """
+        :param cfg: Configuration instance
+        :param api: Connection to the broker, an IBConnection to TWS unless given
+        :param db: Order database, trading.db in the working directory unless given
+        :param output_dir: Directory of the output files, output/ in the working directory unless given
+        """
+        self.output_dir = os.path.join(os.getcwd(), "output") if output_dir is None else output_dir
+
+        instrumentation.configure(
+            cfg.instrumentation, 
+            os.path.join(self.output_dir, "timings"))
+
+        self.api = api if api is not None else IBConnection(
+            cfg.ib_host, 
+            cfg.ib_port, 
+            cfg.ib_client_id, 
+            cfg.timeout,
+            cfg.timezone)
         self.config = cfg
-        self.db = Database(self.config.timezone)
-        self.portfolio_manager = PortfolioManager(cfg, self.api, self.db)
+        self.db = db if db is not None else Database(self.config.timezone)
+
+        # All instruments share the connection, the database and the trading loop
+        self.instruments = {
+            symbol: TradingInstrument(cfg.for_instrument(symbol), self.api, self.db) 
+            for symbol in cfg.instruments
+        }
 
-        self.market_data = pd.DataFrame()
+        # Trading calendar checks are common to all instruments
+        self.risk_manager = next(iter(self.instruments.values())).risk_manager
+
+        self.market_data_store = MarketDataStore(
+            os.path.join(self.output_dir, "market_data"), 
+            cfg.timezone)
+
+        self.snapshot_path = os.path.join(self.output_dir, "snapshot.bin")
+        self._new_bars = False
+
+        self.metrics_server = MetricsServer(metrics, cfg.metrics_port) if cfg.metrics_port > 0 else None
+        self._register_gauges()
         
         
     def start(self):
         """Start the trading system"""
         try:
-            self._save_config()
-            logging.info("Starting trading system...")
-
-            if self.config.paper_trading:
-                logging.info("Paper trading mode enabled")
-            else:
-                logging.info("Live trading mode enabled")
-
-            self.api.connect()
-            self.portfolio_manager.populate_from_db() 
-            self.risk_manager.populate_from_db(self.db)
+            self._startup()
 
             while True:
 
@@ -63,7 +130,7 @@ class TradingSystem:
 
                 except Exception as e:
                     logging.error(f"Error in trading loop: {str(e)}")
-                    time.sleep(10)  
+                    clock.sleep(10)  
 
         except ConnectionError as e:
             logging.error(f"Failed to connect to Interactive Brokers: {str(e)}")
@@ -77,163 +144,445 @@ class TradingSystem:
         finally:
             self.api.disconnect()
             self._save_market_data()
+            self._save_snapshot()
+            instrumentation.log_summary()
+            self._dump_metrics()
+
+            if self.metrics_server is not None:
+                self.metrics_server.stop()
 
             logging.info("Trading system shut down")
             
             
+    def _startup(self):
+        """Connect and load the portfolio and market data state. Phases are 
+        timed by the startup profile."""
+        self._save_config()
+        logging.info("Starting trading system...")
+
+        if self.config.paper_trading:
+            logging.info("Paper trading mode enabled")
+        else:
+            logging.info("Live trading mode enabled")
+
+        if self.metrics_server is not None:
+            self.metrics_server.start()
+
+        with startup_profile.phase("connect"):
+            self.api.connect()
+
+        with startup_profile.phase("restore_snapshot"):
+            restored = self._restore_snapshot() if self.config.warm_restart else set()
+
+        if self.config.save_market_data:
+            with startup_profile.phase("load_market_data"):
+                self._load_market_data()
+
+        with startup_profile.phase("populate_from_db"):
+            for ticker, instrument in self.instruments.items():
+                for name, portfolio_manager in instrument.portfolio_managers.items():
+                    if (ticker, name) not in restored:
+                        portfolio_manager.populate_from_db() 
+                instrument.risk_manager.populate_from_db(self.db)
+
+        logging.info("Trading system ready %.2fs after start", startup_profile.elapsed())
+
+    def profile_startup(self):
+        """Run the startup sequence, log the startup profile and shut down 
+        without trading"""
+        try:
+            self._startup()
+
+        except ConnectionError as e:
+            logging.error(f"Failed to connect to Interactive Brokers: {str(e)}")
+
+        finally:
+            startup_profile.disable_import_profiling()
+            startup_profile.log_report()
+
+            self.api.disconnect()
+            if self.metrics_server is not None:
+                self.metrics_server.stop()
+
     def _trading_loop(self):
         """Main trading loop"""
-        previous_day = pd.Timestamp.now(tz=self.config.timezone).date()
-
         while True:
-            logging.info(f"Starting trading loop")
+            logging.info("Starting trading loop")
             loop_sleep_time = 30
+            instrumentation.begin_iteration()
 
-            now = pd.Timestamp.now(tz=self.config.timezone)
-            if now.date() > previous_day:
-                Logger(now.date()) # Create new log file for new day to avoid excessively large files
-                previous_day = now.date()
+            now = clock.now(tz=self.config.timezone)
 
             if not self.risk_manager.is_trading_day(now):
                 logging.warning("Not a trading day. Waiting...")
-                time.sleep(60)
+                clock.sleep(60)
                 continue
                 
             if not self.risk_manager.is_trading_hours(now):
                 logging.warning("Outside trading hours. Waiting...")
-                self.portfolio_manager.clear_orders_statuses_positions()
-                time.sleep(60)
-                continue
-            
-            if not self.risk_manager.can_resume_trading_after_pause(now):
-                logging.warning(f"Trading paused triggered until {self.risk_manager.pause_end_time}. Waiting...")
-                time.sleep(60)
+                for instrument in self.instruments.values():
+                    for portfolio_manager in instrument.portfolio_managers.values():
+                        portfolio_manager.clear_orders_statuses_positions()
+                clock.sleep(60)
                 continue
 
-            # Update or create positions from open orders
-            self.portfolio_manager.update_positions()
+            if self.api.reconnected:
+                logging.info("Connection (re-)established. Requesting full historical data windows.")
+                self.api.reconnected = False
+                for instrument in self.instruments.values():
+                    instrument.full_window_required = True
 
-            # Check for cancelled market orders and resubmit them if required
-            self.portfolio_manager.check_cancelled_market_order()
-                
-            # Check PnL for trading pause
-            logging.debug("Checking PnL for trading pause.")
-            pnl = self.portfolio_manager.daily_pnl()
-            logging.debug(f"PnL: {pnl}")
+            for instrument in self.instruments.values():
+                self._process_instrument(instrument, now)
+
+            # Check if it's near end of trading day (3:59 PM or later)
+            now = clock.now(tz=self.config.timezone)
+            eod_pnl = {}
+            for instrument in self.instruments.values():
+                eod_close = False
+                for portfolio_manager in instrument.portfolio_managers.values():
+                    eod_close |= instrument.risk_manager.perform_eod_close(
+                        now, 
+                        self.config.eod_exit_time,
+                        self.config.trading_end_time,
+                        portfolio_manager,
+                        wait_for_close=False)
+
+                if eod_close:
+                    eod_pnl[instrument.ticker] = instrument.daily_pnl()
+                    logging.info("End of day PnL %s: %s", instrument.ticker, eod_pnl[instrument.ticker])
 
-            if self.risk_manager.should_pause_trading(pnl, self.config.number_of_contracts):
-                logging.warning(f"PnL: {pnl} is below max 24h loss. Pausing trading.")
-                self.risk_manager.set_trading_pause_time(self.db)
+            if self.config.save_market_data:
+                with instrumentation.stage("save_market_data"):
+                    self._save_market_data()
+
+            if self._new_bars:
+                with instrumentation.stage("save_snapshot"):
+                    self._save_snapshot()
 
-                logging.warning(f"Trading paused until {self.risk_manager.pause_end_time}")
-                time.sleep(60)
+            instrumentation.end_iteration()
+            metrics.counter('trading_loop_iterations_total', 'Completed trading loop iterations').inc()
+            self._dump_metrics()
+
+            if eod_pnl:
+                df = pd.DataFrame({'ticker': list(eod_pnl.keys()), 'pnl': list(eod_pnl.values())})
+                df.to_csv(os.path.join(self.output_dir, 'eod_pnl.csv'), index=False)
+                
+                market_close = pd.Timestamp(
+                    now.year, now.month, now.day, 
+                    int(self.config.trading_end_time[:2]), 
+                    int(self.config.trading_end_time[2:]), 
+                    tz=self.config.timezone)
+                seconds_until_close = max((market_close - now).total_seconds(), 0)
+                logging.info("Sleeping for %s seconds until market close", seconds_until_close)
+                clock.sleep(seconds_until_close)
                 continue
 
-            self._check_trading_opportunities()
+            logging.info("Trading loop complete. Sleeping for %s seconds...", loop_sleep_time)
+            clock.sleep(loop_sleep_time)           
 
-            # Check if it's near end of trading day (3:59 PM or later)
-            now = pd.Timestamp.now(tz=self.config.timezone)
-            if self.risk_manager.perform_eod_close(
-                now, 
-                self.config.eod_exit_time,
-                self.config.trading_end_time,
-                self.portfolio_manager):
-                eod_pnl = self.portfolio_manager.daily_pnl()
-                df = pd.DataFrame({'pnl': [eod_pnl]})
-                df.to_csv(os.path.join(os.getcwd(), 'output', 'eod_pnl.csv'), index=False)
-                logging.info(f"End of day PnL: {eod_pnl}")
+    def _process_instrument(self, instrument: TradingInstrument, now: pd.Timestamp):
+        """Update positions, check risk limits and look for entries of one instrument"""
+        ticker = instrument.ticker
+        risk_manager = instrument.risk_manager
 
-            if self.config.save_market_data:
-                self._save_market_data()
+        if not risk_manager.can_resume_trading_after_pause(now):
+            logging.warning(f"{ticker}: Trading paused triggered until {risk_manager.pause_end_time}. Waiting...")
+            return
 
-            logging.info(f"Trading loop complete. Sleeping for {loop_sleep_time} seconds...")
-            time.sleep(loop_sleep_time)           
+        for portfolio_manager in instrument.portfolio_managers.values():
+            # Update or create positions from open orders
+            portfolio_manager.update_positions()
+
+            # Check for cancelled market orders and resubmit them if required
+            portfolio_manager.check_cancelled_market_order()
+            
+        # Check PnL for trading pause
+        logging.debug("%s: Checking PnL for trading pause.", ticker)
+        pnl = instrument.daily_pnl()
+        logging.debug("%s: PnL: %s", ticker, pnl)
+
+        if risk_manager.should_pause_trading(pnl, instrument.number_of_contracts()):
+            logging.warning(f"{ticker}: PnL: {pnl} is below max 24h loss. Pausing trading.")
+            risk_manager.set_trading_pause_time(self.db)
+
+            logging.warning(f"{ticker}: Trading paused until {risk_manager.pause_end_time}")
+            return
+
+        with instrumentation.stage("check_trading_opportunities"):
+            self._check_trading_opportunities(instrument)
         
-    def _check_trading_opportunities(self):
-        """Check for trading opportunities based on strategy"""
-        logging.debug("Checking for trading opportunities.")
+    def _check_trading_opportunities(self, instrument: TradingInstrument):
+        """Check for trading opportunities based on the instrument's strategies"""
+        logging.debug("%s: Checking for trading opportunities.", instrument.ticker)
+        market_data = instrument.market_data
 
         # Get historical data
-        contract = self.portfolio_manager.get_current_contract()
-        new_bars_df = self.api.get_historical_data(contract, 
-                                                   str(self.config.horizon), 
-                                                   str(self.config.bar_size),
-                                                   self.config.timezone)
+        contract = instrument.get_current_contract()
+        duration = self._historical_duration(instrument)
+        logging.debug("%s: Requesting %s of historical data.", instrument.ticker, duration)
+
+        with instrumentation.stage("historical_data"):
+            new_bars_df = self.api.get_historical_data(contract, 
+                                                       duration, 
+                                                       str(self.config.bar_size),
+                                                       self.config.timezone)
         
         if isinstance(new_bars_df, pd.DataFrame) and not new_bars_df.empty:
+            with instrumentation.stage("data_quality"):
+                new_bars_df = self._check_data_quality(instrument, contract, new_bars_df)
 
-            if self.market_data.empty:
-                self.market_data = new_bars_df
-
-            else:
-
-                if new_bars_df.index[-1] == self.market_data.index[-1]:
-                    logging.debug(f"Latest data timestamp obtained: {new_bars_df.index[-1]}. No new data since last loop.")
-                    return
-                else:
-                    logging.debug(f"Latest data timestamp obtained: {new_bars_df.index[-1]}. New data since last loop.")
+        if isinstance(new_bars_df, pd.DataFrame) and not new_bars_df.empty:
+            instrument.full_window_required = False
 
-                self.market_data = pd.concat([
-                    self.market_data, 
-                    new_bars_df[~new_bars_df.index.isin(self.market_data.index)]
-                    ])
-                self.market_data = self.market_data[~self.market_data.index.duplicated(keep='last')]
-                self.market_data.sort_index(inplace=True)
+            if (not market_data.empty and 
+                new_bars_df.index[-1] == market_data.last_timestamp):
+                logging.debug("Latest data timestamp obtained: %s. No new data since last loop.", new_bars_df.index[-1])
+                return
+            
+            logging.debug("Latest data timestamp obtained: %s. New data since last loop.", new_bars_df.index[-1])
+            with instrumentation.stage("merge_market_data"):
+                market_data.extend(new_bars_df)
+            self._new_bars = True
 
         else:
-            logging.error("No data returned from IBKR API")
+            logging.error(f"No {instrument.ticker} data returned from IBKR API")
             return
                 
-        if self.config.strategy == 'bollinger_rsi':
-            signal = self.strategy.generate_signals(self.market_data, self.config)
-        elif self.config.strategy == 'buy':
-            signal = Signal.BUY #for testing
-        else:
-            raise ValueError(f"Invalid strategy: {self.config.strategy}")
+        with instrumentation.stage("generate_signals"):
+            signals = instrument.strategy_runner.evaluate()
 
-        logging.info(f"Market data tail: {self.market_data.tail(10)}")
-        logging.info(f"Signal generated: {signal.name}")
+        if self.config.debug_dumps:
+            logging.debug("Market data tail: %s", market_data.to_frame(10))
 
-        position_quantity = self.portfolio_manager.current_position_quantity()
+        counts = StrategyRunner.aggregate(signals)
+        logging.info("%s: Signals generated: %s", instrument.ticker,
+                     ", ".join(f"{signal.name} x{count}" for signal, count in counts.items() if count))
+
+        for name, signal in signals.items():
+            metrics.counter('signals_total', 'Signals generated by the strategies', 
+                            labels={'ticker': instrument.ticker, 'strategy': name, 'signal': signal.name}).inc()
+            self._route_signal(instrument.portfolio_managers[name], signal, f"{instrument.ticker} ({name})")
+
+    def _route_signal(self, portfolio_manager: PortfolioManager, signal: Signal, account: str):
+        """Enter a position in the strategy's sub-account on a buy signal"""
+        position_quantity = portfolio_manager.current_position_quantity()
         if position_quantity > 0 and signal == Signal.BUY:
-            logging.info(f"Currently holding {position_quantity} shares of {self.config.ticker}. Cannot enter more.")
+            logging.info("%s: Currently holding %s contracts. Cannot enter more.", account, position_quantity)
 
-        elif self.portfolio_manager.has_pending_orders() and signal == Signal.BUY:
-            logging.info("Orders are pending. Cannot enter more.")
+        elif portfolio_manager.has_pending_orders() and signal == Signal.BUY:
+            logging.info("%s: Orders are pending. Cannot enter more.", account)
 
         elif position_quantity == 0 and signal == Signal.BUY:
-            self.portfolio_manager.place_bracket_order()
+            portfolio_manager.place_bracket_order()
 
         else:
-            logging.info("Not placing any orders")
+            logging.info("%s: Not placing any orders", account)
+
+    def _check_data_quality(self, instrument: TradingInstrument, contract, bars: pd.DataFrame) -> pd.DataFrame:
+        """Clean a batch of bars and request the bars missing from it. Each gap
+        gets its own request ending at the bar after it, up to
+        MAX_BACKFILL_REQUESTS per batch, instead of a full reload."""
+        market_data = instrument.market_data
+        last_timestamp = None if market_data.empty else market_data.last_timestamp
+        last_close = None if market_data.empty else float(market_data.column('close', 1)[0])
+
+        report = instrument.data_quality.check(bars, last_timestamp, last_close)
+        if not report.gaps:
+            return report.bars
+
+        backfills = [report.bars]
+        for before, after, missing in report.gaps[:MAX_BACKFILL_REQUESTS]:
+            duration = backfill_duration(before, after)
+            logging.info("%s: Backfilling %s bar(s) missing between %s and %s (%s)",
+                         instrument.ticker, missing, before, after, duration)
+
+            with instrumentation.stage("backfill"):
+                filled = self.api.get_historical_data(contract, 
+                                                      duration, 
+                                                      str(self.config.bar_size),
+                                                      self.config.timezone,
+                                                      end=after)
+            metrics.counter('market_data_backfill_requests_total', 'Historical data requests filling gaps',
+                            labels={'ticker': instrument.ticker}).inc()
+
+            if isinstance(filled, pd.DataFrame) and not filled.empty:
+                filled = filled[(filled.index > before) & (filled.index < after)]
+                metrics.counter('market_data_backfilled_bars_total', 'Bars received by gap backfill requests',
+                                labels={'ticker': instrument.ticker}).inc(len(filled))
+                backfills.insert(0, filled)
+
+        if len(report.gaps) > MAX_BACKFILL_REQUESTS:
+            logging.warning(f"{instrument.ticker}: {len(report.gaps) - MAX_BACKFILL_REQUESTS} gap(s) left unfilled")
+
+        if len(backfills) == 1:
+            return report.bars
+
+        # Bars of the batch win over backfilled copies of the same bar
+        bars = pd.concat(backfills)
+        bars = bars[~bars.index.duplicated(keep='last')].sort_index()
+        return bars
+
+    def _historical_duration(self, instrument: TradingInstrument):
+        """Duration of the next historical data request. Only the gap since the 
+        last stored bar is requested, unless a full window is required."""
+        if instrument.full_window_required:
+            return str(self.config.horizon)
+
+        return historical_duration(
+            instrument.market_data.last_timestamp,
+            clock.now(tz=self.config.timezone),
+            self.config.bar_size,
+            self.config.horizon)
+
+    def _register_gauges(self):
+        """Gauges computed when metrics are collected"""
+        metrics.gauge('process_resident_memory_bytes', 'Resident memory size').set_function(resident_memory_bytes)
+        metrics.gauge('log_queue_depth', 'Log records waiting to be written').set_function(Logger.queue_depth)
+        metrics.gauge('ibkr_message_queue_depth', 'Messages from IBKR waiting to be processed').set_function(
+            lambda: self.api.msg_queue.qsize() if getattr(self.api, 'msg_queue', None) is not None else None)
+        for ticker, instrument in self.instruments.items():
+            metrics.gauge('bar_buffer_size', 'Bars held in memory', labels={'ticker': ticker}).set_function(
+                lambda market_data=instrument.market_data: len(market_data))
+
+    def _dump_metrics(self):
+        """Write the current metrics to output/metrics.prom"""
+        try:
+            metrics.dump(os.path.join(self.output_dir, "metrics.prom"))
+        except OSError as e:
+            logging.error(f"Failed to write metrics file: {e}")
 
     def _save_config(self):
-        """Save configuration file to outputs for audit purposes"""
+        """Save the loaded configuration to outputs for audit purposes"""
         # Create output directory if it doesn't exist
-        output_dir = os.path.join(os.getcwd(), "output")
-        os.makedirs(output_dir, exist_ok=True)
+        os.makedirs(self.output_dir, exist_ok=True)
         
         # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%d%m%Y")
+        timestamp = clock.now().strftime("%d%m%Y")
         filename = f"config_{timestamp}.cfg"
-        filepath = os.path.join(output_dir, filename)
+        filepath = os.path.join(self.output_dir, filename)
         
-        shutil.copy2('run.cfg', filepath)
-        logging.info(f"Configuration saved to {filepath}")
+        with open(filepath, 'w') as f:
+            self.config.config.write(f)
+        logging.info("Configuration saved to %s", filepath)
 
     def _save_market_data(self):
-        """Save historical data to CSV file"""
-        if not self.market_data.empty:
-            logging.info("Saving market data to CSV file...")
+        """Append new bars to the on-disk market data store"""
+        for instrument in self.instruments.values():
+            if instrument.market_data.empty:
+                continue
+
+            contract = instrument.get_current_contract()
+            key = contract_key(contract, self.config.bar_size)
+
+            appended = self.market_data_store.append(key, instrument.market_data.window())
+            logging.info("Saved %s new bar(s) of %s to %s", appended, key, self.market_data_store.root)
+
+    def _load_market_data(self):
+        """Fill the empty bar buffers from the on-disk market data store, so
+        only the gap since the latest stored bar has to be requested. Bars of
+        contracts rolled within the horizon are back-adjusted to the current
+        contract, so the indicators do not restart at a roll."""
+        now = clock.now(tz=self.config.timezone)
+        start = shift_date_by_period(self.config.horizon, now, "-")
+
+        for ticker, instrument in self.instruments.items():
+            if not instrument.market_data.empty:
+                continue
+
+            contract = instrument.get_current_contract()
+            series = ContinuousContract(
+                self.market_data_store,
+                contract.symbol,
+                self.config.bar_size,
+                instrument.config.roll_contract_days_before,
+                self.config.timezone)
+            bars = series.read(start, now)
+
+            # The latest stored bars must be of the current contract
+            if not series.contracts or series.contracts[-1] != contract.lastTradeDateOrContractMonth:
+                continue
+
+            n = len(bars['timestamp'])
+            instrument.market_data.set_state({name: values[max(0, n - instrument.market_data.capacity):]
+                                              for name, values in bars.items()})
+            instrument.full_window_required = instrument.market_data.empty
+            logging.info("Loaded %s %s bars up to %s from the market data store",
+                         len(instrument.market_data), ticker, instrument.market_data.last_timestamp)
+
+    def _save_snapshot(self):
+        """Checkpoint the bars and portfolio state of all instruments"""
+        state = {'instruments': {}}
+        for ticker, instrument in self.instruments.items():
+            state['instruments'][ticker] = {
+                'contract': contract_key(instrument.get_current_contract()),
+                'bars': instrument.market_data.get_state(),
+                'indicators': instrument.strategy_runner.indicators.get_state(),
+                'portfolios': {
+                    name: portfolio_manager.get_state() 
+                    for name, portfolio_manager in instrument.portfolio_managers.items()
+                },
+            }
+
+        try:
+            write_snapshot(self.snapshot_path, state)
+            self._new_bars = False
+            logging.debug("Saved snapshot to %s", self.snapshot_path)
+        except (OSError, TypeError, ValueError) as e:
+            logging.error(f"Failed to save snapshot: {str(e)}")
+
+    def _restore_snapshot(self):
+        """Restore bars and portfolio state from the last snapshot so only the gap
+        since the last bar has to be requested. A portfolio is only restored if 
+        the snapshot was taken during the current trading day and holds the 
+        latest orders of the database.
+
+        Returns:
+            set: (ticker, strategy name) of the restored portfolios
+        """
+        restored = set()
+        if not os.path.exists(self.snapshot_path):
+            logging.info("No snapshot found. Starting with empty market data.")
+            return restored
+
+        try:
+            snapshot = read_snapshot(self.snapshot_path)
+        except SnapshotError as e:
+            logging.warning(f"Ignoring snapshot: {str(e)}")
+            return restored
+
+        trading_day_start = trading_day_start_time_ts(self.config.trading_start_time, self.config.timezone)
+        current_trading_day = snapshot['created'] > trading_day_start
+
+        for ticker, saved in snapshot['state'].get('instruments', {}).items():
+            instrument = self.instruments.get(ticker)
+            if instrument is None:
+                continue
+
+            if saved['contract'] == contract_key(instrument.get_current_contract()):
+                try:
+                    instrument.market_data.set_state(saved['bars'])
+                    if 'indicators' in saved:
+                        instrument.strategy_runner.indicators.set_state(saved['indicators'])
+                    instrument.full_window_required = instrument.market_data.empty
+                    logging.info("Restored %s %s bars up to %s from snapshot",
+                                 len(instrument.market_data), ticker, instrument.market_data.last_timestamp)
+                except (KeyError, ValueError) as e:
+                    logging.warning(f"Ignoring {ticker} bars of snapshot: {str(e)}")
+                    instrument.market_data.clear()
+            else:
+                logging.info("Ignoring %s bars of snapshot: contract %s is no longer current", ticker, saved['contract'])
+
+            if not current_trading_day:
+                continue
+
+            for name, portfolio_state in saved.get('portfolios', {}).items():
+                portfolio_manager = instrument.portfolio_managers.get(name)
+                if portfolio_manager is not None and portfolio_manager.is_state_current(portfolio_state):
+                    portfolio_manager.restore_state(portfolio_state)
+                    restored.add((ticker, name))
+
+        # Bars restored from the snapshot only need to be topped up
+        self.api.reconnected = False
+        return restored
 
-            # Create output directory if it doesn't exist
-            output_dir = os.path.join(os.getcwd(), "output")
-            os.makedirs(output_dir, exist_ok=True)
-            
-            # Generate filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d")
-            filename = f"market_data_{self.config.ticker}_{timestamp}.csv"
-            filepath = os.path.join(output_dir, filename)
-            
-            self.market_data.to_csv(filepath, index=True)
-            logging.info(f"Market data saved to {filepath}")
\ No newline at end of file
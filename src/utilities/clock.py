@@ -0,0 +1,123 @@
+import time
+from contextlib import contextmanager
+import pandas as pd
+
+
+class ClockStopped(BaseException):
+    """Raised when a simulated clock is asked to advance past its end time.
+    Derives from BaseException so that the error handling of the trading loop,
+    which catches Exception, stops instead of retrying."""
+
+
+class WallClock:
+    """The system clock"""
+
+    def now(self, tz=None) -> pd.Timestamp:
+        return pd.Timestamp.now(tz=tz)
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+
+class SimulatedClock:
+    """Virtual clock that only moves when slept on or advanced.
+
+    Sleeping advances the virtual time immediately and notifies the listeners,
+    e.g. a simulated broker filling orders up to the new time. Advancing past
+    the optional end time raises ClockStopped.
+    """
+
+    def __init__(self, start: pd.Timestamp, end: pd.Timestamp = None):
+        start = pd.Timestamp(start)
+        if start.tzinfo is None:
+            raise ValueError("Simulated clock times must be timezone aware")
+
+        self._now = start.tz_convert('UTC')
+        self.end = None if end is None else pd.Timestamp(end).tz_convert('UTC')
+        self.listeners = []
+
+    def now(self, tz=None) -> pd.Timestamp:
+        return self._now.tz_convert(tz) if tz is not None else self._now.tz_convert(None)
+
+    def sleep(self, seconds: float):
+        self.advance_to(self._now + pd.Timedelta(seconds=max(seconds, 0)))
+
+    def advance_to(self, timestamp: pd.Timestamp):
+        """Move the virtual time forward to timestamp"""
+        timestamp = pd.Timestamp(timestamp).tz_convert('UTC')
+        if timestamp < self._now:
+            raise ValueError(f"Cannot move the simulated clock back from {self._now} to {timestamp}")
+
+        if self.end is not None and timestamp > self.end:
+            self._now = self.end
+            raise ClockStopped(f"Simulated clock reached its end time {self.end}")
+
+        self._now = timestamp
+        for listener in self.listeners:
+            listener(timestamp)
+
+
+class AcceleratedClock(SimulatedClock):
+    """Simulated clock that also waits on the system clock when slept on,
+    speed times faster than real time, e.g. to replay a day of bars at 100x.
+
+    Only sleeps are paced: the virtual time does not move while the trading
+    system computes, so the replay is as deterministic as with a
+    SimulatedClock. A speed of None does not wait at all.
+    """
+
+    def __init__(self, start: pd.Timestamp, end: pd.Timestamp = None, speed: float = None):
+        if speed is not None and speed <= 0:
+            raise ValueError(f"Invalid clock speed: {speed}. The speed must be positive")
+
+        super().__init__(start, end)
+        self.speed = speed
+
+    def sleep(self, seconds: float):
+        if self.speed is not None and seconds > 0:
+            if self.end is not None:
+                seconds_left = max((self.end - self._now).total_seconds(), 0)
+                time.sleep(min(seconds, seconds_left) / self.speed)
+            else:
+                time.sleep(seconds / self.speed)
+        super().sleep(seconds)
+
+
+class Clock:
+    """Clock of the trading components. Uses the system clock unless a
+    simulated clock is installed, e.g. by a backtest."""
+
+    def __init__(self):
+        self._clock = WallClock()
+
+    @property
+    def simulated(self) -> bool:
+        return not isinstance(self._clock, WallClock)
+
+    def now(self, tz=None) -> pd.Timestamp:
+        """Current time, timezone aware if tz is given"""
+        return self._clock.now(tz)
+
+    def sleep(self, seconds: float):
+        self._clock.sleep(seconds)
+
+    def install(self, clock):
+        """Use the given clock until reset"""
+        self._clock = clock
+
+    def reset(self):
+        """Go back to the system clock"""
+        self._clock = WallClock()
+
+    @contextmanager
+    def using(self, clock):
+        """Use the given clock within the context"""
+        previous = self._clock
+        self._clock = clock
+        try:
+            yield clock
+        finally:
+            self._clock = previous
+
+
+clock = Clock()
@@ -1,37 +1,234 @@
 import os
-from datetime import datetime
+import gzip
+import time
+import queue
+import atexit
+import shutil
+import threading
+from datetime import datetime, timedelta
 import logging
+import logging.handlers
+
+
+MAX_LOG_FILE_BYTES = 50 * 1024 * 1024
+
+# Rate limiting of repetitive DEBUG/INFO messages
+RATE_LIMIT_MESSAGES = 20
+RATE_LIMIT_INTERVAL_SECONDS = 60
 
 
 class Logger:
-    
-    def __init__(self, timestamp: str = None):
+    """Set up asynchronous logging for the root logger.
+
+    Log calls on the trading thread only put the (unformatted) record on a
+    queue. A dedicated listener thread formats the records and writes them to
+    the console and to a daily log file, which is also rotated when it grows
+    beyond max_bytes. Rotated files are gzipped in the background.
+    """
+
+    _listener = None
+    _queue = None
+
+    def __init__(self, timestamp: str = None, max_bytes: int = MAX_LOG_FILE_BYTES):
         output_path = os.path.join(os.getcwd(), "output")
-        timestmp = timestamp if timestamp is not None else datetime.now()       
-         
-        filename_timestmp = os.path.join(output_path, f"Logger_{timestmp.strftime('%d%m%Y')}.log")
+        timestmp = timestamp if timestamp is not None else datetime.now()
 
         if not os.path.exists(output_path):
             os.makedirs(output_path)
 
         # Get the root logger
         logger = logging.getLogger()
-        
-        # Remove all existing handlers
+
+        # Stop a previously started listener and remove all existing handlers
+        Logger.stop()
         for handler in logger.handlers[:]:
             logger.removeHandler(handler)
-        
+            handler.close()
+
         # Create new file handler
-        file_handler = logging.FileHandler(filename_timestmp, mode='w')
+        file_handler = DailyRotatingFileHandler(output_path, timestmp, max_bytes)
         file_handler.setFormatter(logging.Formatter('%(asctime)s.%(msecs)03d - %(levelname)s - %(message)s'))
-        logger.addHandler(file_handler)
-        
+
         # Add console handler
         console_handler = logging.StreamHandler()
         console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-        logger.addHandler(console_handler)
-        
+
+        log_queue = queue.SimpleQueue()
+        Logger._queue = log_queue
+        queue_handler = LazyQueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter(RATE_LIMIT_MESSAGES, RATE_LIMIT_INTERVAL_SECONDS))
+        logger.addHandler(queue_handler)
+
+        Logger._listener = logging.handlers.QueueListener(
+            log_queue, file_handler, console_handler, respect_handler_level=True)
+        Logger._listener.start()
+
         # Set level
         logger.setLevel(logging.DEBUG)
-        
+
         logging.info("Logger initialized")
+
+    @staticmethod
+    def queue_depth():
+        """Number of records waiting to be written, None if not started"""
+        return Logger._queue.qsize() if Logger._queue is not None else None
+
+    @staticmethod
+    def stop():
+        """Flush all queued records and stop the writer thread"""
+        if Logger._listener is not None:
+            Logger._listener.stop()
+            for handler in Logger._listener.handlers:
+                handler.close()
+            Logger._listener = None
+
+
+atexit.register(Logger.stop)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that defers message formatting to the listener thread.
+
+    The standard QueueHandler formats every record on the calling thread so it
+    can be pickled. Records here never leave the process, so they are enqueued
+    as-is and the %-style arguments are only rendered by the writer thread.
+    """
+
+    def prepare(self, record):
+        if record.exc_info:
+            # Tracebacks reference frames of the calling thread, render them now
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """Sample repetitive DEBUG/INFO messages.
+
+    At most max_messages records with the same logger, level and message
+    template are let through per interval. The first record of the next
+    interval reports how many records were suppressed. Warnings and errors
+    are never suppressed.
+
+    Messages are keyed on the unformatted template, so the hot path logs with
+    %-style arguments. Expired windows are pruned once per interval and at
+    most max_windows are tracked.
+    """
+
+    def __init__(self, max_messages: int, interval_seconds: float, max_windows: int = 1000):
+        super().__init__()
+        self.max_messages = max_messages
+        self.interval_seconds = interval_seconds
+        self.max_windows = max_windows
+        self._windows = {}
+        self._next_prune = 0.0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+
+        key = (record.name, record.levelno, record.msg)
+        now = record.created
+        if now >= self._next_prune:
+            self._prune(now)
+
+        window_start, count, suppressed = self._windows.get(key, (now, 0, 0))
+
+        if now - window_start >= self.interval_seconds:
+            if suppressed:
+                record.msg = f"{record.msg} ({suppressed} similar message(s) suppressed)"
+            self._windows[key] = (now, 1, 0)
+            return True
+
+        if count < self.max_messages:
+            if key not in self._windows and len(self._windows) >= self.max_windows:
+                self._prune(now)
+                if len(self._windows) >= self.max_windows:
+                    return True
+            self._windows[key] = (window_start, count + 1, suppressed)
+            return True
+
+        self._windows[key] = (window_start, count, suppressed + 1)
+        return False
+
+    def _prune(self, now: float):
+        """Drop the windows expired without suppressing any record"""
+        self._windows = {key: window for key, window in self._windows.items()
+                         if window[2] or now - window[0] < self.interval_seconds}
+        self._next_prune = now + self.interval_seconds
+
+
+class DailyRotatingFileHandler(logging.FileHandler):
+    """File handler writing to output/Logger_{ddmmYYYY}.log.
+
+    A new file is started when the day changes and the current file is rolled
+    over to Logger_{ddmmYYYY}.{n}.log when it exceeds max_bytes. Rolled over
+    files are compressed with gzip on a background thread.
+    """
+
+    def __init__(self, output_path: str, timestamp: datetime, max_bytes: int):
+        self.output_path = output_path
+        self.max_bytes = max_bytes
+        self._day = timestamp.date() if isinstance(timestamp, datetime) else timestamp
+        self._next_day_epoch = self._compute_next_day_epoch(self._day)
+
+        super().__init__(self._filename(self._day), mode='a', delay=False)
+
+    def emit(self, record):
+        try:
+            if self._should_rollover(record):
+                self._rollover(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        super().emit(record)
+
+    def _filename(self, day) -> str:
+        return os.path.join(self.output_path, f"Logger_{day.strftime('%d%m%Y')}.log")
+
+    def _should_rollover(self, record) -> bool:
+        if record.created >= self._next_day_epoch:
+            return True
+        return self.stream is not None and self.stream.tell() >= self.max_bytes
+
+    def _rollover(self, record):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+        if record.created >= self._next_day_epoch:
+            previous_filename = self.baseFilename
+            threading.Thread(target=_gzip_file, args=(previous_filename,), daemon=True).start()
+
+            self._day = datetime.fromtimestamp(record.created).date()
+            self._next_day_epoch = self._compute_next_day_epoch(self._day)
+            self.baseFilename = os.path.abspath(self._filename(self._day))
+        else:
+            rolled_filename = self._next_rolled_filename()
+            os.replace(self.baseFilename, rolled_filename)
+            threading.Thread(target=_gzip_file, args=(rolled_filename,), daemon=True).start()
+
+        self.stream = self._open()
+
+    def _next_rolled_filename(self) -> str:
+        base, ext = os.path.splitext(self.baseFilename)
+        n = 1
+        while os.path.exists(f"{base}.{n}{ext}") or os.path.exists(f"{base}.{n}{ext}.gz"):
+            n += 1
+        return f"{base}.{n}{ext}"
+
+    @staticmethod
+    def _compute_next_day_epoch(day) -> float:
+        next_day = datetime(day.year, day.month, day.day) + timedelta(days=1)
+        return time.mktime(next_day.timetuple())
+
+
+def _gzip_file(path: str):
+    """Compress a rolled over log file and remove the original"""
+    try:
+        with open(path, 'rb') as f_in, gzip.open(path + '.gz', 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(path)
+    except OSError as e:
+        logging.error(f"Failed to compress log file {path}: {e}")
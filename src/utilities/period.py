@@ -17,5 +17,16 @@ class Period:
         
         return tenor
 
+    def to_timedelta(self) -> pd.Timedelta:
+        """Convert a fixed-length period (minutes, days or weeks) to a Timedelta"""
+        if self.tenor in ("min", "mins"):
+            return pd.Timedelta(minutes=self.units)
+        elif self.tenor in ("d", "D"):
+            return pd.Timedelta(days=self.units)
+        elif self.tenor == "W":
+            return pd.Timedelta(weeks=self.units)
+        else:
+            raise ValueError(f"Period tenor {self.tenor} does not have a fixed length")
+
     def __str__(self):
         return str(self.units) + " " + self.tenor
@@ -0,0 +1,139 @@
+import os
+import json
+import struct
+import zlib
+import numpy as np
+import pandas as pd
+from src.utilities.clock import clock
+
+
+SNAPSHOT_MAGIC = b'IBKRSNAP'
+SNAPSHOT_VERSION = 1
+
+# magic, version, metadata length, crc32 of metadata and array data
+_HEADER = struct.Struct('<8sIII')
+_ALIGNMENT = 8
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, corrupt or of another version"""
+
+
+def write_snapshot(path: str, state: dict):
+    """Write a nested dict of state to a compact binary snapshot file.
+
+    NumPy arrays anywhere in the state are stored as raw column bytes after a
+    JSON metadata block, every other value must be JSON serializable
+    (timestamps are stored as ISO strings). The file is written to a temporary
+    file and moved into place, so a crash never leaves a partial snapshot.
+    """
+    arrays = []
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'created': clock.now(tz='UTC').isoformat(),
+        'state': _encode(state, arrays),
+    }
+
+    offset = 0
+    blobs = []
+    meta['arrays'] = []
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        meta['arrays'].append({
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'offset': offset,
+        })
+        blob = array.tobytes()
+        padding = -len(blob) % _ALIGNMENT
+        blobs.append(blob + b'\0' * padding)
+        offset += len(blob) + padding
+
+    meta_bytes = json.dumps(meta, default=_json_default).encode('utf-8')
+    meta_bytes += b' ' * (-(len(meta_bytes) + _HEADER.size) % _ALIGNMENT)
+    data = b''.join(blobs)
+
+    crc = zlib.crc32(data, zlib.crc32(meta_bytes))
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(meta_bytes), crc)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(meta_bytes)
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str) -> dict:
+    """Read a snapshot written by write_snapshot. Returns the state and the
+    snapshot creation time as {'created': pd.Timestamp, 'state': dict}.
+    Arrays are returned as read-only views of the file contents."""
+    try:
+        with open(path, 'rb') as f:
+            content = f.read()
+    except OSError as e:
+        raise SnapshotError(f"Cannot read snapshot {path}: {e}") from e
+
+    if len(content) < _HEADER.size:
+        raise SnapshotError(f"Snapshot {path} is truncated")
+
+    magic, version, meta_length, crc = _HEADER.unpack_from(content)
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError(f"{path} is not a snapshot file")
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Snapshot {path} has version {version}, expected {SNAPSHOT_VERSION}")
+
+    body = memoryview(content)[_HEADER.size:]
+    if zlib.crc32(body) != crc:
+        raise SnapshotError(f"Snapshot {path} is corrupt (checksum mismatch)")
+
+    meta = json.loads(bytes(body[:meta_length]).decode('utf-8'))
+    data = body[meta_length:]
+
+    arrays = []
+    for spec in meta['arrays']:
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        arrays.append(np.frombuffer(data, dtype=dtype, count=count, offset=spec['offset']).reshape(spec['shape']))
+
+    return {
+        'created': pd.Timestamp(meta['created']),
+        'state': _decode(meta['state'], arrays),
+    }
+
+
+def _encode(value, arrays: list):
+    if isinstance(value, np.ndarray):
+        arrays.append(value)
+        return {'__array__': len(arrays) - 1}
+    if isinstance(value, dict):
+        return {str(key): _encode(item, arrays) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item, arrays) for item in value]
+    return value
+
+
+def _decode(value, arrays: list):
+    if isinstance(value, dict):
+        if '__array__' in value and len(value) == 1:
+            return arrays[value['__array__']]
+        return {key: _decode(item, arrays) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item, arrays) for item in value]
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, (pd.Timestamp, pd.Timedelta)):
+        return value.isoformat()
+    raise TypeError(f"Cannot store {type(value).__name__} in a snapshot")
@@ -1,8 +1,9 @@
 import pandas as pd
 import numpy as np
-from ta.volatility import BollingerBands
-from ta.momentum import RSIIndicator
-
+from src.indicators import kernels
+from src.indicators.cache import CachedIndicators, FrameSeries, IndicatorCache
+from src.market_data.bar_buffer import BAR_COLUMNS, BarBuffer
+from src.market_data.resampler import bar_size_ns, resample_frame
 
 
 class TechnicalAnalysis:
@@ -20,36 +21,69 @@ class TechnicalAnalysis:
         self.rsi_period = config.rsi_period
         self.rsi_threshold = config.rsi_threshold
         
-    def calculate_bollinger_bands(self, close_prices):
-        """Calculate Bollinger Bands for the given close prices"""
-        indicator_bb = BollingerBands(
-            close=close_prices,
-            window=self.bollinger_period,
-            window_dev=self.bollinger_std
+    def calculate_bollinger_bands(self, close_prices, period=None, std=None):
+        """Calculate Bollinger Bands for the given close prices. The configured
+        period and standard deviation are used unless given."""
+        middle, upper, lower = kernels.bollinger_bands(
+            close_prices.to_numpy(dtype=np.float64),
+            window=self.bollinger_period if period is None else period,
+            window_dev=self.bollinger_std if std is None else std
         )
         
         return {
-            'middle': indicator_bb.bollinger_mavg(),
-            'upper': indicator_bb.bollinger_hband(),
-            'lower': indicator_bb.bollinger_lband()
+            'middle': pd.Series(middle, index=close_prices.index, name='mavg'),
+            'upper': pd.Series(upper, index=close_prices.index, name='hband'),
+            'lower': pd.Series(lower, index=close_prices.index, name='lband')
         }
     
-    def calculate_rsi(self, close_prices):
-        """Calculate RSI for the given close prices"""
-        indicator_rsi = RSIIndicator(
-            close=close_prices,
-            window=self.rsi_period
+    def calculate_rsi(self, close_prices, period=None):
+        """Calculate RSI for the given close prices. The configured period is 
+        used unless given."""
+        values = kernels.rsi(
+            close_prices.to_numpy(dtype=np.float64),
+            window=self.rsi_period if period is None else period
         )
-        return indicator_rsi.rsi()
+        return pd.Series(values, index=close_prices.index, name='rsi')
         
     def calculate_indicators(self, historical_data):
         """Calculate Bollinger Bands and RSI for the given historical data"""
+        close = historical_data['close'].to_numpy(dtype=np.float64)
+
         # Calculate Bollinger Bands
-        bb_data = self.calculate_bollinger_bands(close_prices=historical_data['close'])
+        middle, upper, lower = kernels.bollinger_bands(close, self.bollinger_period, self.bollinger_std)
         
-        historical_data.loc[:, 'bb_middle'] = bb_data['middle']
-        historical_data.loc[:, 'bb_upper'] = bb_data['upper']
-        historical_data.loc[:, 'bb_lower'] = bb_data['lower']
+        historical_data['bb_middle'] = middle
+        historical_data['bb_upper'] = upper
+        historical_data['bb_lower'] = lower
         
         # Calculate RSI
-        historical_data.loc[:, 'rsi'] = self.calculate_rsi(close_prices=historical_data['close'])
\ No newline at end of file
+        historical_data['rsi'] = kernels.rsi(close, self.rsi_period)
+
+
+class SharedIndicators(CachedIndicators):
+    """Indicators of one window of bars shared by all strategies evaluated on 
+    these bars. Indicators are served from the shared IndicatorCache, so each
+    is computed once per parameter set. Indicator values are arrays aligned
+    with the bars."""
+
+    def __init__(self, historical_data, cache: IndicatorCache = None):
+        super().__init__(FrameSeries(historical_data), cache)
+        self._timeframes = {}
+
+    def __len__(self):
+        return len(self.market_data)
+
+    @property
+    def data(self):
+        return self.market_data.frame
+
+    def timeframe(self, bar_size) -> BarBuffer:
+        """Bars of a larger bar size, e.g. '15min', including the bar being formed"""
+        key = bar_size_ns(bar_size)
+        if key not in self._timeframes:
+            timezone = str(self.data.index.tz)
+            bars = resample_frame(self.data[list(BAR_COLUMNS)], bar_size, timezone)
+            buffer = BarBuffer(max(len(bars), 2), timezone)
+            buffer.extend(bars)
+            self._timeframes[key] = buffer
+        return self._timeframes[key]
@@ -2,12 +2,12 @@ import sys
 import logging
 import pandas as pd
 import re
-from dateutil import relativedelta
 import pytz
-import holidays
 import configparser
 import os
 import datetime
+import functools
+from src.utilities.clock import clock
 
 
 def get_third_friday(year, month, timezone):
@@ -17,6 +17,13 @@ def get_third_friday(year, month, timezone):
     third_friday = first_friday + pd.Timedelta(days=14)
     return third_friday
 
+@functools.lru_cache(maxsize=None)
+def us_holidays(year: int) -> frozenset:
+    """US holiday dates of a year. The holiday table is built once per year
+    and shared, holidays is only imported on first use."""
+    import holidays
+    return frozenset(holidays.UnitedStates(years=year).keys())
+
 def load_config(config_path: str):
     config = configparser.ConfigParser()
     return config.read(config_path)
@@ -44,7 +51,7 @@ def timezone_from_calendar(calendar: str) -> str:
 def market_open(market_calendar='NYSE'):
     # Get the current time in the market's timezone as a pd.Timestamp
     timezone = timezone_from_calendar(market_calendar)
-    now = pd.Timestamp.now(tz=timezone)
+    now = clock.now(tz=timezone)
 
     market_open = pd.Timestamp(now.year, now.month, now.day, 9, 30, tz=timezone)
     market_close = pd.Timestamp(now.year, now.month, now.day, 16, 0, tz=timezone)
@@ -55,6 +62,7 @@ def market_open(market_calendar='NYSE'):
         sys.exit()
 
     # Check if it's a holiday
+    import holidays
     market_holidays = holidays.NYSE() if market_calendar == 'NYSE' else holidays.UnitedKingdom()  # Add more calendars as needed
     if now.strftime('%Y-%m-%d') in market_holidays:
         message = f"Market is closed today for {market_holidays.get(now.strftime('%Y-%m-%d'))}."
@@ -103,7 +111,7 @@ def trading_day_start_time_ts(start_time: str, timezone: str, day_offset: int =
     hours = int(start_time[:2])
     minutes = int(start_time[2:])
     
-    now = pd.Timestamp.now(tz=timezone)
+    now = clock.now(tz=timezone)
     start = pd.Timestamp(
         year=now.year,
         month=now.month,
@@ -2,7 +2,9 @@ import pytest
 import pandas as pd
 from datetime import datetime
 from ibapi.contract import Contract
-from src.api.api_utils import get_current_contract
+from src.api.api_utils import get_current_contract, historical_duration
+from src.utilities.clock import clock, SimulatedClock
+from src.utilities.period import Period
 
 
 class TestApiUtils:
@@ -17,9 +19,7 @@ class TestApiUtils:
         # Set a fixed date in the middle of a contract period
         test_date = pd.Timestamp("2025-03-01", tz=self.timezone)
 
-        with pytest.MonkeyPatch.context() as mp:
-            mp.setattr('pandas.Timestamp.now', lambda tz=None: test_date)
-            
+        with clock.using(SimulatedClock(test_date)):
             returned_contract = get_current_contract(
                 ticker="MNQ",
                 exchange="CME",
@@ -39,9 +39,7 @@ class TestApiUtils:
         """Test getting current contract when near expiry"""
         test_date = pd.Timestamp("2025-03-17", tz=self.timezone)
 
-        with pytest.MonkeyPatch.context() as mp:
-            mp.setattr('pandas.Timestamp.now', lambda tz=None: test_date)
-            
+        with clock.using(SimulatedClock(test_date)):
             returned_contract = get_current_contract(
                 ticker="MNQ",
                 exchange="CME",
@@ -61,9 +59,7 @@ class TestApiUtils:
         """Test getting current contract when near expiry"""
         test_date = pd.Timestamp("2025-03-14", tz=self.timezone)
 
-        with pytest.MonkeyPatch.context() as mp:
-            mp.setattr('pandas.Timestamp.now', lambda tz=None: test_date)
-            
+        with clock.using(SimulatedClock(test_date)):
             returned_contract = get_current_contract(
                 ticker="MNQ",
                 exchange="CME",
@@ -83,9 +79,7 @@ class TestApiUtils:
         """Test getting current contract when transitioning to next year"""
         test_date = pd.Timestamp("2025-12-01", tz=self.timezone)
 
-        with pytest.MonkeyPatch.context() as mp:
-            mp.setattr('pandas.Timestamp.now', lambda tz=None: test_date)
-            
+        with clock.using(SimulatedClock(test_date)):
             returned_contract = get_current_contract(
                 ticker="MNQ",
                 exchange="CME",
@@ -105,9 +99,7 @@ class TestApiUtils:
         """Test getting current contract when transitioning to next year"""
         test_date = pd.Timestamp("2025-12-25", tz=self.timezone)
 
-        with pytest.MonkeyPatch.context() as mp:
-            mp.setattr('pandas.Timestamp.now', lambda tz=None: test_date)
-            
+        with clock.using(SimulatedClock(test_date)):
             returned_contract = get_current_contract(
                 ticker="MNQ",
                 exchange="CME",
@@ -127,9 +119,7 @@ class TestApiUtils:
         """Test getting current contract with different roll_contract_days_before values"""
         test_date = pd.Timestamp("2025-06-12", tz=self.timezone)
         
-        with pytest.MonkeyPatch.context() as mp:
-            mp.setattr('pandas.Timestamp.now', lambda tz=None: test_date)
-            
+        with clock.using(SimulatedClock(test_date)):
             # Test with 5 days before roll
             contract_5_days = get_current_contract(
                 ticker="MNQ",
@@ -157,9 +147,7 @@ class TestApiUtils:
         """Test getting current contract with different timezone"""
         test_date = pd.Timestamp("2025-03-01", tz="UTC")
         
-        with pytest.MonkeyPatch.context() as mp:
-            mp.setattr('pandas.Timestamp.now', lambda tz=None: test_date)
-            
+        with clock.using(SimulatedClock(test_date)):
             # Test with US/Eastern timezone
             contract_eastern = get_current_contract(
                 ticker="MNQ",
@@ -179,4 +167,42 @@ class TestApiUtils:
             )
             
             # Should be the same contract regardless of timezone
-            assert contract_eastern.lastTradeDateOrContractMonth == contract_utc.lastTradeDateOrContractMonth 
\ No newline at end of file
+            assert contract_eastern.lastTradeDateOrContractMonth == contract_utc.lastTradeDateOrContractMonth 
+
+    def test_historical_duration_top_up(self):
+        """Test that only the gap since the last bar is requested"""
+        last_bar_time = pd.Timestamp("2025-03-18 09:00", tz=self.timezone)
+        now = pd.Timestamp("2025-03-18 09:01:30", tz=self.timezone)
+
+        duration = historical_duration(last_bar_time, now, Period("1min"), Period("1D"))
+
+        # Two bars back to the last bar and a one bar margin
+        assert duration == "180 S"
+
+    def test_historical_duration_margin(self):
+        """Test that exactly one bar is requested beyond the gap"""
+        last_bar_time = pd.Timestamp("2025-03-18 09:00", tz=self.timezone)
+
+        for gap, expected in ((0, "60 S"), (60, "120 S"), (61, "180 S"), (120, "180 S")):
+            now = last_bar_time + pd.Timedelta(seconds=gap)
+            assert historical_duration(last_bar_time, now, Period("1min"), Period("1D")) == expected
+        assert historical_duration(last_bar_time, last_bar_time + pd.Timedelta(minutes=10),
+                                   Period("5min"), Period("1D")) == "900 S"
+
+    def test_historical_duration_full_window(self):
+        """Test that the full horizon is requested when empty or after a large gap"""
+        now = pd.Timestamp("2025-03-18 09:00", tz=self.timezone)
+        last_bar_time = pd.Timestamp("2025-03-17 08:00", tz=self.timezone)
+
+        assert historical_duration(None, now, Period("1min"), Period("1D")) == "1 D"
+        assert historical_duration(last_bar_time, now, Period("1min"), Period("1D")) == "1 D"
+
+    def test_historical_duration_multi_day_horizon(self):
+        """Test that gaps beyond one day are requested in days"""
+        last_bar_time = pd.Timestamp("2025-03-17 03:00", tz=self.timezone)
+        now = pd.Timestamp("2025-03-18 09:00", tz=self.timezone)
+
+        # 30 hours exceed the 86400 S IBKR accepts for durations in seconds
+        assert historical_duration(last_bar_time, now, Period("1min"), Period("3D")) == "2 D"
+        assert historical_duration(last_bar_time, last_bar_time + pd.Timedelta(hours=23),
+                                   Period("1min"), Period("3D")) == "82860 S"
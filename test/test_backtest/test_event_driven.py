@@ -0,0 +1,57 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.configuration import Configuration
+from src.backtest.event_driven import EventDrivenBacktest
+from src.utilities.clock import clock
+
+
+class TestEventDrivenBacktest:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Set up test fixtures before each test method."""
+        config_path = os.path.join(os.getcwd(), "test", "test_strategy", "test_run.cfg")
+        self.cfg = Configuration(config_path)
+        self.cfg.strategy = 'buy'
+        self.cfg.strategies = {'buy': {'strategy': 'buy'}}
+        self.output_dir = str(tmp_path)
+
+        # One day of flat bars for the horizon, then a trend from Tuesday 08:00
+        self.index = pd.date_range("2025-03-17 08:00", "2025-03-18 12:00", freq="1min",
+                                   tz=self.cfg.timezone, inclusive="left")
+        self.warmup = 24 * 60
+
+    def _bars(self, step: float):
+        close = np.full(len(self.index), 20000.0)
+        close[self.warmup:] += step * np.arange(len(self.index) - self.warmup)
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        return pd.DataFrame({'open': open_, 'high': np.maximum(open_, close), 'low': np.minimum(open_, close),
+                             'close': close, 'volume': 1.0}, index=self.index)
+
+    def test_take_profits(self):
+        result = EventDrivenBacktest(self.cfg, {'MNQ': self._bars(1.0)}, self.output_dir).run()
+        trades = result.trades
+
+        # The buy strategy re-enters after each exit of the 75 point take profit
+        assert list(trades['exit_reason']) == ['take_profit'] * 3
+        assert trades['entry_time'].iloc[0] == pd.Timestamp("2025-03-18 08:00", tz=self.cfg.timezone)
+        assert trades['entry_price'].iloc[1] == trades['exit_price'].iloc[0]
+        assert trades['pnl'].iloc[0] == pytest.approx(75 * self.cfg.mnq_point_value * self.cfg.number_of_contracts)
+
+        summary = result.summary()
+        assert summary['events'] == result.events > 0
+        assert summary['events_per_second'] > 0
+        assert not clock.simulated
+        assert os.path.exists(os.path.join(self.output_dir, "trading.db"))
+        assert not [name for name in os.listdir(self.output_dir) if name.startswith("config_")]
+
+    def test_stop_loss_pauses_trading(self):
+        self.cfg.max_24h_loss_per_contract = 30 * self.cfg.mnq_point_value
+
+        result = EventDrivenBacktest(self.cfg, {'MNQ': self._bars(-1.0)}, self.output_dir).run()
+
+        assert list(result.trades['exit_reason']) == ['stop_loss']
+        assert result.trades['pnl'].iloc[0] < 0
+        assert len(result.pauses) == 1
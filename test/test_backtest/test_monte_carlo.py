@@ -0,0 +1,127 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from ibapi.order import Order
+from src.configuration import Configuration
+from src.backtest.monte_carlo import MonteCarlo, trades_from_orders
+from src.db.database import Database
+from src.utilities.clock import clock, SimulatedClock
+
+
+class TestMonteCarlo:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Set up test fixtures before each test method."""
+        config_path = os.path.join(os.getcwd(), "test", "test_strategy", "test_run.cfg")
+        self.cfg = Configuration(config_path)
+        self.cfg.number_of_contracts = 2
+        self.cfg.max_24h_loss_per_contract = 360
+        self.cfg.trading_pause_hours = 24
+
+        # Three sessions starting at 21:00, the first one losing 800 within two trades
+        def at(timestamp):
+            return pd.Timestamp(timestamp, tz=self.cfg.timezone)
+
+        self.trades = pd.DataFrame({
+            'entry_time': [at("2025-03-18 08:00"), at("2025-03-18 09:00"), at("2025-03-18 10:00"),
+                           at("2025-03-19 08:00"), at("2025-03-19 10:00"), at("2025-03-20 08:00")],
+            'exit_time': [at("2025-03-18 08:30"), at("2025-03-18 09:30"), at("2025-03-18 10:30"),
+                          at("2025-03-19 08:30"), at("2025-03-19 10:30"), at("2025-03-20 08:30")],
+            'pnl': [-400.0, -400.0, 1000.0, 200.0, 300.0, -100.0],
+            'quantity': 2,
+        })
+
+    def test_sessions(self):
+        simulator = MonteCarlo(self.cfg, self.trades, processes=1).simulator
+
+        assert simulator.pnl.shape == (3, 3)
+        assert list(simulator.valid.sum(axis=1)) == [3, 2, 1]
+        np.testing.assert_array_equal(simulator.pnl[0], [-200.0, -200.0, 500.0])
+        assert simulator.entry[1, 0] == pd.Timedelta(hours=11).value
+
+    def test_pause_follows_loss_limit(self):
+        simulator = MonteCarlo(self.cfg, self.trades, processes=1).simulator
+        history = np.array([[0, 1, 2]])
+
+        # The pause from 09:30 skips the 10:00 trade and the 08:00 trade of the next session
+        paths = simulator.simulate(history, 2, 360, 24)
+        assert paths['total_pnl'][0] == -600.0
+        assert paths['max_drawdown'][0] == 800.0
+        assert paths['pauses'][0] == 1
+        assert paths['trades'][0] == 4
+
+        paths = simulator.simulate(history, 2, 1e9, 24)
+        assert paths['total_pnl'][0] == 600.0
+        assert paths['pauses'][0] == 0
+        assert paths['trades'][0] == 6
+
+        # One contract halves the PnL and the loss limit
+        paths = simulator.simulate(history, 1, 360, 24)
+        assert paths['total_pnl'][0] == -300.0
+        assert paths['pauses'][0] == 1
+
+    def test_permutation_keeps_total_pnl(self):
+        result = MonteCarlo(self.cfg, self.trades, method='permutation', processes=1).run(
+            200, max_24h_loss_per_contract=1e9, seed=1)
+
+        np.testing.assert_allclose(result.paths['total_pnl'], 600.0)
+        assert set(result.paths['max_drawdown']) == {800.0, 900.0}
+        assert result.sessions == 3
+
+    def test_bootstrap_is_independent_of_processes(self):
+        single = MonteCarlo(self.cfg, self.trades, block_size=2, processes=1, batch_size=64).run(300, horizon=10, seed=7)
+        pooled = MonteCarlo(self.cfg, self.trades, block_size=2, processes=2, batch_size=64).run(300, horizon=10, seed=7)
+
+        pd.testing.assert_frame_equal(single.table(), pooled.table())
+        assert len(single.table()) == 300
+        assert single.sessions == 10
+        assert single.paths['trades'].max() <= 10 * 3
+
+        summary = single.summary()
+        assert 0 < summary['pause_probability'] < 1
+        assert summary['max_drawdown_p50'] <= summary['max_drawdown_p95'] <= summary['max_drawdown_p99']
+        assert list(single.percentiles((5, 50, 95)).index) == [5, 50, 95]
+
+    def test_sizing_table(self):
+        table = MonteCarlo(self.cfg, self.trades, processes=1).sizing_table([1, 2], [200, 1000], paths=100)
+
+        assert len(table) == 4
+        loose = table[table['max_24h_loss_per_contract'] == 1000]
+        assert (loose['pause_probability'] == 0).all()
+
+    def test_invalid_method(self):
+        with pytest.raises(ValueError):
+            MonteCarlo(self.cfg, self.trades, method='jackknife')
+
+    def test_trades_from_db(self, tmp_path):
+        db = Database(self.cfg.timezone, str(tmp_path / "trading.db"))
+
+        def order(order_id, action, order_type, parent_id=0):
+            order = Order()
+            order.orderId, order.action, order.orderType = order_id, action, order_type
+            order.totalQuantity, order.parentId, order.transmit = 2, parent_id, True
+            return order
+
+        def fill(order_id, price, timestamp):
+            with clock.using(SimulatedClock(pd.Timestamp(timestamp, tz=self.cfg.timezone))):
+                db.add_order_status(order_id, {
+                    'status': 'Filled', 'filled': 2, 'remaining': 0, 'avg_fill_price': price,
+                    'last_fill_price': price, 'parent_id': 0, 'why_held': '', 'mkt_cap_price': 0.0,
+                    'perm_id': 0, 'client_id': 1})
+
+        # A take profit, then a position closed by the end of day market order
+        db.add_order([order(1, 'BUY', 'MKT'), order(2, 'SELL', 'LMT', 1), order(3, 'SELL', 'STP', 1)], 'MNQ')
+        db.add_order([order(4, 'BUY', 'MKT'), order(5, 'SELL', 'LMT', 4), order(6, 'SELL', 'STP', 4)], 'MNQ')
+        db.add_order(order(7, 'SELL', 'MKT'), 'MNQ')
+        fill(1, 20000.0, "2025-03-18 08:00")
+        fill(2, 20075.0, "2025-03-18 08:20")
+        fill(4, 20100.0, "2025-03-18 09:00")
+        fill(7, 20090.0, "2025-03-18 15:59")
+
+        trades = trades_from_orders(db.get_filled_orders('MNQ'), self.cfg.mnq_point_value, self.cfg.timezone)
+
+        assert list(trades['exit_reason']) == ['take_profit', 'eod']
+        assert list(trades['pnl']) == [75 * 2 * self.cfg.mnq_point_value, -10 * 2 * self.cfg.mnq_point_value]
+        assert trades['exit_time'].iloc[1] == pd.Timestamp("2025-03-18 15:59", tz=self.cfg.timezone)
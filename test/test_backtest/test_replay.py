@@ -0,0 +1,91 @@
+import os
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+from src.configuration import Configuration
+from src.backtest.event_driven import EventDrivenBacktest
+from src.backtest.replay import Replay, find_market_data_files, load_market_data_files, load_replay_bars
+from src.market_data.market_data_store import MarketDataStore, contract_key
+from src.monitoring.instrumentation import instrumentation
+from src.utilities.clock import clock
+
+
+class TestReplay:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Set up test fixtures before each test method."""
+        config_path = os.path.join(os.getcwd(), "test", "test_strategy", "test_run.cfg")
+        self.cfg = Configuration(config_path)
+        self.cfg.strategy = 'buy'
+        self.cfg.strategies = {'buy': {'strategy': 'buy'}}
+        self.tmp_path = tmp_path
+        self.output_dir = str(tmp_path / "replay")
+
+        # Flat bars on Monday, then a trend from Tuesday 08:00
+        index = pd.date_range("2025-03-17 08:00", "2025-03-18 12:00", freq="1min",
+                              tz=self.cfg.timezone, inclusive="left")
+        close = np.full(len(index), 20000.0)
+        trend = index >= pd.Timestamp("2025-03-18 08:00", tz=self.cfg.timezone)
+        close[trend] += np.arange(trend.sum())
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        self.bars = pd.DataFrame({'open': open_, 'high': np.maximum(open_, close), 'low': np.minimum(open_, close),
+                                  'close': close, 'volume': 1.0}, index=index)
+        self.bars.index.name = 'datetime'
+
+        # Daily files overlapping like the saved bar buffers
+        self.data_dir = tmp_path / "output"
+        self.data_dir.mkdir()
+        self.bars.iloc[:1500].to_csv(self.data_dir / "market_data_MNQ_20250317.csv", index=True)
+        self.bars.iloc[1000:].to_csv(self.data_dir / "market_data_MNQ_20250318.csv", index=True)
+
+    def test_load_market_data_files(self):
+        files = find_market_data_files([str(self.data_dir)], ['MNQ'])
+        assert [os.path.basename(path) for path in files['MNQ']] == \
+            ["market_data_MNQ_20250317.csv", "market_data_MNQ_20250318.csv"]
+
+        bars = load_market_data_files(files['MNQ'], self.cfg.timezone)
+        pd.testing.assert_frame_equal(bars, self.bars, check_freq=False)
+
+    def test_load_from_store(self):
+        store_dir = str(self.tmp_path / "market_data")
+        contract = SimpleNamespace(symbol='MNQ', lastTradeDateOrContractMonth='202506')
+        MarketDataStore(store_dir, self.cfg.timezone).append_frame(contract_key(contract, self.cfg.bar_size), self.bars)
+
+        bars = load_replay_bars([store_dir], self.cfg)
+        np.testing.assert_array_equal(bars['MNQ']['close'].to_numpy(), self.bars['close'].to_numpy())
+
+        # The store is found in the output directory holding it
+        bars = load_replay_bars([str(self.tmp_path)], self.cfg)
+        np.testing.assert_array_equal(bars['MNQ']['close'].to_numpy(), self.bars['close'].to_numpy())
+
+        (self.tmp_path / "empty").mkdir()
+        with pytest.raises(ValueError):
+            load_replay_bars([str(self.tmp_path / "empty")], self.cfg)
+
+    def test_replay_matches_backtest(self):
+        start = pd.Timestamp("2025-03-18 07:00", tz=self.cfg.timezone)
+        bars = load_replay_bars([str(self.data_dir)], self.cfg)
+
+        replay = Replay(self.cfg, bars, self.output_dir, start=start)
+        result = replay.run()
+        expected = EventDrivenBacktest(self.cfg, {'MNQ': self.bars}, str(self.tmp_path / "backtest"), start=start).run()
+
+        pd.testing.assert_frame_equal(result.trades, expected.trades)
+        assert list(result.trades['exit_reason']) == ['take_profit'] * 3
+
+        # The decision loop is timed per stage
+        assert replay.timings['iteration']['count'] > 0
+        assert 'generate_signals' in replay.timings
+        assert os.path.exists(os.path.join(self.output_dir, "timings", "timings.jsonl"))
+        assert not [name for name in os.listdir(self.output_dir) if name.startswith("config_")]
+        assert not instrumentation.enabled
+        assert not clock.simulated
+
+    def test_default_start_after_warmup(self):
+        replay = Replay(self.cfg, {'MNQ': self.bars}, self.output_dir)
+        warmup = max(self.cfg.bollinger_period, self.cfg.rsi_period) + 1
+
+        assert replay.start == self.bars.index[0] + pd.Timedelta(minutes=warmup)
+
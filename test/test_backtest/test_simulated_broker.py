@@ -0,0 +1,126 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from ibapi.contract import Contract
+from src.configuration import Configuration
+from src.backtest.simulated_broker import SimulatedBroker, parse_duration
+from src.utilities.clock import SimulatedClock
+
+
+class TestSimulatedBroker:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Set up test fixtures before each test method."""
+        config_path = os.path.join(os.getcwd(), "test", "test_strategy", "test_run.cfg")
+        self.cfg = Configuration(config_path)
+
+        self.start = pd.Timestamp("2025-03-18 09:00", tz=self.cfg.timezone)
+        open_ = np.full(30, 100.0)
+        index = pd.date_range(self.start, periods=len(open_), freq="1min")
+        self.bars = pd.DataFrame({'open': open_, 'high': open_ + 0.5, 'low': open_ - 0.5,
+                                  'close': open_, 'volume': 1.0}, index=index)
+
+        self.contract = Contract()
+        self.contract.symbol = 'MNQ'
+
+    def _broker(self, at_minute: float):
+        self.clock = SimulatedClock(self.start + pd.Timedelta(minutes=at_minute))
+        broker = SimulatedBroker({'MNQ': self.bars}, self.cfg, self.clock)
+        broker.connect()
+        return broker
+
+    def _bracket(self, broker, take_profit=104.0, stop_loss=98.0):
+        bracket = broker.create_bracket_order('BUY', 2, take_profit, stop_loss)
+        broker.place_orders(bracket, self.contract)
+        return bracket
+
+    def test_parse_duration(self):
+        assert parse_duration('120 S') == pd.Timedelta(minutes=2)
+        assert parse_duration('1 D') == pd.Timedelta(days=1)
+        with pytest.raises(ValueError):
+            parse_duration('1 X')
+
+    def test_historical_data_only_completed_bars(self):
+        broker = self._broker(10)
+
+        bars = broker.get_historical_data(self.contract, '300 S', '1 min', self.cfg.timezone)
+
+        assert list(bars.index) == list(self.bars.index[5:10])
+        assert bars.index.tz is not None
+
+        # Requests ending before the current time, e.g. to fill a gap
+        bars = broker.get_historical_data(self.contract, '180 S', '1 min', self.cfg.timezone, end=self.bars.index[7])
+        assert list(bars.index) == list(self.bars.index[4:7])
+
+    def test_bracket_held_until_transmitted(self):
+        broker = self._broker(10.5)
+        bracket = broker.create_bracket_order('BUY', 2, 104.0, 98.0)
+
+        broker.place_orders(bracket[:2], self.contract)
+        assert broker.order_statuses[bracket[0].orderId]['status'] == 'PreSubmitted'
+        assert not broker.fills
+
+        broker.place_orders(bracket[2:], self.contract)
+        assert broker.order_statuses[bracket[0].orderId]['status'] == 'Filled'
+        assert broker.order_statuses[bracket[1].orderId]['status'] == 'Submitted'
+        assert broker.order_statuses[bracket[2].orderId]['status'] == 'Submitted'
+        assert broker.fills[0]['price'] == 100.0
+
+    def test_take_profit_cancels_stop_loss(self):
+        self.bars.iloc[15, self.bars.columns.get_loc('high')] = 104.5
+        broker = self._broker(10.5)
+        parent, take_profit, stop_loss = self._bracket(broker)
+
+        # The take profit bar is only completed at 09:16
+        self.clock.advance_to(self.start + pd.Timedelta(minutes=15, seconds=30))
+        assert broker.order_statuses[take_profit.orderId]['status'] == 'Submitted'
+
+        self.clock.advance_to(self.start + pd.Timedelta(minutes=16))
+        assert broker.order_statuses[take_profit.orderId]['status'] == 'Filled'
+        assert broker.order_statuses[take_profit.orderId]['avg_fill_price'] == 104.0
+        assert broker.order_statuses[stop_loss.orderId]['status'] == 'Cancelled'
+
+        trades = broker.trades()
+        assert list(trades['exit_reason']) == ['take_profit']
+        assert trades['pnl'].iloc[0] == pytest.approx(4 * 2 * self.cfg.mnq_point_value)
+
+    def test_stop_loss_first_within_one_bar_and_gap_fill(self):
+        self.bars.iloc[15, self.bars.columns.get_loc('high')] = 105.0
+        self.bars.iloc[15, self.bars.columns.get_loc('open')] = 97.0
+        self.bars.iloc[15, self.bars.columns.get_loc('low')] = 96.5
+        broker = self._broker(10.5)
+        parent, take_profit, stop_loss = self._bracket(broker)
+
+        self.clock.advance_to(self.start + pd.Timedelta(minutes=20))
+
+        assert broker.order_statuses[stop_loss.orderId]['status'] == 'Filled'
+        assert broker.order_statuses[stop_loss.orderId]['avg_fill_price'] == 97.0
+        assert broker.order_statuses[take_profit.orderId]['status'] == 'Cancelled'
+        assert broker.trades()['exit_reason'].iloc[0] == 'stop_loss'
+
+    def test_cancel_and_positions(self):
+        broker = self._broker(10.5)
+        parent, take_profit, stop_loss = self._bracket(broker)
+
+        positions = []
+        broker.position = lambda account, contract, quantity, avg_cost: positions.append((quantity, avg_cost))
+        broker.reqPositions()
+        assert positions == [(2.0, 100.0)]
+
+        broker.cancel_order(take_profit.orderId)
+        assert broker.order_statuses[take_profit.orderId]['status'] == 'Cancelled'
+        broker.cancel_order(parent.orderId)
+        assert broker.order_statuses[parent.orderId]['status'] == 'Filled'
+
+    def test_no_wall_clock_waits(self):
+        broker = self._broker(10.5)
+        broker.timeout = 60
+
+        # Flat, no position is reported and nothing is waited for
+        started = time.perf_counter()
+        assert broker.get_positions() == []
+        assert time.perf_counter() - started < 1.0
+        assert self.clock.now(self.cfg.timezone) == self.start + pd.Timedelta(minutes=10.5)
@@ -0,0 +1,101 @@
+import os
+import copy
+import numpy as np
+import pandas as pd
+import pytest
+from src.configuration import Configuration
+from src.backtest.sweep import ParameterSweep, SharedArrays, parameter_grid, random_parameters
+from src.backtest.vectorized import VectorizedBacktest
+
+
+class TestParameterSweep:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Set up test fixtures before each test method."""
+        config_path = os.path.join(os.getcwd(), "test", "test_strategy", "test_run.cfg")
+        self.cfg = Configuration(config_path)
+
+        # One week of random walk bars
+        index = pd.date_range("2025-03-16 17:00", "2025-03-21 15:59", freq="1min", tz=self.cfg.timezone)
+        rng = np.random.default_rng(7)
+        close = np.round((20000 + np.cumsum(rng.normal(0, 4, len(index)))) * 4) / 4
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        self.bars = pd.DataFrame({'open': open_, 'high': np.maximum(open_, close) + 1,
+                                  'low': np.minimum(open_, close) - 1, 'close': close, 'volume': 1.0}, index=index)
+
+        self.space = {
+            'bollinger_period': [10, 20],
+            'rsi_period': [7, 14],
+            'rsi_threshold': [30, 40],
+            'stop_loss_ticks': [40, 120],
+        }
+
+    def test_parameter_grid(self):
+        grid = parameter_grid(self.space)
+
+        assert len(grid) == 16
+        assert grid[0] == {'bollinger_period': 10, 'rsi_period': 7, 'rsi_threshold': 30, 'stop_loss_ticks': 40}
+        assert len({tuple(combination.values()) for combination in grid}) == 16
+
+        with pytest.raises(ValueError):
+            parameter_grid({'timeout': [1, 2]})
+
+    def test_random_parameters(self):
+        grid = [tuple(combination.values()) for combination in parameter_grid(self.space)]
+
+        samples = random_parameters(self.space, 5, seed=1)
+        assert len({tuple(combination.values()) for combination in samples}) == 5
+        assert all(tuple(combination.values()) in grid for combination in samples)
+        assert samples == random_parameters(self.space, 5, seed=1)
+        assert len(random_parameters(self.space, 100, seed=1)) == 16
+
+    def test_shared_arrays(self):
+        arrays = {'timestamp': np.arange(5, dtype=np.int64), 'close': np.linspace(1.0, 2.0, 5)}
+        shared = SharedArrays.create(arrays)
+
+        attached = SharedArrays.attach(shared.name, shared.layout)
+        np.testing.assert_array_equal(attached.arrays['timestamp'], arrays['timestamp'])
+        np.testing.assert_array_equal(attached.arrays['close'], arrays['close'])
+        assert not attached.arrays['close'].flags.writeable
+
+        # Views of the same memory
+        shared.arrays['close'][0] = 10.0
+        assert attached.arrays['close'][0] == 10.0
+
+        attached.close()
+        shared.close()
+        with pytest.raises(FileNotFoundError):
+            SharedArrays.attach(shared.name, shared.layout)
+
+    def test_batches_share_indicators(self):
+        sweep = ParameterSweep(self.cfg, self.bars, processes=1, batch_size=3)
+        batches = sweep.batches(parameter_grid(self.space))
+
+        assert sum(len(batch) for batch in batches) == 16
+        assert max(len(batch) for batch in batches) == 3
+        for batch in batches:
+            assert len({(p['bollinger_period'], p['rsi_period']) for p in batch}) == 1
+
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_matches_single_backtests(self, processes, tmp_path):
+        grid = parameter_grid(self.space)
+        results_path = str(tmp_path / "results.csv")
+        streamed = []
+
+        table = ParameterSweep(self.cfg, self.bars, processes=processes, batch_size=3).run(
+            grid, results_path, on_result=streamed.append)
+
+        assert len(table) == len(streamed) == len(grid)
+        assert list(table['rank']) == list(range(1, len(grid) + 1))
+        assert table['total_pnl'].is_monotonic_decreasing
+        assert len(pd.read_csv(results_path)) == len(grid)
+
+        for row in table.to_dict('records'):
+            cfg = copy.copy(self.cfg)
+            for name in self.space:
+                setattr(cfg, name, row[name])
+            summary = VectorizedBacktest(cfg).run(self.bars).summary()
+
+            assert row['trades'] == summary['trades']
+            assert row['total_pnl'] == pytest.approx(summary['total_pnl'])
@@ -0,0 +1,114 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.configuration import Configuration
+from src.backtest.vectorized import VectorizedBacktest
+from src.strategys.bb_rsi_strategy import BollingerBandRSIStrategy
+from src.utilities.enums import Signal
+
+
+class FixedSignalBacktest(VectorizedBacktest):
+    """Backtest entering after the given signal bars"""
+
+    def __init__(self, config, signal_bars):
+        super().__init__(config, search_chunk=4)
+        self.signal_bars = signal_bars
+
+    def signals(self, close):
+        signals = np.zeros(len(close), dtype=bool)
+        signals[self.signal_bars] = True
+        return signals
+
+
+class TestVectorizedBacktest:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Set up test fixtures before each test method."""
+        config_path = os.path.join(os.getcwd(), "test", "test_strategy", "test_run.cfg")
+        self.cfg = Configuration(config_path)
+        self.cfg.stop_loss_ticks = 8         # 2 points
+        self.cfg.take_profit_ticks = 16      # 4 points
+        self.tick = self.cfg.mnq_tick_size
+        self.value = self.cfg.mnq_point_value * self.cfg.number_of_contracts
+
+        # Tuesday morning, within trading hours
+        self.start = pd.Timestamp("2025-03-18 09:00", tz=self.cfg.timezone)
+
+    def _bars(self, open_, high=None, low=None, start=None):
+        open_ = np.asarray(open_, dtype=float)
+        high = open_ + 0.5 if high is None else np.asarray(high, dtype=float)
+        low = open_ - 0.5 if low is None else np.asarray(low, dtype=float)
+        index = pd.date_range(self.start if start is None else start, periods=len(open_), freq="1min")
+        return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': open_, 'volume': 1.0}, index=index)
+
+    def test_take_profit_and_stop_loss(self):
+        bars = self._bars(np.full(40, 100.0))
+        bars.iloc[12, bars.columns.get_loc('high')] = 104.25     # take profit of the entry at bar 1
+        bars.iloc[20, bars.columns.get_loc('open')] = 95.0       # gap through the stop of the entry at bar 16
+        bars.iloc[20, bars.columns.get_loc('low')] = 94.5
+
+        result = FixedSignalBacktest(self.cfg, [0, 5, 15]).run(bars)
+        trades = result.trades
+
+        assert list(trades['exit_reason']) == ['take_profit', 'stop_loss']
+        assert trades['entry_time'].iloc[0] == bars.index[1]
+        assert trades['exit_time'].iloc[0] == bars.index[12]
+        assert trades['pnl'].iloc[0] == pytest.approx(4 * self.value)
+        assert trades['exit_price'].iloc[1] == 95.0
+        assert trades['pnl'].iloc[1] == pytest.approx(-5 * self.value)
+
+    def test_stop_first_when_both_levels_in_one_bar(self):
+        bars = self._bars(np.full(10, 100.0))
+        bars.iloc[3, bars.columns.get_loc('high')] = 105.0
+        bars.iloc[3, bars.columns.get_loc('low')] = 97.0
+
+        trades = FixedSignalBacktest(self.cfg, [0]).run(bars).trades
+        assert list(trades['exit_reason']) == ['stop_loss']
+        assert trades['exit_price'].iloc[0] == 98.0
+
+    def test_end_of_day_exit(self):
+        bars = self._bars(np.arange(20, dtype=float) * 0.1 + 100, start=self.start.replace(hour=15, minute=45))
+
+        trades = FixedSignalBacktest(self.cfg, [2, 15]).run(bars).trades
+
+        # The signal at 15:59 is in the end of day window and does not enter
+        assert len(trades) == 1
+        assert trades['exit_reason'].iloc[0] == 'eod'
+        assert trades['exit_time'].iloc[0] == self.start.replace(hour=15, minute=59)
+
+    def test_trading_pause_after_max_loss(self):
+        # A 2 point stop loses 2 * point_value per contract
+        self.cfg.max_24h_loss_per_contract = 3 * self.cfg.mnq_point_value
+        bars = self._bars(np.full(60, 100.0))
+        for i in (5, 15, 25):
+            bars.iloc[i, bars.columns.get_loc('low')] = 97.0
+
+        result = FixedSignalBacktest(self.cfg, [0, 10, 20]).run(bars)
+
+        # Two stops reach the loss limit, the third signal is paused
+        assert list(result.trades['exit_reason']) == ['stop_loss', 'stop_loss']
+        assert len(result.pauses) == 1
+        assert result.pauses[0][1] - result.pauses[0][0] == pd.Timedelta(hours=self.cfg.trading_pause_hours)
+        assert result.summary()['trading_pauses'] == 1
+
+    def test_no_entries_outside_trading_hours(self):
+        saturday = pd.Timestamp("2025-03-22 09:00", tz=self.cfg.timezone)
+        evening = pd.Timestamp("2025-03-18 17:00", tz=self.cfg.timezone)
+
+        for start in (saturday, evening):
+            bars = self._bars(np.full(10, 100.0), start=start)
+            assert len(FixedSignalBacktest(self.cfg, [0, 3]).run(bars).trades) == 0
+
+    def test_signals_match_strategy(self):
+        rng = np.random.default_rng(5)
+        close = 100 + np.cumsum(rng.normal(0, 1, 400))
+        bars = pd.DataFrame({'close': close})
+
+        signals = VectorizedBacktest(self.cfg).signals(close)
+        assert signals.any()
+
+        for end in range(30, len(close) + 1):
+            expected = BollingerBandRSIStrategy.generate_signals(bars.iloc[:end].copy(), self.cfg)
+            assert signals[end - 1] == (expected == Signal.BUY)
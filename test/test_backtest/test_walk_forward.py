@@ -0,0 +1,91 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.configuration import Configuration
+from src.backtest.sweep import SweepWorker, parameter_grid
+from src.backtest.vectorized import VectorizedBacktest, bar_arrays
+from src.backtest.walk_forward import WalkForward
+
+
+class TestWalkForward:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Set up test fixtures before each test method."""
+        config_path = os.path.join(os.getcwd(), "test", "test_strategy", "test_run.cfg")
+        self.cfg = Configuration(config_path)
+        self.cache_dir = str(tmp_path / "walk_forward")
+
+        # Three weeks of random walk bars without the daily break
+        index = pd.date_range("2025-03-02 17:00", "2025-03-21 15:59", freq="1min", tz=self.cfg.timezone)
+        index = index[(index.hour != 16) & (index.dayofweek != 5) & ~((index.dayofweek == 6) & (index.hour < 17))]
+        rng = np.random.default_rng(3)
+        close = np.round((20000 + np.cumsum(rng.normal(0, 4, len(index)))) * 4) / 4
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        self.bars = pd.DataFrame({'open': open_, 'high': np.maximum(open_, close) + 1,
+                                  'low': np.minimum(open_, close) - 1, 'close': close, 'volume': 1.0}, index=index)
+
+        self.space = {'bollinger_period': [10, 20], 'rsi_period': [7, 14], 'rsi_threshold': [30, 40]}
+        self.grid = parameter_grid(self.space)
+
+    def _walk_forward(self, bars=None, parameters=None):
+        return WalkForward(self.cfg, self.bars if bars is None else bars, parameters or self.grid,
+                           in_sample='5D', out_of_sample='2D', processes=1, cache_dir=self.cache_dir)
+
+    def test_windows(self):
+        walk_forward = self._walk_forward()
+        windows = walk_forward.windows()
+        timestamps = self.bars.index
+
+        assert len(windows) > 3
+        start, split, stop = windows[0]
+        assert start == 0
+        assert timestamps[split] - timestamps[start] >= pd.Timedelta('5D')
+        assert timestamps[split - 1] - timestamps[start] < pd.Timedelta('5D')
+
+        # Out-of-sample windows follow each other
+        for previous, window in zip(windows, windows[1:]):
+            assert window[1] >= previous[1]
+        assert windows[-1][1] < len(timestamps)
+
+    def test_chooses_best_in_sample_parameters(self):
+        result = self._walk_forward().run()
+        windows = self._walk_forward().windows()
+
+        arrays = bar_arrays(self.bars)
+        worker = SweepWorker(self.cfg, arrays, VectorizedBacktest(self.cfg).calendar(arrays['timestamp']))
+        for period, (start, split, stop) in enumerate(windows):
+            pnl = [worker.run(parameters, start, split)['total_pnl'] for parameters in self.grid]
+            best = self.grid[int(np.argmax(pnl))]
+
+            chosen = result.periods.iloc[period]
+            assert {name: chosen[name] for name in self.space} == best
+            assert chosen['in_sample_total_pnl'] == max(pnl)
+
+            trades = result.out_of_sample.trades
+            period_trades = trades[trades['period'] == period]
+            assert period_trades['pnl'].sum() == pytest.approx(worker.backtest(best, split, stop).trades['pnl'].sum())
+            assert (period_trades['entry_time'] >= self.bars.index[split]).all()
+
+        assert result.equity_curve().iloc[-1] == pytest.approx(result.periods['out_of_sample_pnl'].sum())
+
+    def test_incremental_reruns(self):
+        first = self._walk_forward()
+        result = first.run()
+        assert first.cache_hits == 0
+
+        rerun = self._walk_forward()
+        pd.testing.assert_frame_equal(rerun.run().periods, result.periods)
+        assert rerun.cache_misses == 0
+
+        # Only the new parameter sets are backtested
+        extended = self._walk_forward(parameters=self.grid + [{'bollinger_period': 40, 'rsi_period': 7, 'rsi_threshold': 30}])
+        extended.run()
+        assert extended.cache_misses == len(extended.windows())
+
+        # Windows ending before the bars differ keep their in-sample results
+        shorter = self._walk_forward(bars=self.bars.iloc[:-3000])
+        shorter.run()
+        assert 0 < shorter.cache_hits == len(shorter.windows()) * len(self.grid) - shorter.cache_misses
+        assert shorter.cache_misses < len(shorter.windows()) * len(self.grid)
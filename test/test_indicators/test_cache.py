@@ -0,0 +1,151 @@
+import gc
+import numpy as np
+import pandas as pd
+import pytest
+from src.indicators import kernels
+from src.indicators.cache import IndicatorCache, CachedIndicators
+from src.market_data.bar_buffer import BarBuffer
+from src.utilities.technical_analysis import SharedIndicators
+
+
+class TestIndicatorCache:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Set up test fixtures before each test method."""
+        self.timezone = "US/Central"
+        self.start = pd.Timestamp("2025-03-18 09:00", tz=self.timezone)
+        rng = np.random.default_rng(3)
+        self.close = (20000 + np.cumsum(rng.normal(0, 2, 2000))).round(2)
+        self.cache = IndicatorCache()
+        self.buffer = BarBuffer(5000, self.timezone)
+        self.buffer.extend(self._bars(self.close))
+
+    def _bars(self, close, offset=0):
+        index = pd.date_range(self.start + pd.Timedelta(minutes=offset), periods=len(close), freq="1min")
+        return pd.DataFrame({
+            'open': close, 'high': close + 1, 'low': close - 1, 'close': close, 'volume': np.full(len(close), 10.0),
+        }, index=index)
+
+    def _revise_last(self, close):
+        self.buffer.replace_last(self.buffer.last_timestamp, close, close + 1, close - 1, close, 10.0)
+
+    def test_consumers_share_arrays(self):
+        first = CachedIndicators(self.buffer, self.cache)
+        second = CachedIndicators(self.buffer, self.cache)
+
+        assert first.rsi(14) is second.rsi(14)
+        assert first.bollinger_bands(20, 2) is second.bollinger_bands(20, 2)
+        assert (self.cache.misses, self.cache.hits) == (2, 2)
+
+        np.testing.assert_allclose(first.rsi(14), kernels.rsi(self.close, 14), equal_nan=True)
+        with pytest.raises(ValueError):
+            first.rsi(14)[-1] = 0.0
+
+    def test_revised_last_bar(self):
+        rsi = self.cache.rsi(self.buffer, 14)
+        bands = self.cache.bollinger_bands(self.buffer, 20, 2)
+        before = rsi.copy()
+
+        self._revise_last(self.close[-1] - 25)
+        revised_rsi = self.cache.rsi(self.buffer, 14)
+        revised_bands = self.cache.bollinger_bands(self.buffer, 20, 2)
+
+        assert self.cache.updates == 2
+        np.testing.assert_array_equal(rsi, before)
+        assert revised_rsi is not rsi
+        assert revised_rsi[-1] != rsi[-1]
+
+        close = self.buffer.column('close')
+        np.testing.assert_allclose(revised_rsi, kernels.rsi(close, 14), rtol=0, atol=1e-9, equal_nan=True)
+        expected = kernels.bollinger_bands(close, 20, 2)
+        for name, band in zip(('middle', 'upper', 'lower'), expected):
+            np.testing.assert_allclose(revised_bands[name], band, rtol=0, atol=1e-9, equal_nan=True)
+
+    def test_appended_bars_update_the_last_values(self):
+        buffer = BarBuffer(500, self.timezone)
+        indicators = CachedIndicators(buffer, self.cache)
+        buffer.extend(self._bars(self.close[:300]))
+        rsi = indicators.rsi(14)
+        indicators.bollinger_bands(20, 2)
+
+        # Revise the latest bar and append new ones, rolling over the buffer capacity
+        for end in range(300, 900, 60):
+            bars = self._bars(self.close[end - 1:end + 60], offset=end - 1)
+            bars.iloc[0, bars.columns.get_loc('close')] += 3
+            buffer.extend(bars)
+            assert len(indicators.rsi(14)) == len(buffer)
+            indicators.bollinger_bands(20, 2)
+
+        assert (self.cache.misses, self.cache.updates) == (2, 20)
+        np.testing.assert_array_equal(rsi, kernels.rsi(self.close[:300], 14))
+
+        # The RSI carries history from before the buffer window, which has
+        # decayed after hundreds of bars
+        close = buffer.column('close')
+        np.testing.assert_allclose(indicators.rsi(14)[-100:], kernels.rsi(close, 14)[-100:], rtol=0, atol=1e-9)
+        middle = kernels.bollinger_bands(close, 20, 2)[0]
+        np.testing.assert_allclose(indicators.bollinger_bands(20, 2)['middle'][19:], middle[19:], rtol=0, atol=1e-6)
+
+        buffer.clear()
+        assert len(indicators.rsi(14)) == 0
+        assert self.cache.misses == 3
+
+    def test_state_round_trip(self):
+        buffer = BarBuffer(500, self.timezone)
+        indicators = CachedIndicators(buffer, IndicatorCache())
+        buffer.extend(self._bars(self.close[:200]))
+        indicators.rsi(14)
+        indicators.bollinger_bands(20, 2)
+
+        restored = CachedIndicators(buffer, IndicatorCache())
+        restored.set_state(indicators.get_state())
+        assert restored.cache.misses == 0
+
+        buffer.extend(self._bars(self.close[200:210], offset=200))
+
+        np.testing.assert_array_equal(restored.rsi(14), indicators.rsi(14))
+        np.testing.assert_array_equal(restored.bollinger_bands(20, 2)['upper'], indicators.bollinger_bands(20, 2)['upper'])
+        assert restored.computed == 2
+        assert restored.cache.updates == 2
+
+    def test_frames_are_served_from_the_cache(self):
+        frame = self._bars(self.close)
+        shared = SharedIndicators(frame, self.cache)
+
+        assert shared.rsi(14) is shared.rsi(14)
+        assert (self.cache.misses, self.cache.hits) == (1, 1)
+        np.testing.assert_array_equal(shared.close(), self.close)
+        assert shared.data is frame
+
+        # A new window of bars is a new series
+        SharedIndicators(frame.iloc[:-1], self.cache).rsi(14)
+        assert self.cache.misses == 2
+
+        shared = None
+        gc.collect()
+        assert len(self.cache) == 0
+
+    def test_lru_eviction(self):
+        entry_bytes = self.close.nbytes
+        cache = IndicatorCache(max_bytes=2 * entry_bytes)
+
+        cache.rsi(self.buffer, 10)
+        cache.rsi(self.buffer, 12)
+        cache.rsi(self.buffer, 10)
+        cache.rsi(self.buffer, 14)
+
+        assert cache.evictions == 1
+        assert cache.nbytes == 2 * entry_bytes
+        cache.rsi(self.buffer, 10)
+        assert cache.misses == 3
+
+    def test_collected_buffer_is_dropped(self):
+        self.cache.rsi(self.buffer, 14)
+        assert len(self.cache) == 1
+
+        self.buffer = None
+        gc.collect()
+
+        assert len(self.cache) == 0
+        assert self.cache.nbytes == 0
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ta.volatility import BollingerBands
+from ta.momentum import RSIIndicator
+from src.indicators.incremental import RollingBollinger, WilderRSI
+
+
+class TestIncrementalIndicators:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Set up test fixtures before each test method."""
+        rng = np.random.default_rng(7)
+        self.close = (20000 + np.cumsum(rng.normal(0, 2, 5000))).round(2)
+
+    def test_match_ta(self):
+        close = pd.Series(self.close)
+        expected_bb = BollingerBands(close, window=20, window_dev=2)
+        expected_rsi = RSIIndicator(close, window=14).rsi().to_numpy()
+
+        bollinger = RollingBollinger(20, 2, recompute_every=100)
+        rsi = WilderRSI(14)
+        middle, upper, rsi_values = [], [], []
+        for value in self.close:
+            bollinger.update(value)
+            rsi.update(value)
+            middle.append(bollinger.middle[-1])
+            upper.append(bollinger.upper[-1])
+            rsi_values.append(rsi.values[-1])
+
+        np.testing.assert_allclose(middle, expected_bb.bollinger_mavg(), atol=1e-6)
+        np.testing.assert_allclose(upper, expected_bb.bollinger_hband(), atol=1e-6)
+        np.testing.assert_allclose(rsi_values, expected_rsi, atol=1e-9)
+
+    def test_revise_last_bar(self):
+        bollinger = RollingBollinger(20, 2)
+        rsi = WilderRSI(14)
+        for value in self.close[:100]:
+            bollinger.update(value)
+            rsi.update(value)
+
+        bollinger.revise(self.close[99] + 5)
+        rsi.revise(self.close[99] + 5)
+
+        revised = pd.Series(np.append(self.close[:99], self.close[99] + 5))
+        assert bollinger.middle[-1] == pytest.approx(BollingerBands(revised, 20, 2).bollinger_mavg().iloc[-1])
+        assert rsi.values[-1] == pytest.approx(RSIIndicator(revised, 14).rsi().iloc[-1])
+        assert rsi.values[-2] == pytest.approx(RSIIndicator(revised, 14).rsi().iloc[-2])
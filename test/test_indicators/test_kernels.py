@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.lib.stride_tricks import sliding_window_view
+from ta.volatility import BollingerBands
+from ta.momentum import RSIIndicator
+from src.indicators import kernels
+
+
+class TestKernels:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Set up test fixtures before each test method."""
+        rng = np.random.default_rng(11)
+        # Longer than one rolling block so block boundaries are covered
+        self.close = (20000 + np.cumsum(rng.normal(0, 2, 40000))).round(2)
+
+    def test_bollinger_bands_match_ta(self):
+        expected = BollingerBands(pd.Series(self.close), window=20, window_dev=2)
+        middle, upper, lower = kernels.bollinger_bands(self.close, window=20, window_dev=2)
+
+        for actual, band in ((middle, expected.bollinger_mavg()), 
+                             (upper, expected.bollinger_hband()), 
+                             (lower, expected.bollinger_lband())):
+            band = band.to_numpy()
+            assert np.array_equal(np.isnan(actual), np.isnan(band))
+            np.testing.assert_allclose(actual[19:], band[19:], rtol=0, atol=1e-6)
+
+    def test_rolling_std_exact(self):
+        windows = sliding_window_view(self.close, 20)
+        mean, std = kernels.rolling_mean_std(self.close, 20)
+
+        np.testing.assert_allclose(mean[19:], windows.mean(axis=1), rtol=0, atol=1e-9)
+        np.testing.assert_allclose(std[19:], windows.std(axis=1), rtol=0, atol=1e-8)
+
+    def test_rsi_matches_ta(self):
+        expected = RSIIndicator(pd.Series(self.close), window=14).rsi().to_numpy()
+        actual = kernels.rsi(self.close, window=14)
+
+        assert np.array_equal(np.isnan(actual), np.isnan(expected))
+        np.testing.assert_allclose(actual[13:], expected[13:], rtol=0, atol=1e-9)
+
+    def test_ewm_matches_pandas(self):
+        values = np.abs(np.diff(self.close, prepend=self.close[0]))
+        expected = pd.Series(values).ewm(alpha=1 / 3, adjust=False).mean().to_numpy()
+
+        np.testing.assert_allclose(kernels.ewm(values, 1 / 3), expected, rtol=1e-12, atol=1e-12)
+
+    def test_edge_cases(self):
+        constant = np.full(50, 100.0)
+        assert np.all(kernels.rsi(constant, 14)[13:] == 100.0)
+        assert np.all(kernels.rolling_mean_std(constant, 20)[1][19:] == 0.0)
+
+        short = self.close[:10]
+        assert np.isnan(kernels.bollinger_bands(short, 20, 2)[0]).all()
+        assert np.isnan(kernels.rsi(short, 14)).all()
+        assert len(kernels.rsi(np.array([]), 14)) == 0
+
+        with pytest.raises(ValueError):
+            kernels.rolling_mean_std(short, 0)
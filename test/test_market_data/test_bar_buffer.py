@@ -0,0 +1,85 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.market_data.bar_buffer import BarBuffer
+
+
+class TestBarBuffer:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Set up test fixtures before each test method."""
+        self.timezone = "US/Central"
+        self.start = pd.Timestamp("2025-03-18 09:00", tz=self.timezone)
+
+    def _bars(self, n, offset=0):
+        index = pd.date_range(self.start + pd.Timedelta(minutes=offset), periods=n, freq="1min")
+        close = np.arange(offset, offset + n, dtype=float)
+        return pd.DataFrame({
+            'open': close,
+            'high': close + 1,
+            'low': close - 1,
+            'close': close,
+            'volume': np.full(n, 10.0),
+        }, index=index)
+
+    def test_extend_appends_and_replaces_last(self):
+        buffer = BarBuffer(100, self.timezone)
+
+        assert buffer.extend(self._bars(10)) == 10
+
+        revised = self._bars(5, offset=9)
+        revised.iloc[0, revised.columns.get_loc('close')] = 42.0
+
+        assert buffer.extend(revised) == 4
+        assert len(buffer) == 14
+        assert buffer.column('close')[9] == 42.0
+        assert buffer.last_timestamp == self.start + pd.Timedelta(minutes=13)
+
+    def test_capacity_is_bounded(self):
+        buffer = BarBuffer(50, self.timezone)
+
+        buffer.extend(self._bars(500))
+
+        assert len(buffer) == 50
+        np.testing.assert_array_equal(buffer.column('close'), np.arange(450, 500, dtype=float))
+        assert buffer.to_frame().index[0] == self.start + pd.Timedelta(minutes=450)
+
+    def test_window_is_zero_copy_view(self):
+        buffer = BarBuffer(50, self.timezone)
+        buffer.extend(self._bars(120))
+
+        window = buffer.column('close', 20)
+
+        assert window.base is not None
+        assert window.flags['C_CONTIGUOUS']
+        np.testing.assert_array_equal(window, np.arange(100, 120, dtype=float))
+
+    def test_older_bars_are_ignored(self):
+        buffer = BarBuffer(50, self.timezone)
+        buffer.extend(self._bars(10, offset=10))
+
+        assert buffer.extend(self._bars(5)) == 0
+        assert len(buffer) == 10
+
+        with pytest.raises(ValueError):
+            buffer.append(self.start, 1.0, 1.0, 1.0, 1.0, 1.0)
+
+    def test_version(self):
+        buffer = BarBuffer(50, self.timezone)
+        other = BarBuffer(50, self.timezone)
+        assert buffer.series_id != other.series_id
+
+        buffer.extend(self._bars(10))
+        version = buffer.version
+
+        buffer.replace_last(self.start + pd.Timedelta(minutes=9), 1.0, 1.0, 1.0, 1.0, 1.0)
+        assert buffer.version[:2] == version[:2]
+        assert buffer.version != version
+
+        buffer.extend(self._bars(1, offset=10))
+        assert buffer.version[1] == version[1] + 1
+
+        version = buffer.version
+        buffer.clear()
+        assert buffer.version[0] == version[0] + 1
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.api.api_utils import contract_window, get_current_contract
+from src.market_data.continuous_contract import ContinuousContract
+from src.market_data.market_data_store import MarketDataStore
+from src.utilities.clock import clock, SimulatedClock
+
+
+class TestContinuousContract:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Set up test fixtures before each test method."""
+        self.timezone = "US/Central"
+        self.roll_days = 8
+        self.store = MarketDataStore(str(tmp_path), self.timezone)
+
+        # Hourly bars of three contracts, each stored from a week before the
+        # previous roll, the back month trading 100 points above the front
+        self.premium = {'202503': 0.0, '202506': 100.0, '202509': 200.0}
+        for month, premium in self.premium.items():
+            start, end = contract_window(month, self.roll_days, self.timezone)
+            index = pd.date_range(start - pd.Timedelta('7D'), min(end, pd.Timestamp("2025-07-01", tz=self.timezone)),
+                                  freq="1h", inclusive='left')
+            self.store.append_frame(f"MNQ_{month}_1h", self._bars(index, premium))
+
+    @staticmethod
+    def _bars(index, premium):
+        close = 20000 + premium + index.asi8 // 3600_000_000_000 % 50
+        return pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                             'volume': np.full(len(index), 3.0)}, index=index)
+
+    def _series(self, adjustment='difference'):
+        return ContinuousContract(self.store, "MNQ", "1h", self.roll_days, self.timezone, adjustment)
+
+    def test_rolls_with_the_live_system(self):
+        series = self._series()
+        frame = series.read_frame()
+
+        assert series.contracts == ['202503', '202506', '202509']
+        assert frame.index.is_monotonic_increasing and frame.index.is_unique
+        for roll in series.rolls:
+            roll_time = pd.Timestamp(roll['time'], tz='UTC')
+            with clock.using(SimulatedClock(roll_time)):
+                assert get_current_contract("MNQ", "CME", "USD", self.roll_days, self.timezone).lastTradeDateOrContractMonth == roll['to']
+            with clock.using(SimulatedClock(roll_time - pd.Timedelta('1h'))):
+                assert get_current_contract("MNQ", "CME", "USD", self.roll_days, self.timezone).lastTradeDateOrContractMonth == roll['from']
+
+    def test_difference_adjustment(self):
+        series = self._series()
+        frame = series.read_frame()
+        latest = self.store.read_frame("MNQ_202509_1h")
+
+        assert [roll['adjustment'] for roll in series.rolls] == [100.0, 100.0]
+        # The current contract is unadjusted, older bars are shifted onto it
+        tail = frame.loc[latest.index[0]:]
+        pd.testing.assert_frame_equal(tail, latest.loc[:tail.index[-1]], check_freq=False)
+        np.testing.assert_allclose(frame['close'].iloc[:5].to_numpy(),
+                                   self.store.read_frame("MNQ_202503_1h", frame.index[0])['close'].iloc[:5].to_numpy() + 200.0)
+
+    def test_ratio_adjustment(self):
+        series = self._series('ratio')
+        frame = series.read_frame()
+        first = self.store.read_frame("MNQ_202503_1h", frame.index[0])
+        factor = np.prod([roll['adjustment'] for roll in series.rolls])
+
+        assert factor > 1.0
+        np.testing.assert_allclose(frame['close'].iloc[:5].to_numpy(), first['close'].iloc[:5].to_numpy() * factor)
+        assert frame['volume'].iloc[0] == 3.0
+
+    def test_cached_until_new_bars(self):
+        series = self._series()
+        columns = series.columns()
+        assert series.columns() is columns
+        assert series.rebuilds == 1
+
+        # New bars of the current contract are appended without a rebuild
+        last = pd.Timestamp(columns['timestamp'][-1], tz='UTC').tz_convert(self.timezone)
+        index = pd.date_range(last, periods=4, freq="1h")
+        self.store.append_frame("MNQ_202509_1h", self._bars(index, 500.0))
+
+        frame = series.read_frame()
+        assert series.rebuilds == 1
+        assert frame.index[-1] == index[-1]
+        assert frame['close'].iloc[-4] == self._bars(index, 500.0)['close'].iloc[0]
+
+        # Bars of an older contract rebuild the series
+        self.store.append_frame("MNQ_202506_1h", self._bars(index, 0.0))
+        series.columns()
+        assert series.rebuilds == 2
+        pd.testing.assert_frame_equal(series.read_frame(), self._series().read_frame())
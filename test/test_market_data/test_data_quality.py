@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.market_data.data_quality import DataQuality, session_minutes
+from src.api.api_utils import backfill_duration, end_datetime_string
+from src.utilities.period import Period
+
+
+class TestDataQuality:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Set up test fixtures before each test method."""
+        self.timezone = "US/Central"
+        self.quality = DataQuality("MNQ", Period("1min"))
+
+        index = pd.date_range("2025-03-18 09:00", periods=200, freq="1min", tz=self.timezone)
+        rng = np.random.default_rng(5)
+        close = np.round((20000 + np.cumsum(rng.normal(0, 3, len(index)))) * 4) / 4
+        self.bars = pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                                  'volume': np.full(len(index), 10.0)}, index=index)
+
+    def _ts(self, text):
+        return pd.Timestamp(text, tz=self.timezone)
+
+    def test_session_minutes_skip_breaks_and_weekends(self):
+        timestamps = np.array([self._ts(text).value for text in (
+            "2025-03-18 15:59", "2025-03-18 17:00",   # daily break
+            "2025-03-21 15:59", "2025-03-23 17:00",   # weekend
+            "2025-03-07 15:59", "2025-03-09 17:00",   # weekend with a DST change
+            "2025-03-18 09:00", "2025-03-18 10:00")])
+        minutes = session_minutes(timestamps)
+
+        assert list(np.diff(minutes)[::2]) == [1, 1, 1, 60]
+
+    def test_clean_batch(self):
+        report = self.quality.check(self.bars)
+
+        assert report.clean
+        pd.testing.assert_frame_equal(report.bars, self.bars)
+
+    def test_sorts_and_drops_duplicates(self):
+        revised = self.bars.iloc[[10]].copy()
+        revised['close'] += 0.25
+        batch = pd.concat([self.bars.iloc[:10], self.bars.iloc[12:20], revised, self.bars.iloc[10:12]])
+
+        report = self.quality.check(batch)
+
+        assert report.counts['unsorted'] == 1
+        assert report.counts['duplicate'] == 1
+        assert report.bars.index.equals(self.bars.index[:20])
+        # The latest copy of a bar wins
+        assert report.bars['close'].iloc[10] == self.bars['close'].iloc[10]
+
+    def test_invalid_zero_volume_and_spikes(self):
+        batch = self.bars.copy()
+        batch.iloc[50, batch.columns.get_loc('low')] = np.nan
+        batch.iloc[60, batch.columns.get_loc('volume')] = 0.0
+        batch.iloc[100, [0, 1, 2, 3]] = batch['close'].iloc[100] + [400, 401, 399, 400]
+
+        report = self.quality.check(batch)
+
+        assert report.counts['invalid'] == 1
+        assert report.counts['zero_volume'] == 1
+        assert report.counts['outlier'] == 1
+        assert len(report.bars) == len(batch) - 2
+        assert batch.index[100] not in report.bars.index
+        assert self.quality.counts['outlier'] == 1
+
+        # A lasting jump is not a spike
+        jump = self.bars.copy()
+        jump.iloc[150:, [0, 1, 2, 3]] += 400
+        assert DataQuality("MNQ", Period("1min")).check(jump).counts['outlier'] == 0
+
+    def test_gaps_after_the_last_bar(self):
+        batch = self.bars.drop(self.bars.index[[30, 31, 32, 90]])
+
+        report = self.quality.check(batch.iloc[20:], last_timestamp=self.bars.index[10],
+                                    last_close=self.bars['close'].iloc[10])
+
+        assert [(before, after, missing) for before, after, missing in report.gaps] == [
+            (self.bars.index[10], self.bars.index[20], 9),
+            (self.bars.index[29], self.bars.index[33], 3),
+            (self.bars.index[89], self.bars.index[91], 1),
+        ]
+        assert report.counts['missing_bars'] == 13
+        # Bars already held are not checked again
+        assert self.quality.check(batch, last_timestamp=batch.index[-1]).gaps == []
+
+    def test_no_gaps_over_breaks_and_holidays(self):
+        index = pd.DatetimeIndex([self._ts(text) for text in (
+            "2025-03-18 15:58", "2025-03-18 15:59", "2025-03-18 17:00",
+            "2025-07-03 12:00", "2025-07-06 17:00")])
+        bars = pd.DataFrame({'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0, 'volume': 1.0}, index=index)
+
+        assert self.quality.check(bars).gaps == []
+
+    def test_backfill_request(self):
+        before, after = self.bars.index[29], self.bars.index[33]
+
+        assert backfill_duration(before, after) == "240 S"
+        assert backfill_duration(before, before + pd.Timedelta('30h')) == "2 D"
+        assert end_datetime_string(after) == "20250318-14:33:00"
+        assert end_datetime_string() == ""
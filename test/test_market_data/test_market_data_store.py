@@ -0,0 +1,119 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.market_data.bar_buffer import BarBuffer
+from src.market_data.market_data_store import MarketDataStore, contract_key
+from src.utilities.clock import clock, SimulatedClock
+from src.utilities.period import Period
+
+
+class TestMarketDataStore:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Set up test fixtures before each test method."""
+        self.timezone = "US/Central"
+        self.key = "MNQ_202506"
+        self.store = MarketDataStore(str(tmp_path), self.timezone)
+
+    def _buffer(self, start, n, capacity=5000):
+        index = pd.date_range(pd.Timestamp(start, tz=self.timezone), periods=n, freq="1min")
+        close = np.arange(n, dtype=float)
+        bars = pd.DataFrame({
+            'open': close,
+            'high': close + 1,
+            'low': close - 1,
+            'close': close,
+            'volume': np.full(n, 5.0),
+        }, index=index)
+
+        buffer = BarBuffer(capacity, self.timezone)
+        buffer.extend(bars)
+        return buffer
+
+    def test_append_only_writes_new_bars(self):
+        buffer = self._buffer("2025-03-18 23:00", 120)
+
+        first_bars = {name: values[:100] for name, values in buffer.window().items()}
+
+        assert self.store.append(self.key, first_bars) == 100
+        assert self.store.append(self.key, buffer.window()) == 20
+        assert self.store.append(self.key, buffer.window()) == 0
+
+        # Bars spanning midnight are split into two daily partitions
+        assert [p['date'] for p in self.store.partitions(self.key)] == ['20250318', '20250319']
+
+        frame = self.store.read_frame(self.key)
+        pd.testing.assert_frame_equal(frame, buffer.to_frame(), check_freq=False)
+
+    def test_last_bar_is_overwritten(self):
+        buffer = self._buffer("2025-03-18 09:00", 10)
+        self.store.append(self.key, buffer.window())
+
+        last = buffer.last_timestamp
+        buffer.replace_last(last, 9.0, 12.0, 8.0, 11.5, 7.0)
+
+        assert self.store.append(self.key, buffer.window()) == 0
+        assert self.store.read(self.key)['close'][-1] == 11.5
+
+    def test_range_read_and_reload(self, tmp_path):
+        buffer = self._buffer("2025-03-18 20:00", 600)
+        self.store.append(self.key, buffer.window())
+
+        start = pd.Timestamp("2025-03-19 01:00", tz=self.timezone)
+        end = pd.Timestamp("2025-03-19 01:09", tz=self.timezone)
+
+        reloaded = MarketDataStore(str(tmp_path), self.timezone)
+        frame = reloaded.read_frame(self.key, start, end)
+
+        assert reloaded.contracts() == [self.key]
+        assert len(frame) == 10
+        assert frame.index[0] == start
+        assert frame.index[-1] == end
+
+    def test_read_returns_memory_mapped_views(self):
+        buffer = self._buffer("2025-03-18 20:00", 600)
+        self.store.append(self.key, buffer.window())
+
+        bars = self.store.read(self.key, buffer.last_timestamp - pd.Timedelta(minutes=9))
+        columns = self.store.columns(self.key)
+
+        assert len(bars['close']) == 10
+        assert np.shares_memory(bars['close'], columns['close'])
+        assert not bars['close'].flags.writeable
+        assert self.store.locate(self.key, buffer.last_timestamp + pd.Timedelta(minutes=1)) == (600, 600)
+
+        # Views see revisions of the latest bar
+        buffer.replace_last(buffer.last_timestamp, 1.0, 2.0, 0.5, 1.5, 3.0)
+        self.store.append(self.key, buffer.window())
+        assert bars['close'][-1] == 1.5
+
+    def test_append_frame_by_bar_size(self):
+        contract = type('Contract', (), {'symbol': 'MNQ', 'lastTradeDateOrContractMonth': '202506'})()
+        key = contract_key(contract, Period("5min"))
+        frame = self._buffer("2025-03-18 09:00", 30).to_frame()
+
+        assert key == "MNQ_202506_5min"
+        assert contract_key(contract) == self.key
+        assert self.store.append_frame(key, frame) == 30
+        assert self.store.append_frame(key, frame.iloc[:0]) == 0
+        assert self.store.contracts() == [key]
+        pd.testing.assert_frame_equal(self.store.read_frame(key), frame, check_freq=False)
+
+    def test_ingest_requests_only_the_gap(self):
+        contract = type('Contract', (), {'symbol': 'MNQ', 'lastTradeDateOrContractMonth': '202506'})()
+        frame = self._buffer("2025-03-18 09:00", 120).to_frame()
+        requests = []
+
+        class Api:
+            def get_historical_data(self, contract, duration, bar_size, timezone):
+                requests.append(duration)
+                return frame[frame.index <= clock.now(tz=timezone)]
+
+        with clock.using(SimulatedClock(frame.index[59])):
+            assert self.store.ingest(Api(), contract, Period("1min"), Period("1D")) == 60
+        with clock.using(SimulatedClock(frame.index[-1])):
+            assert self.store.ingest(Api(), contract, Period("1min"), Period("1D")) == 60
+
+        assert requests == ['1 D', '3660 S']
+        pd.testing.assert_frame_equal(self.store.read_frame("MNQ_202506_1min"), frame, check_freq=False)
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.market_data.bar_buffer import BarBuffer
+from src.market_data.resampler import MultiTimeframeBars, Resampler, resample_frame
+from src.indicators.cache import CachedIndicators
+from src.utilities.technical_analysis import SharedIndicators
+from src.utilities.period import Period
+
+
+class TestResampler:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Set up test fixtures before each test method."""
+        self.timezone = "US/Central"
+
+        # Two sessions of random walk bars around the daily break and a DST change
+        index = pd.date_range("2025-03-07 13:00", "2025-03-10 10:00", freq="1min", tz=self.timezone)
+        index = index[(index.hour != 16) & (index.dayofweek != 5) & ~((index.dayofweek == 6) & (index.hour < 17))]
+        rng = np.random.default_rng(11)
+        close = np.round((20000 + np.cumsum(rng.normal(0, 4, len(index)))) * 4) / 4
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        self.bars = pd.DataFrame({'open': open_, 'high': np.maximum(open_, close) + 1,
+                                  'low': np.minimum(open_, close) - 1, 'close': close,
+                                  'volume': rng.integers(1, 50, len(index)).astype(float)}, index=index)
+
+    @staticmethod
+    def _expected(bars, rule):
+        return bars.resample(rule).agg({'open': 'first', 'high': 'max', 'low': 'min',
+                                        'close': 'last', 'volume': 'sum'}).dropna()
+
+    def _assert_bars(self, buffer, expected):
+        actual = buffer.to_frame()
+        pd.testing.assert_index_equal(actual.index, expected.index, check_names=False)
+        for name in ('open', 'high', 'low', 'close', 'volume'):
+            np.testing.assert_allclose(actual[name].to_numpy(), expected[name].to_numpy())
+
+    @pytest.mark.parametrize("bar_size", ["5min", "15min", "60min", Period("30min")])
+    def test_resample_frame_matches_pandas(self, bar_size):
+        rule = str(bar_size).replace(" ", "")
+        actual = resample_frame(self.bars, bar_size, self.timezone)
+        expected = self._expected(self.bars, rule)
+
+        pd.testing.assert_index_equal(actual.index, expected.index, check_names=False)
+        np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy())
+
+    def test_incremental_matches_pandas(self):
+        base = BarBuffer(10000, self.timezone)
+        resampler = Resampler(base, "15min")
+
+        for i in range(len(self.bars)):
+            base.extend(self.bars.iloc[i:i + 1])
+            resampler.sync()
+
+            if i % 97 == 0:
+                self._assert_bars(resampler.bars, self._expected(self.bars.iloc[:i + 1], "15min"))
+
+        self._assert_bars(resampler.bars, self._expected(self.bars, "15min"))
+
+    def test_only_forming_bar_is_revised(self):
+        base = BarBuffer(10000, self.timezone)
+        base.extend(self.bars.iloc[:100])
+        resampler = Resampler(base, "15min")
+        resampler.sync()
+        completed = resampler.bars.to_frame().iloc[:-1]
+        appended = resampler.bars.version[1]
+
+        # Revision of the last base bar
+        revised = self.bars.iloc[99:100].copy()
+        revised['high'] += 50
+        revised['close'] += 40
+        base.extend(revised)
+        resampler.sync()
+
+        assert resampler.bars.version[1] == appended
+        pd.testing.assert_frame_equal(resampler.bars.to_frame().iloc[:-1], completed)
+        bars = self.bars.iloc[:100].copy()
+        bars.iloc[-1] = revised.iloc[0]
+        self._assert_bars(resampler.bars, self._expected(bars, "15min"))
+
+        # Nothing to do without new bars
+        version = resampler.bars.version
+        resampler.sync()
+        assert resampler.bars.version == version
+
+    def test_rebuilds_after_restore(self):
+        base = BarBuffer(10000, self.timezone)
+        base.extend(self.bars.iloc[:500])
+        resampler = Resampler(base, "5min")
+        resampler.sync()
+
+        state = BarBuffer(10000, self.timezone)
+        state.extend(self.bars.iloc[1000:1600])
+        base.set_state(state.get_state())
+        resampler.sync()
+
+        self._assert_bars(resampler.bars, self._expected(self.bars.iloc[1000:1600], "5min"))
+
+    def test_invalid_bar_size(self):
+        with pytest.raises(ValueError):
+            Resampler(BarBuffer(10, self.timezone), "7min")
+
+    def test_multiple_timeframes_from_one_feed(self):
+        base = BarBuffer(10000, self.timezone)
+        timeframes = MultiTimeframeBars(base)
+        indicators = CachedIndicators(base)
+
+        for i in range(0, 1000, 10):
+            base.extend(self.bars.iloc[i:i + 10])
+            assert timeframes.bars("5min") is timeframes.bars(Period("5min"))
+            timeframes.bars("15min")
+
+        assert len(timeframes) == 2
+        self._assert_bars(timeframes.bars("15min"), self._expected(self.bars.iloc[:1000], "15min"))
+        self._assert_bars(indicators.timeframe("60min"), self._expected(self.bars.iloc[:1000], "60min"))
+
+        shared = SharedIndicators(self.bars.iloc[:1000])
+        self._assert_bars(shared.timeframe("60min"), self._expected(self.bars.iloc[:1000], "60min"))
+        assert shared.computed == 0
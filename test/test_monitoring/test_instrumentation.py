@@ -0,0 +1,60 @@
+import os
+import json
+import logging
+import pytest
+from src.monitoring.instrumentation import Instrumentation, LatencyHistogram
+
+
+class TestInstrumentation:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Set up test fixtures before each test method."""
+        self.output_path = str(tmp_path)
+        self.instrumentation = Instrumentation()
+
+        yield
+
+        for handler in logging.getLogger('instrumentation.timings').handlers[:]:
+            handler.close()
+
+    def test_histogram_percentiles(self):
+        histogram = LatencyHistogram()
+
+        for i in range(1, 101):
+            histogram.record(i * 1e-3)
+
+        assert histogram.count == 100
+        assert histogram.max == pytest.approx(0.1)
+        assert histogram.percentile(50) == pytest.approx(0.05, rel=0.25)
+        assert histogram.percentile(99) == pytest.approx(0.099, rel=0.25)
+
+    def test_disabled_records_nothing(self):
+        with self.instrumentation.stage("stage"):
+            pass
+
+        self.instrumentation.begin_iteration()
+        assert self.instrumentation.end_iteration() is None
+        assert self.instrumentation.histograms == {}
+
+    def test_iteration_breakdown_is_written(self):
+        self.instrumentation.configure(True, self.output_path)
+
+        self.instrumentation.begin_iteration()
+        with self.instrumentation.stage("fetch"):
+            pass
+        with self.instrumentation.stage("fetch"):
+            pass
+        with self.instrumentation.stage("signals"):
+            pass
+        breakdown = self.instrumentation.end_iteration()
+
+        assert set(breakdown['stages']) == {"fetch", "signals"}
+        assert self.instrumentation.histograms["fetch"].count == 2
+        assert self.instrumentation.histograms["iteration"].count == 1
+
+        with open(os.path.join(self.output_path, "timings.jsonl")) as f:
+            lines = [json.loads(line) for line in f]
+
+        assert len(lines) == 1
+        assert lines[0]['iteration'] == 1
@@ -0,0 +1,55 @@
+import os
+import urllib.request
+import pytest
+from src.monitoring.metrics import MetricsRegistry, MetricsServer
+
+
+class TestMetrics:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Set up test fixtures before each test method."""
+        self.registry = MetricsRegistry()
+
+    def test_render_prometheus_text(self):
+        self.registry.counter('orders_total', 'Orders placed').inc(3)
+        self.registry.gauge('queue_depth', labels={'queue': 'log'}).set_function(lambda: 7)
+        histogram = self.registry.histogram('latency_seconds', buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value)
+
+        text = self.registry.render()
+
+        assert "# HELP orders_total Orders placed" in text
+        assert "# TYPE orders_total counter" in text
+        assert "orders_total 3" in text
+        assert 'queue_depth{queue="log"} 7' in text
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{le="1"} 2' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+        assert "latency_seconds_count 3" in text
+
+    def test_same_metric_is_returned(self):
+        counter = self.registry.counter('requests_total', labels={'method': 'get'})
+
+        assert self.registry.counter('requests_total', labels={'method': 'get'}) is counter
+        with pytest.raises(ValueError):
+            self.registry.gauge('requests_total')
+
+    def test_server_and_dump(self, tmp_path):
+        self.registry.counter('orders_total').inc()
+
+        server = MetricsServer(self.registry, port=0)
+        server.start()
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+                body = response.read().decode()
+        finally:
+            server.stop()
+
+        assert "orders_total 1" in body
+
+        path = os.path.join(str(tmp_path), "metrics.prom")
+        self.registry.dump(path)
+        with open(path) as f:
+            assert f.read() == self.registry.render()
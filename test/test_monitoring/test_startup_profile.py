@@ -0,0 +1,41 @@
+import sys
+import builtins
+import pytest
+from src.monitoring.startup_profile import StartupProfile
+
+
+class TestStartupProfile:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Set up test fixtures before each test method."""
+        self.profile = StartupProfile()
+        self.original_import = builtins.__import__
+
+        yield
+
+        self.profile.disable_import_profiling()
+        sys.modules.pop('colorsys', None)
+
+    def test_phases_are_recorded(self):
+        with self.profile.phase("configuration"):
+            pass
+        with self.profile.phase("connect"):
+            pass
+
+        assert [name for name, _, _ in self.profile.phases] == ["configuration", "connect"]
+        assert "connect" in self.profile.report()
+
+    def test_import_tree(self):
+        sys.modules.pop('colorsys', None)
+
+        self.profile.enable_import_profiling()
+        import colorsys
+        import os
+        self.profile.disable_import_profiling()
+
+        assert builtins.__import__ is self.original_import
+        names = [node.name for node in self.profile.imports.children]
+        assert 'colorsys' in names
+        assert 'os' not in names
+        assert "colorsys" in self.profile.report(min_import_ms=0)
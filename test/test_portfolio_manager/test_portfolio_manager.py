@@ -2,10 +2,13 @@ import pytest
 import pandas as pd
 from src.utilities.utils import trading_day_start_time_ts
 from src.portfolio.portfolio_manager import PortfolioManager
+from src.portfolio.position import Position
 from src.db.database import Database
 import os
 from src.configuration import Configuration
 from unittest.mock import patch
+from types import SimpleNamespace
+from ibapi.order import Order
 
 
 class TestPortfolioManager:
@@ -52,4 +55,25 @@ class TestPortfolioManager:
 
             assert loaded_inventory == expected_inventory
 
+    def test_check_state_keeps_other_instruments(self, tmp_path):
+        """Test only the orders and positions of the inconsistent instrument are deleted"""
+        db = Database(self.cfg.timezone, str(tmp_path / "trading.db"))
 
+        positions = []
+        for order_id, ticker in ((1, self.cfg.ticker), (2, 'MES')):
+            order = Order()
+            order.orderId, order.action, order.orderType = order_id, 'BUY', 'MKT'
+            order.totalQuantity, order.transmit = 1, True
+            db.add_order(order, ticker)
+            positions.append(Position(ticker, 'FUT', 'USD', '202506', order_id, 1, 20000.0, self.cfg.timezone))
+            db.add_position(positions[-1])
+
+        portfolio_manager = PortfolioManager(self.cfg, SimpleNamespace(get_matching_position=lambda position: None), db)
+        portfolio_manager.positions = positions[:1]
+
+        with patch('src.portfolio.portfolio_manager.PortfolioManager.cancel_all_orders'):
+            portfolio_manager._check_state_with_api()
+
+        remaining = db.get_all_orders_and_positions()
+        assert [order['order_id'] for order in remaining['orders']] == [2]
+        assert [position['ticker'] for position in remaining['positions']] == ['MES']
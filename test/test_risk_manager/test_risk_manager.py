@@ -6,6 +6,7 @@ import os
 from src.db.database import Database
 from unittest.mock import patch
 from src.portfolio.portfolio_manager import PortfolioManager
+from src.configuration import Configuration
 
 
 class TestRiskManager:
@@ -137,12 +138,20 @@ class TestRiskManager:
             now = pd.Timestamp("2025-03-18 13:00", tz=et_tz)
             edge_case = pd.Timestamp("2025-03-18 15:59", tz=et_tz)
             later = pd.Timestamp("2025-03-18 15:59:30", tz=et_tz)
+            after_close = pd.Timestamp("2025-03-18 16:01", tz=et_tz)
             eod_exit_time = "1559"
-            ptf_manager = PortfolioManager(None, None, None)
-
-            assert risk_manager.perform_eod_close(now, eod_exit_time, ptf_manager) == False
-            assert risk_manager.perform_eod_close(edge_case, eod_exit_time, ptf_manager) == True
-            assert risk_manager.perform_eod_close(later, eod_exit_time, ptf_manager) == True
+            market_close_time = "1600"
+            cfg = Configuration(os.path.join(os.getcwd(), "test", "test_strategy", "test_run.cfg"))
+            ptf_manager = PortfolioManager(cfg, None, None)
+
+            def eod_close(time):
+                return risk_manager.perform_eod_close(time, eod_exit_time, market_close_time, ptf_manager,
+                                                      wait_for_close=False)
+
+            assert eod_close(now) == False
+            assert eod_close(edge_case) == True
+            assert eod_close(later) == True
+            assert eod_close(after_close) == False
     
 
         
@@ -2,7 +2,9 @@ import unittest
 import pandas as pd
 import numpy as np
 import os
+from src.strategys.abstract_strategy import AbstractStrategy
 from src.strategys.bb_rsi_strategy import BollingerBandRSIStrategy
+from src.utilities.technical_analysis import SharedIndicators
 from src.utilities.enums import Signal
 from src.configuration import Configuration
 
@@ -27,6 +29,29 @@ class TestBollingerBandRSIStrategy(unittest.TestCase):
         signal = self.strategy.generate_signals(historical_data, self.cfg)
         self.assertEqual(signal, Signal.HOLD)
 
+    def test_generate_signals_does_not_modify_bars(self):
+        """Test that the bars passed to generate_signals are left unchanged"""
+        historical_data = pd.DataFrame({'close': 100 + np.cumsum(np.random.default_rng(2).normal(0, 1, 50))})
+        expected = historical_data.copy()
+
+        self.strategy.generate_signals(historical_data, self.cfg)
+        pd.testing.assert_frame_equal(historical_data, expected)
+
+    def test_default_signal_series(self):
+        """Test that the default signal series evaluates generate_signals on each prefix"""
+        class LastCloseUpStrategy(AbstractStrategy):
+            @staticmethod
+            def generate_signals(historical_data, cfg):
+                close = historical_data['close']
+                return Signal.BUY if len(close) > 1 and close.iloc[-1] > close.iloc[-2] else Signal.HOLD
+
+        historical_data = pd.DataFrame({'close': [100, 101, 100, 102, 103]})
+        signals = LastCloseUpStrategy.generate_signal_series(SharedIndicators(historical_data), self.cfg)
+
+        self.assertEqual(signals.dtype, np.int8)
+        self.assertEqual([Signal(int(value)) for value in signals],
+                         [Signal.HOLD, Signal.BUY, Signal.HOLD, Signal.BUY, Signal.BUY])
+
     # def test_generate_buy_signal(self):
     #     """Test that a BUY signal is generated when conditions for BUY are met"""
     #     # Create historical data with 20 points that will generate a buy signal
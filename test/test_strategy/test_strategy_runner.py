@@ -0,0 +1,114 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.configuration import Configuration
+from src.strategys.bb_rsi_strategy import BollingerBandRSIStrategy
+from src.strategys.strategy_runner import StrategyRunner, get_strategy
+from src.utilities.enums import Signal
+from src.market_data.bar_buffer import BarBuffer
+
+
+class TestStrategyRunner:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Set up test fixtures before each test method."""
+        config_path = os.path.join(os.getcwd(), "test", "test_strategy", "test_run.cfg")
+        self.cfg = Configuration(config_path)
+
+        rng = np.random.default_rng(1)
+        close = 100 + np.cumsum(rng.normal(0, 1, 300))
+        self.bars = pd.DataFrame({'close': close})
+
+    def _strategy_config(self, name, **overrides):
+        cfg = self.cfg.for_strategy(self.cfg.strategy)
+        cfg.strategy_name = name
+        for key, value in overrides.items():
+            setattr(cfg, key, value)
+        return cfg
+
+    def test_signals_match_single_strategy(self):
+        runner = StrategyRunner('MNQ', {'default': self._strategy_config('default')})
+
+        for end in range(30, len(self.bars)):
+            window = self.bars.iloc[:end]
+            expected = BollingerBandRSIStrategy.generate_signals(window.copy(), self.cfg)
+            assert runner.evaluate(window)['default'] == expected
+
+    def test_indicators_are_shared(self, monkeypatch):
+        configs = {
+            'a': self._strategy_config('a'),
+            'b': self._strategy_config('b', rsi_threshold=50),
+            'c': self._strategy_config('c', bollinger_period=40),
+        }
+        runner = StrategyRunner('MNQ', configs)
+
+        computed = []
+        original = BollingerBandRSIStrategy.generate_signal.__func__
+
+        def generate_signal(cls, indicators, cfg):
+            signal = original(cls, indicators, cfg)
+            computed.append(indicators.computed)
+            return signal
+
+        monkeypatch.setattr(BollingerBandRSIStrategy, 'generate_signal', classmethod(generate_signal))
+        signals = runner.evaluate(self.bars)
+
+        assert set(signals) == {'a', 'b', 'c'}
+        # One Bollinger Band and one RSI for 'a' and 'b', one more Bollinger Band for 'c'
+        assert computed == [2, 2, 3]
+        assert runner.last_cpu_seconds >= 0
+
+    def test_aggregate(self):
+        counts = StrategyRunner.aggregate({'a': Signal.BUY, 'b': Signal.HOLD, 'c': Signal.BUY})
+
+        assert counts[Signal.BUY] == 2
+        assert counts[Signal.HOLD] == 1
+        assert counts[Signal.SELL] == 0
+
+    def test_unknown_strategy(self):
+        with pytest.raises(ValueError):
+            get_strategy('unknown')
+
+    def test_incremental_signals_match_full_recomputation(self):
+        index = pd.date_range(pd.Timestamp("2025-03-18 09:00", tz=self.cfg.timezone), periods=len(self.bars), freq="1min")
+        bars = pd.DataFrame({
+            'open': self.bars['close'].to_numpy(),
+            'high': self.bars['close'].to_numpy() + 1,
+            'low': self.bars['close'].to_numpy() - 1,
+            'close': self.bars['close'].to_numpy(),
+            'volume': np.full(len(self.bars), 10.0),
+        }, index=index)
+
+        buffer = BarBuffer(1000, self.cfg.timezone)
+        runner = StrategyRunner('MNQ', {'default': self._strategy_config('default', rsi_threshold=50)}, buffer)
+
+        buys = 0
+        for end in range(1, len(bars)):
+            buffer.extend(bars.iloc[end - 1:end])
+            expected = runner.evaluate(bars.iloc[:end])['default']
+            assert runner.evaluate()['default'] == expected
+            buys += expected == Signal.BUY
+
+        assert buys > 0
+
+    def test_signal_series_match_single_bar_signals(self):
+        configs = {
+            'default': self._strategy_config('default', rsi_threshold=50),
+            'buy': self._strategy_config('buy', strategy='buy'),
+        }
+        runner = StrategyRunner('MNQ', configs)
+        bars = self.bars.copy()
+
+        series = runner.evaluate_series(bars)
+
+        assert series['default'].dtype == np.int8
+        assert (series['buy'] == Signal.BUY.value).all()
+        for end in range(1, len(bars) + 1):
+            expected = runner.evaluate(bars.iloc[:end])['default']
+            assert Signal(int(series['default'][end - 1])) == expected
+        assert (series['default'] == Signal.BUY.value).any()
+
+        # The bars are not modified
+        pd.testing.assert_frame_equal(bars, self.bars)
@@ -0,0 +1,91 @@
+import time
+import pandas as pd
+import pytest
+from src.utilities.clock import AcceleratedClock, Clock, ClockStopped, SimulatedClock, WallClock, clock
+from src.utilities.utils import trading_day_start_time_ts
+
+
+class TestClock:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Set up test fixtures before each test method."""
+        self.timezone = "US/Central"
+        self.start = pd.Timestamp("2025-03-18 08:00", tz=self.timezone)
+        self.clock = Clock()
+
+    def test_wall_clock_by_default(self):
+        assert not self.clock.simulated
+        assert abs(self.clock.now(tz='UTC') - pd.Timestamp.now(tz='UTC')) < pd.Timedelta(seconds=5)
+        assert self.clock.now().tzinfo is None
+
+    def test_using_restores_previous_clock(self):
+        with self.clock.using(SimulatedClock(self.start)):
+            assert self.clock.simulated
+            assert self.clock.now(tz=self.timezone) == self.start
+            self.clock.sleep(90)
+            assert self.clock.now(tz=self.timezone) == self.start + pd.Timedelta(seconds=90)
+
+        assert not self.clock.simulated
+
+        self.clock.install(SimulatedClock(self.start))
+        assert self.clock.simulated
+        self.clock.reset()
+        assert isinstance(self.clock._clock, WallClock)
+
+    def test_time_dependent_code_follows_installed_clock(self):
+        with clock.using(SimulatedClock(pd.Timestamp("2025-03-18 11:00", tz=self.timezone))):
+            assert trading_day_start_time_ts("2100", self.timezone, day_offset=-1) == \
+                pd.Timestamp("2025-03-17 21:00", tz=self.timezone)
+
+    def test_simulated_clock_listeners_and_end(self):
+        sim_clock = SimulatedClock(self.start, end=self.start + pd.Timedelta(minutes=5))
+        times = []
+        sim_clock.listeners.append(times.append)
+
+        sim_clock.sleep(60)
+        sim_clock.advance_to(self.start + pd.Timedelta(minutes=3))
+        assert times == [self.start + pd.Timedelta(minutes=1), self.start + pd.Timedelta(minutes=3)]
+
+        with pytest.raises(ValueError):
+            sim_clock.advance_to(self.start)
+        with pytest.raises(ClockStopped):
+            sim_clock.sleep(600)
+        assert sim_clock.now(tz=self.timezone) == self.start + pd.Timedelta(minutes=5)
+
+    def test_simulated_clock_requires_timezone(self):
+        with pytest.raises(ValueError):
+            SimulatedClock(pd.Timestamp("2025-03-18 08:00"))
+
+
+class TestAcceleratedClock:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Set up test fixtures before each test method."""
+        self.start = pd.Timestamp("2025-03-18 08:00", tz="US/Central")
+
+    def test_sleep_is_scaled(self):
+        sim_clock = AcceleratedClock(self.start, speed=600)
+
+        started = time.perf_counter()
+        sim_clock.sleep(60)
+        elapsed = time.perf_counter() - started
+
+        assert sim_clock.now("US/Central") == self.start + pd.Timedelta(minutes=1)
+        assert 0.09 <= elapsed < 1.0
+
+    def test_as_fast_as_possible(self):
+        sim_clock = AcceleratedClock(self.start, end=self.start + pd.Timedelta(hours=1))
+
+        started = time.perf_counter()
+        for _ in range(59):
+            sim_clock.sleep(60)
+        assert time.perf_counter() - started < 0.5
+
+        with pytest.raises(ClockStopped):
+            sim_clock.sleep(120)
+
+    def test_invalid_speed(self):
+        with pytest.raises(ValueError):
+            AcceleratedClock(self.start, speed=0)
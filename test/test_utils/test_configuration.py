@@ -0,0 +1,89 @@
+import os
+import configparser
+import pytest
+from src.configuration import Configuration
+
+
+class TestConfiguration:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Set up test fixtures before each test method."""
+        self.legacy_path = os.path.join(os.getcwd(), "test", "test_strategy", "test_run.cfg")
+
+        parser = configparser.ConfigParser()
+        parser.read(self.legacy_path)
+        parser.set('Trading', 'instruments', 'MNQ, MES')
+        parser.set('Trading', 'strategies', 'fast, slow')
+        parser['Strategy_fast'] = {'type': 'bollinger_rsi', 'rsi_period': '7'}
+        parser['Strategy_slow'] = {'type': 'buy', 'number_of_contracts': '3'}
+        for symbol, tick_size, point_value in (('MNQ', '0.25', '2'), ('MES', '0.25', '5')):
+            parser[f'Instrument_{symbol}'] = {
+                'exchange': 'CME',
+                'number_of_contracts': '1',
+                'tick_size': tick_size,
+                'point_value': point_value,
+            }
+
+        self.multi_path = os.path.join(str(tmp_path), "run.cfg")
+        with open(self.multi_path, 'w') as f:
+            parser.write(f)
+
+    def test_legacy_single_instrument(self):
+        cfg = Configuration(self.legacy_path)
+
+        assert list(cfg.instruments) == ['MNQ']
+        assert cfg.ticker == 'MNQ'
+        assert cfg.number_of_contracts == 2
+        assert cfg.mnq_point_value == 2
+        assert list(cfg.strategies) == ['bollinger_rsi']
+
+    def test_multiple_instruments(self):
+        cfg = Configuration(self.multi_path)
+
+        assert list(cfg.instruments) == ['MNQ', 'MES']
+        assert cfg.ticker == 'MNQ'
+
+        mes = cfg.for_instrument('MES')
+        assert mes.ticker == 'MES'
+        assert mes.mnq_point_value == 5
+        assert mes.number_of_contracts == 1
+        assert cfg.ticker == 'MNQ'
+
+        with pytest.raises(ValueError):
+            cfg.for_instrument('M2K')
+
+    def test_multiple_strategies(self):
+        cfg = Configuration(self.multi_path)
+
+        assert list(cfg.strategies) == ['fast', 'slow']
+
+        fast = cfg.for_instrument('MES').for_strategy('fast')
+        assert fast.strategy == 'bollinger_rsi'
+        assert fast.strategy_name == 'fast'
+        assert fast.rsi_period == 7
+        assert fast.bollinger_period == cfg.bollinger_period
+        assert fast.ticker == 'MES'
+
+        slow = cfg.for_strategy('slow')
+        assert slow.strategy == 'buy'
+        assert slow.number_of_contracts == 3
+        assert cfg.number_of_contracts == 1
+
+    def test_settings_added_later_are_optional(self, tmp_path):
+        parser = configparser.ConfigParser()
+        parser.read(self.legacy_path)
+        parser.remove_option('Run', 'warm_restart')
+        parser.remove_option('Market_Data', 'bar_buffer_capacity')
+        parser.remove_section('Monitoring')
+
+        path = os.path.join(str(tmp_path), "old_run.cfg")
+        with open(path, 'w') as f:
+            parser.write(f)
+        cfg = Configuration(path)
+
+        assert not cfg.warm_restart
+        assert not cfg.debug_dumps
+        assert cfg.bar_buffer_capacity == 2880
+        assert not cfg.instrumentation
+        assert cfg.metrics_port == 0
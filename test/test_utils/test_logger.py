@@ -0,0 +1,89 @@
+import os
+import gzip
+import time
+import logging
+import pytest
+from datetime import datetime
+from src.utilities.logger import Logger, RateLimitFilter, DailyRotatingFileHandler
+
+
+class TestLogger:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch):
+        """Set up test fixtures before each test method."""
+        monkeypatch.chdir(tmp_path)
+        self.output_path = os.path.join(str(tmp_path), "output")
+
+        yield
+
+        Logger.stop()
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+
+    def test_records_are_written_by_listener(self):
+        Logger()
+        logging.info("Value: %s", 42)
+        Logger.stop()
+
+        with open(os.path.join(self.output_path, f"Logger_{datetime.now().strftime('%d%m%Y')}.log")) as f:
+            content = f.read()
+
+        assert "Logger initialized" in content
+        assert "Value: 42" in content
+
+    def test_rate_limit_filter(self):
+        rate_filter = RateLimitFilter(max_messages=2, interval_seconds=60)
+
+        def record(created):
+            rec = logging.LogRecord("root", logging.INFO, __file__, 0, "Repeated %s", (1,), None)
+            rec.created = created
+            return rec
+
+        assert [rate_filter.filter(record(t)) for t in (0, 1, 2, 3)] == [True, True, False, False]
+
+        next_window = record(61)
+        assert rate_filter.filter(next_window)
+        assert "2 similar message(s) suppressed" in next_window.getMessage()
+
+        warning = logging.LogRecord("root", logging.WARNING, __file__, 0, "Repeated %s", (1,), None)
+        warning.created = 62
+        assert all(rate_filter.filter(warning) for _ in range(5))
+
+    def test_rate_limit_filter_windows_are_bounded(self):
+        rate_filter = RateLimitFilter(max_messages=1, interval_seconds=60, max_windows=3)
+
+        def record(msg, args, created):
+            rec = logging.LogRecord("root", logging.INFO, __file__, 0, msg, args, None)
+            rec.created = created
+            return rec
+
+        # Different arguments of the same template share a window
+        assert [rate_filter.filter(record("Price %s", (price,), 0)) for price in (1, 2)] == [True, False]
+
+        for i in range(5):
+            assert rate_filter.filter(record(f"Unique {i}", None, 1))
+        assert len(rate_filter._windows) <= 3
+
+        # Expired windows are dropped, the ones holding suppressed counts are kept
+        rate_filter.filter(record("Later", None, 120))
+        assert set(key[2] for key in rate_filter._windows) == {"Price %s", "Later"}
+
+    def test_size_rollover_is_compressed(self):
+        os.makedirs(self.output_path)
+        handler = DailyRotatingFileHandler(self.output_path, datetime.now(), max_bytes=100)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+
+        for i in range(10):
+            handler.emit(logging.LogRecord("root", logging.INFO, __file__, 0, "x" * 40, None, None))
+        handler.close()
+
+        rolled = os.path.join(self.output_path, f"Logger_{datetime.now().strftime('%d%m%Y')}.1.log.gz")
+        for _ in range(50):
+            if os.path.exists(rolled) and not os.path.exists(rolled[:-len(".gz")]):
+                break
+            time.sleep(0.05)
+
+        with gzip.open(rolled, 'rt') as f:
+            assert f.read().startswith("x" * 40)
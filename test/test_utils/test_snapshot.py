@@ -0,0 +1,68 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.market_data.bar_buffer import BarBuffer
+from src.utilities.snapshot import write_snapshot, read_snapshot, SnapshotError
+
+
+class TestSnapshot:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Set up test fixtures before each test method."""
+        self.path = os.path.join(str(tmp_path), "snapshot.bin")
+        self.timezone = "US/Central"
+
+    def _buffer(self, n):
+        buffer = BarBuffer(100, self.timezone)
+        index = pd.date_range(pd.Timestamp("2025-03-18 09:00", tz=self.timezone), periods=n, freq="1min")
+        close = np.arange(n, dtype=float)
+        buffer.extend(pd.DataFrame({
+            'open': close, 'high': close + 1, 'low': close - 1, 'close': close, 'volume': np.full(n, 10.0),
+        }, index=index))
+        return buffer
+
+    def test_round_trip(self):
+        buffer = self._buffer(20)
+        state = {
+            'bars': buffer.get_state(),
+            'orders': [[{'order_id': 7, 'already_handled': True}]],
+            'order_statuses': {7: {'status': 'Filled', 'avg_fill_price': 100.25}},
+            'created': pd.Timestamp("2025-03-18 09:20", tz=self.timezone),
+        }
+
+        write_snapshot(self.path, state)
+        snapshot = read_snapshot(self.path)['state']
+
+        restored = BarBuffer(100, self.timezone)
+        restored.set_state(snapshot['bars'])
+
+        assert len(restored) == 20
+        assert restored.last_timestamp == buffer.last_timestamp
+        np.testing.assert_array_equal(restored.column('close'), buffer.column('close'))
+        assert snapshot['orders'] == [[{'order_id': 7, 'already_handled': True}]]
+        assert snapshot['order_statuses']['7']['avg_fill_price'] == 100.25
+        assert pd.Timestamp(snapshot['created']) == state['created']
+
+    def test_set_state_keeps_latest_bars(self):
+        buffer = self._buffer(80)
+
+        restored = BarBuffer(50, self.timezone)
+        restored.set_state(buffer.get_state())
+
+        assert len(restored) == 50
+        assert restored.column('close')[0] == 30
+
+    def test_corrupt_snapshot_is_rejected(self):
+        write_snapshot(self.path, {'bars': self._buffer(10).get_state()})
+
+        with open(self.path, 'r+b') as f:
+            f.seek(-4, os.SEEK_END)
+            f.write(b'\xff\xff\xff\xff')
+
+        with pytest.raises(SnapshotError):
+            read_snapshot(self.path)
+
+        with pytest.raises(SnapshotError):
+            read_snapshot(self.path + ".missing")
@@ -1,5 +1,6 @@
 import pytest
 import pandas as pd
+from src.utilities.clock import clock, SimulatedClock
 from src.utilities.utils import trading_day_start_time_ts
 
 
@@ -17,9 +18,7 @@ class TestUtils:
         expected_time = pd.Timestamp("2025-03-01 09:30:00", tz=self.timezone)
         now_test_date = pd.Timestamp("2025-03-01 11:00:00", tz=self.timezone)
 
-        with pytest.MonkeyPatch.context() as mp:
-            mp.setattr('pandas.Timestamp.now', lambda tz=None: now_test_date)
-
+        with clock.using(SimulatedClock(now_test_date)):
             result = trading_day_start_time_ts(start_time, self.timezone, day_offset=0)
 
         assert result == expected_time
@@ -30,8 +29,6 @@ class TestUtils:
         expected_time = pd.Timestamp("2025-03-01 21:00:00", tz=self.timezone)
         now_test_date = pd.Timestamp("2025-03-02 11:00:00", tz=self.timezone)
 
-        with pytest.MonkeyPatch.context() as mp:
-            mp.setattr('pandas.Timestamp.now', lambda tz=None: now_test_date)
-
+        with clock.using(SimulatedClock(now_test_date)):
             result = trading_day_start_time_ts(start_time, self.timezone, day_offset=-1)
         assert result == expected_time